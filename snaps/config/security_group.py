@@ -204,7 +204,8 @@ class SecurityGroupRuleConfig(object):
             raise SecurityGroupRuleConfigError(
                 'direction and sec_grp_name are required')
 
-    def dict_for_neutron(self, neutron, keystone, project_name):
+    def dict_for_neutron(self, neutron, keystone, project_name,
+                         sec_grp_ids=None):
         """
         Returns a dictionary object representing this object.
         This is meant to be converted into JSON designed for use by the Neutron
@@ -212,6 +213,9 @@ class SecurityGroupRuleConfig(object):
         :param neutron: the neutron client for performing lookups
         :param keystone: the keystone client for performing lookups
         :param project_name: the name of the project associated with the group
+        :param sec_grp_ids: optional dict of security group names to IDs
+                            consulted before looking up the group, which is
+                            then added (i.e. shared when creating many rules)
         :return: the dictionary object
         """
         out = dict()
@@ -229,11 +233,16 @@ class SecurityGroupRuleConfig(object):
         if self.protocol and self.protocol.value != 'null':
             out['protocol'] = self.protocol.value
         if self.sec_grp_name:
-            sec_grp = neutron_utils.get_security_group(
-                neutron, keystone, sec_grp_name=self.sec_grp_name,
-                project_name=project_name)
-            if sec_grp:
-                out['security_group_id'] = sec_grp.id
+            if sec_grp_ids is None:
+                sec_grp_ids = dict()
+            if self.sec_grp_name not in sec_grp_ids:
+                sec_grp = neutron_utils.get_security_group(
+                    neutron, keystone, sec_grp_name=self.sec_grp_name,
+                    project_name=project_name)
+                if sec_grp:
+                    sec_grp_ids[self.sec_grp_name] = sec_grp.id
+            if self.sec_grp_name in sec_grp_ids:
+                out['security_group_id'] = sec_grp_ids[self.sec_grp_name]
             else:
                 raise SecurityGroupRuleConfigError(
                     'Cannot locate security group with name - ' +
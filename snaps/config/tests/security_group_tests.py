@@ -102,6 +102,16 @@ class SecurityGroupRuleConfigUnitTests(unittest.TestCase):
         self.assertEqual(2, settings.port_range_max)
         self.assertEqual('prfx', settings.remote_ip_prefix)
 
+    def test_dict_for_neutron_known_sec_grp(self):
+        settings = SecurityGroupRuleConfig(
+            sec_grp_name='foo', direction=Direction.ingress,
+            protocol=Protocol.tcp, port_range_min=22, port_range_max=22)
+        rule_dict = settings.dict_for_neutron(
+            None, None, 'proj', sec_grp_ids={'foo': 'foo-id'})
+        self.assertEqual({'security_group_rule': {
+            'direction': 'ingress', 'protocol': 6, 'port_range_min': 22,
+            'port_range_max': 22, 'security_group_id': 'foo-id'}}, rule_dict)
+
     def test_config_all(self):
         settings = SecurityGroupRuleConfig(
             **{'sec_grp_name': 'foo',
@@ -151,6 +151,42 @@ class VmInstanceConfigUnitTests(unittest.TestCase):
         self.assertEqual(998, settings.cloud_init_timeout)
         self.assertEqual('server name', settings.availability_zone)
         self.assertEqual('vol2', settings.volume_names[0])
+        self.assertEqual(1, settings.count)
+
+    def test_invalid_count(self):
+        port_settings = PortConfig(name='foo-port', network_name='bar-net')
+        with self.assertRaises(VmInstanceConfigError):
+            VmInstanceConfig(name='foo', flavor='bar',
+                             port_settings=[port_settings], count=0)
+        with self.assertRaises(VmInstanceConfigError):
+            VmInstanceConfig(name='foo', flavor='bar',
+                             port_settings=[port_settings], count='two')
+
+    def test_member_configs(self):
+        port_settings = PortConfig(name='foo-port', network_name='bar-net')
+        fip_settings = FloatingIpConfig(name='foo-fip', port_name='foo-port',
+                                        router_name='foo-bar-router')
+        settings = VmInstanceConfig(
+            **{'name': 'foo', 'flavor': 'bar', 'ports': [port_settings],
+               'floating_ips': [fip_settings], 'count': '3'})
+        self.assertEqual(3, settings.count)
+
+        members = settings.member_configs()
+        self.assertEqual(3, len(members))
+        for index, member in enumerate(members, 1):
+            self.assertEqual('foo-' + str(index), member.name)
+            self.assertEqual(1, member.count)
+            self.assertEqual('bar', member.flavor)
+            self.assertEqual('foo-port-' + str(index),
+                             member.port_settings[0].name)
+            self.assertEqual('bar-net', member.port_settings[0].network_name)
+            self.assertEqual('foo-fip-' + str(index),
+                             member.floating_ip_settings[0].name)
+            self.assertEqual('foo-port-' + str(index),
+                             member.floating_ip_settings[0].port_name)
+
+        self.assertEqual('foo', settings.name)
+        self.assertEqual('foo-port', settings.port_settings[0].name)
 
 
 class FloatingIpConfigUnitTests(unittest.TestCase):
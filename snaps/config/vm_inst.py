@@ -12,6 +12,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
+
 from snaps.config.network import PortConfig
 
 
@@ -50,6 +52,9 @@ class VmInstanceConfig(object):
                          must contain the key 'cloud-init_file' which denotes
                          the location of some file containing the cloud-init
                          script
+        :param count: the number of identical VMs to create where each is
+                      named <name>-<index> starting at index 1 along with its
+                      ports and floating IPs (default 1)
         """
         self.name = kwargs.get('name')
         self.flavor = kwargs.get('flavor')
@@ -102,6 +107,13 @@ class VmInstanceConfig(object):
         if self.volume_names and not isinstance(self.volume_names, list):
             raise VmInstanceConfigError('volume_names must be a list')
 
+        try:
+            self.count = int(kwargs.get('count', 1))
+        except (TypeError, ValueError):
+            raise VmInstanceConfigError('count must be an integer')
+        if self.count < 1:
+            raise VmInstanceConfigError('count must be at least 1')
+
         if not self.name or not self.flavor:
             raise VmInstanceConfigError(
                 'Instance configuration requires the attributes: name, flavor')
@@ -110,6 +122,33 @@ class VmInstanceConfig(object):
             raise VmInstanceConfigError(
                 'Instance configuration requires port settings (aka. NICS)')
 
+    def member_configs(self):
+        """
+        Returns the configuration of each VM when count is greater than one
+        where the names of the VM, its ports and floating IPs are suffixed
+        with the index of the member
+        :return: a list of VmInstanceConfig objects
+        """
+        if self.count == 1:
+            return [self]
+
+        out = list()
+        for index in range(1, self.count + 1):
+            member = copy.deepcopy(self)
+            member.count = 1
+            member.name = '{}-{}'.format(self.name, index)
+            for port_setting in member.port_settings:
+                if port_setting.name:
+                    port_setting.name = '{}-{}'.format(
+                        port_setting.name, index)
+            for fip_setting in member.floating_ip_settings:
+                fip_setting.name = '{}-{}'.format(fip_setting.name, index)
+                if fip_setting.port_name:
+                    fip_setting.port_name = '{}-{}'.format(
+                        fip_setting.port_name, index)
+            out.append(member)
+        return out
+
 
 class FloatingIpConfig(object):
     """
@@ -17,6 +17,7 @@ import logging
 import unittest
 
 from snaps import test_suite_builder
+from snaps.openstack import create_image
 from snaps.openstack.create_image import OpenStackImage
 from snaps.openstack.tests import openstack_tests
 from snaps.openstack.tests.os_source_file_test import OSComponentTestCase
@@ -168,6 +169,9 @@ def main(arguments):
     logging.basicConfig(level=log_level)
     logger.info('Starting test suite')
 
+    if arguments.reuse_images != ARG_NOT_SET:
+        create_image.REUSE_IDENTICAL_IMAGES = True
+
     __run_tests(arguments.env, arguments.ext_net, arguments.proxy, arguments.ssh_proxy_cmd,
                 arguments.use_keystone != ARG_NOT_SET, arguments.floating_ips != ARG_NOT_SET, log_level)
 
@@ -190,6 +194,9 @@ if __name__ == '__main__':
                         help='When argument is set, the tests will exercise the keystone APIs and must be run on a ' +
                              'machine that has access to the admin network' +
                              ' and is able to create users and groups')
+    parser.add_argument('-r', '--reuse-images', dest='reuse_images', default=ARG_NOT_SET, nargs='?',
+                        help='When argument is set, existing images with identical contents are used in lieu of ' +
+                             'uploading the same image again')
 
     args = parser.parse_args()
 
@@ -62,6 +62,34 @@ class Resource:
         self.status_reason = status_reason
 
 
+class Event:
+    """
+    SNAPS domain object for an event emitted by a heat stack or one of its
+    resources
+    """
+    def __init__(self, event_id, stack_name, name, resource_type,
+                 resource_id, status, status_reason, event_time):
+        """
+        Constructor
+        :param event_id: the event's ID
+        :param stack_name: the name of the (nested) stack owning the resource
+        :param name: the resource's logical name
+        :param resource_type: the resource's type
+        :param resource_id: the resource's physical ID (may be None)
+        :param status: the resource's status code (i.e. 'CREATE_COMPLETE')
+        :param status_reason: the resource's status code reason
+        :param event_time: the time the event occurred as returned by Heat
+        """
+        self.id = event_id
+        self.stack_name = stack_name
+        self.name = name
+        self.type = resource_type
+        self.resource_id = resource_id
+        self.status = status
+        self.status_reason = status_reason
+        self.event_time = event_time
+
+
 class Output:
     """
     SNAPS domain object for an output defined by a heat template
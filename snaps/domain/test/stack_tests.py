@@ -14,7 +14,7 @@
 # limitations under the License.
 
 import unittest
-from snaps.domain.stack import Stack, Resource, Output
+from snaps.domain.stack import Stack, Resource, Output, Event
 
 
 class StackDomainObjectTests(unittest.TestCase):
@@ -66,6 +66,24 @@ class ResourceDomainObjectTests(unittest.TestCase):
         self.assertIsNone(resource.status_reason)
 
 
+class EventDomainObjectTests(unittest.TestCase):
+    """
+    Tests the construction of the snaps.domain.Event class
+    """
+
+    def test_construction_positional(self):
+        event = Event('id', 'stack', 'res_name', 'foo', 'bar',
+                      'CREATE_COMPLETE', 'reason', '2017-01-01T00:00:00Z')
+        self.assertEqual('id', event.id)
+        self.assertEqual('stack', event.stack_name)
+        self.assertEqual('res_name', event.name)
+        self.assertEqual('foo', event.type)
+        self.assertEqual('bar', event.resource_id)
+        self.assertEqual('CREATE_COMPLETE', event.status)
+        self.assertEqual('reason', event.status_reason)
+        self.assertEqual('2017-01-01T00:00:00Z', event.event_time)
+
+
 class OutputDomainObjectTests(unittest.TestCase):
     """
     Tests the construction of the snaps.domain.Resource class
@@ -12,7 +12,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import ssl
+import threading
 
 import os
 import logging
@@ -34,6 +36,10 @@ Utilities for basic file handling
 
 logger = logging.getLogger('file_utils')
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+MIN_SEGMENT_SIZE = 16 * 1024 * 1024
+PARTIAL_SUFFIX = '.part'
+
 
 def file_exists(file_path):
     """
@@ -49,36 +55,246 @@ def file_exists(file_path):
     return False
 
 
-def download(url, dest_path, name=None):
+def download(url, dest_path, name=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+             segments=1, resume=False, hash_algorithms=None,
+             progress_callback=None):
     """
     Download a file to a destination path given a URL
     :param url: the endpoint to the file to download
     :param dest_path: the directory to save the file
     :param name: the file name (optional)
+    :param chunk_size: see fetch()
+    :param segments: see fetch()
+    :param resume: see fetch()
+    :param hash_algorithms: see fetch()
+    :param progress_callback: see fetch()
     :rtype : File object
     """
     if not name:
         name = url.rsplit('/')[-1]
     dest = dest_path + '/' + name
-    logger.debug('Downloading file from - ' + url)
-    # Override proxy settings to use localhost to download file
-    download_file = None
 
     if not os.path.isdir(dest_path):
         try:
             os.mkdir(dest_path)
         except:
             raise
+
+    fetch(url, dest, chunk_size=chunk_size, segments=segments,
+          resume=resume, hash_algorithms=hash_algorithms,
+          progress_callback=progress_callback)
+
+    download_file = open(dest, 'rb')
+    download_file.close()
+    return download_file
+
+
+def fetch(url, file_path, chunk_size=DOWNLOAD_CHUNK_SIZE, segments=1,
+          resume=False, hash_algorithms=None, progress_callback=None):
+    """
+    Streams the contents of a URL to a file reading no more than chunk_size
+    bytes at a time. The contents are written to file_path + PARTIAL_SUFFIX
+    which is renamed to file_path once complete
+    :param url: the endpoint to the file to download
+    :param file_path: the path of the file to create
+    :param chunk_size: the number of bytes read and written at a time
+    :param segments: the number of HTTP Range requests to download
+                     concurrently when the server supports them and the file
+                     is at least MIN_SEGMENT_SIZE bytes per segment
+    :param resume: when True, a partial file left by a previous download is
+                   continued rather than restarted (sequential downloads only)
+    :param hash_algorithms: list of hashlib algorithm names (i.e. 'md5',
+                            'sha256') to compute over the contents
+    :param progress_callback: function called with the number of bytes
+                              downloaded and the total number of bytes (None
+                              when unknown) after each chunk
+    :return: a DownloadResult object
+    :raise: URLError or IOError
+    """
+    logger.debug('Downloading file from - ' + url)
+    part_path = file_path + PARTIAL_SUFFIX
+    offset = 0
+    if resume and os.path.isfile(part_path):
+        offset = os.path.getsize(part_path)
+
     try:
-        with open(dest, 'wb') as download_file:
-            logger.debug('Saving file to - %s',
-                         os.path.abspath(download_file.name))
-            response = __get_url_response(url)
-            download_file.write(response.read())
-        return download_file
+        return __fetch(url, file_path, part_path, offset, chunk_size,
+                       segments, hash_algorithms, progress_callback)
+    except:
+        if not resume and os.path.isfile(part_path):
+            os.remove(part_path)
+        raise
+
+
+def __fetch(url, file_path, part_path, offset, chunk_size, segments,
+            hash_algorithms, progress_callback):
+    """
+    Performs the download for fetch()
+    :return: a DownloadResult object
+    """
+    response = None
+    if offset:
+        try:
+            response = __get_url_response(
+                url, {'Range': 'bytes={}-'.format(offset)})
+        except urllib.HTTPError as e:
+            # 416 is returned when the partial file is already complete
+            if e.code != 416:
+                raise
+            offset = 0
+    if not response:
+        response = __get_url_response(url)
+
+    try:
+        if offset and response.getcode() != 206:
+            logger.info('Server does not support resuming %s, restarting', url)
+            offset = 0
+        length = response.headers.get('Content-Length')
+        total = int(length) + offset if length is not None else None
+
+        logger.debug('Saving file to - %s', os.path.abspath(part_path))
+        if (segments > 1 and not offset and total
+                and total >= segments * MIN_SEGMENT_SIZE
+                and response.headers.get('Accept-Ranges') == 'bytes'):
+            response.close()
+            __fetch_segments(url, part_path, total, segments, chunk_size,
+                             progress_callback)
+            digests = hash_file(part_path, hash_algorithms, chunk_size)
+        else:
+            digests = __fetch_sequential(
+                response, part_path, offset, total, chunk_size,
+                hash_algorithms, progress_callback)
     finally:
-        if download_file:
-            download_file.close()
+        response.close()
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise IOError('Downloaded {} of {} bytes from {}'.format(
+            size, total, url))
+
+    os.rename(part_path, file_path)
+    return DownloadResult(file_path, size, digests)
+
+
+def __fetch_sequential(response, part_path, offset, total, chunk_size,
+                       hash_algorithms, progress_callback):
+    """
+    Writes the response body to the partial file starting at offset
+    :return: a dict of algorithm name to hex digest
+    """
+    hashes = __new_hashes(hash_algorithms)
+    if offset:
+        with open(part_path, 'rb') as existing:
+            __update_hashes(hashes, existing, chunk_size)
+        mode = 'ab'
+    else:
+        mode = 'wb'
+
+    done = offset
+    with open(part_path, mode) as part_file:
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            part_file.write(chunk)
+            for file_hash in hashes.values():
+                file_hash.update(chunk)
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, total)
+
+    return dict((name, file_hash.hexdigest())
+                for name, file_hash in hashes.items())
+
+
+def __fetch_segments(url, part_path, total, segments, chunk_size,
+                     progress_callback):
+    """
+    Downloads the file as concurrent HTTP Range requests each writing its
+    own region of the partial file
+    """
+    with open(part_path, 'wb') as part_file:
+        part_file.truncate(total)
+
+    segment_size = total // segments
+    progress = {'done': 0}
+    lock = threading.Lock()
+    errors = list()
+
+    def fetch_segment(start, end):
+        try:
+            response = __get_url_response(
+                url, {'Range': 'bytes={}-{}'.format(start, end)})
+            try:
+                if response.getcode() != 206:
+                    raise IOError('Range request not honored for ' + url)
+                with open(part_path, 'r+b') as part_file:
+                    part_file.seek(start)
+                    while True:
+                        chunk = response.read(chunk_size)
+                        if not chunk:
+                            break
+                        part_file.write(chunk)
+                        with lock:
+                            progress['done'] += len(chunk)
+                            if progress_callback:
+                                progress_callback(progress['done'], total)
+            finally:
+                response.close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = list()
+    for index in range(segments):
+        start = index * segment_size
+        end = total - 1 if index == segments - 1 else start + segment_size - 1
+        thread = threading.Thread(target=fetch_segment, args=(start, end))
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    if progress['done'] != total:
+        raise IOError('Downloaded {} of {} bytes from {}'.format(
+            progress['done'], total, url))
+
+
+def hash_file(file_path, hash_algorithms, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Returns the digests of a file's contents
+    :param file_path: the path to the file
+    :param hash_algorithms: list of hashlib algorithm names
+    :param chunk_size: the number of bytes read at a time
+    :return: a dict of algorithm name to hex digest
+    """
+    hashes = __new_hashes(hash_algorithms)
+    if hashes:
+        with open(file_path, 'rb') as the_file:
+            __update_hashes(hashes, the_file, chunk_size)
+    return dict((name, file_hash.hexdigest())
+                for name, file_hash in hashes.items())
+
+
+def __new_hashes(hash_algorithms):
+    """
+    Returns a dict of algorithm name to new hashlib object
+    """
+    return dict((name, hashlib.new(name)) for name in hash_algorithms or [])
+
+
+def __update_hashes(hashes, the_file, chunk_size):
+    """
+    Feeds the remaining contents of a file to each hash
+    """
+    while hashes:
+        chunk = the_file.read(chunk_size)
+        if not chunk:
+            break
+        for file_hash in hashes.values():
+            file_hash.update(chunk)
 
 
 def save_keys_to_files(keys=None, pub_file_path=None, priv_file_path=None):
@@ -161,17 +377,36 @@ def get_content_length(url):
     return response.headers['Content-Length']
 
 
-def __get_url_response(url):
+def get_url_headers(url):
+    """
+    Returns the response headers of a HEAD request to the given URL
+    :param url: the URL to inspect
+    :return: a dict of header names in lower case to their values
+    """
+    response = __get_url_response(url, method='HEAD')
+    try:
+        return dict((key.lower(), value)
+                    for key, value in response.headers.items())
+    finally:
+        response.close()
+
+
+def __get_url_response(url, headers=None, method=None):
     """
     Returns a response object for a given URL
     :param url: the URL
+    :param headers: dict of additional request headers (optional)
+    :param method: the HTTP method when not GET (optional)
     :return: the response
     """
     proxy_handler = urllib.ProxyHandler({})
     opener = urllib.build_opener(proxy_handler)
     urllib.install_opener(opener)
     context = ssl._create_unverified_context()
-    return urllib.urlopen(url, context=context)
+    request = urllib.Request(url, headers=headers or dict())
+    if method:
+        request.get_method = lambda: method
+    return urllib.urlopen(request, context=context)
 
 
 def read_yaml(config_file_path):
@@ -253,3 +488,20 @@ def read_file(filename):
     finally:
         if the_file:
             the_file.close()
+
+
+class DownloadResult:
+    """
+    The outcome of a file download
+    """
+
+    def __init__(self, name, size, digests):
+        """
+        Constructor
+        :param name: the path to the downloaded file
+        :param size: the number of bytes downloaded
+        :param digests: dict of hash algorithm name to hex digest
+        """
+        self.name = name
+        self.size = size
+        self.digests = digests
@@ -0,0 +1,421 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import errno
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from snaps import file_utils
+
+__author__ = 'spisarski'
+
+"""
+Persistent on-disk cache of downloaded image files shared between processes.
+Image contents are stored once under their sha256 digest and each URL holds
+an index entry with the ETag/Last-Modified values used to revalidate it
+"""
+
+logger = logging.getLogger('image_cache')
+
+CACHE_ENABLED = True
+CACHE_DIR = '~/.snaps/image_cache'
+CACHE_MAX_SIZE = 20 * 1024 * 1024 * 1024
+VERIFY_ON_READ = True
+# Seconds after which a partial download is removed where files cannot be
+# locked to tell whether it is still in progress
+ORPHAN_MAX_AGE = 60 * 60
+HASH_ALGORITHMS = ['md5', 'sha256']
+
+_image_cache = None
+
+
+def get_image_cache():
+    """
+    Returns the ImageCache configured by the CACHE_* module values
+    :return: the ImageCache object or None when disabled or unusable
+    """
+    global _image_cache
+    if not CACHE_ENABLED:
+        return None
+    if _image_cache is None:
+        try:
+            _image_cache = ImageCache(CACHE_DIR, CACHE_MAX_SIZE)
+        except (IOError, OSError) as e:
+            logger.warning('Image cache unavailable at %s - %s', CACHE_DIR, e)
+            return None
+    return _image_cache
+
+
+class ImageCache:
+    """
+    Content addressed cache of image files downloaded from URLs where the
+    least recently used files are evicted once max_size bytes is exceeded
+    """
+
+    def __init__(self, cache_dir, max_size, verify=VERIFY_ON_READ):
+        """
+        Constructor
+        :param cache_dir: the directory holding the cache
+        :param max_size: the maximum number of bytes to retain
+        :param verify: when True, the sha256 digest of a cached file is
+                       verified each time it is retrieved
+        :raise: OSError when the directories cannot be created
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_size = max_size
+        self.verify = verify
+        self.__objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.__index_dir = os.path.join(self.cache_dir, 'index')
+        for directory in [self.__objects_dir, self.__index_dir]:
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+    def get(self, url):
+        """
+        Returns the cached copy of a URL's contents, downloading them when
+        missing, stale or corrupted. The returned CachedImage must be closed
+        to release its shared lock, which prevents its eviction
+        :param url: the URL of the image
+        :return: a CachedImage object or None when the downloaded file cannot
+                 be opened (i.e. evicted by another process)
+        :raise: URLError or IOError when the download fails
+        """
+        url_key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        index_path = os.path.join(self.__index_dir, url_key + '.json')
+
+        with FileLock(index_path + '.lock'):
+            entry = self.__read_entry(index_path)
+            validators = self.__get_validators(url)
+            if entry and (validators is None
+                          or self.__is_current(entry, validators)):
+                cached = self.__open(entry)
+                if cached:
+                    logger.info('Using cached image for %s', url)
+                    return cached
+
+            entry = self.__download(url, index_path, validators or dict())
+            cached = self.__open(entry)
+
+        self.__evict(entry['sha256'])
+        return cached
+
+    def size(self):
+        """
+        Returns the number of bytes held by the cached files
+        """
+        return sum(stat.st_size for stat in self.__object_stats().values())
+
+    def __download(self, url, index_path, validators):
+        """
+        Downloads the URL's contents into the cache and records its entry
+        :return: the entry dict
+        """
+        logger.info('Downloading image %s into the cache', url)
+        # the lock on the tmp- marker file tells other processes that the
+        # files sharing its name (i.e. fetch's .part file) are not orphans
+        lock_path, lock_file = self.__create_marker()
+        download_path = lock_path + '.download'
+        try:
+            result = file_utils.fetch(url, download_path,
+                                      hash_algorithms=HASH_ALGORITHMS)
+            os.rename(download_path, os.path.join(
+                self.__objects_dir, result.digests['sha256']))
+        finally:
+            for path in [download_path, lock_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            lock_file.close()
+
+        entry = {
+            'url': url,
+            'etag': validators.get('etag'),
+            'last_modified': validators.get('last-modified'),
+            'size': result.size,
+            'md5': result.digests['md5'],
+            'sha256': result.digests['sha256'],
+        }
+        tmp_index = index_path + '.' + str(uuid.uuid4())
+        with open(tmp_index, 'w') as index_file:
+            json.dump(entry, index_file)
+        os.rename(tmp_index, index_path)
+        return entry
+
+    def __open(self, entry):
+        """
+        Opens and shared locks the cached file of an entry after checking its
+        integrity. Corrupted files are removed
+        :return: a CachedImage object or None when unavailable
+        """
+        path = os.path.join(self.__objects_dir, entry['sha256'])
+        try:
+            image_file = open(path, 'rb')
+        except IOError:
+            return None
+
+        try:
+            FileLock.lock(image_file, shared=True)
+            # the file may have been evicted before the lock was obtained
+            if (not os.path.exists(path) or os.fstat(image_file.fileno())
+                    .st_ino != os.stat(path).st_ino):
+                image_file.close()
+                return None
+
+            if os.path.getsize(path) != entry['size'] or (
+                    self.verify and file_utils.hash_file(
+                        path, ['sha256'])['sha256'] != entry['sha256']):
+                logger.warning('Removing corrupted cached image %s', path)
+                image_file.close()
+                os.remove(path)
+                return None
+
+            os.utime(path, None)
+            return CachedImage(path, image_file, entry)
+        except:
+            image_file.close()
+            raise
+
+    def __evict(self, keep_sha256):
+        """
+        Removes the least recently used files not currently locked until the
+        cache no longer exceeds max_size
+        :param keep_sha256: digest of a file that must not be removed
+        """
+        with FileLock(os.path.join(self.cache_dir, 'cache.lock')):
+            self.__remove_orphans()
+            objects = self.__object_stats()
+            total = sum(stat.st_size for stat in objects.values())
+            for path in sorted(objects, key=lambda p: objects[p].st_mtime):
+                if total <= self.max_size:
+                    break
+                if os.path.basename(path) == keep_sha256:
+                    continue
+
+                try:
+                    with open(path, 'rb') as image_file:
+                        if not FileLock.lock(
+                                image_file, shared=False, block=False):
+                            continue
+                        logger.info('Evicting cached image %s', path)
+                        os.remove(path)
+                except (IOError, OSError) as e:
+                    logger.debug('Unable to evict %s - %s', path, e)
+                    continue
+                total -= objects[path].st_size
+
+    def __create_marker(self):
+        """
+        Creates and exclusively locks a new tmp- marker file
+        :return: a tuple of the marker's path and its open file object
+        """
+        while True:
+            lock_path = os.path.join(
+                self.__objects_dir, 'tmp-' + str(uuid.uuid4()))
+            lock_file = open(lock_path, 'wb')
+            try:
+                FileLock.lock(lock_file, shared=False)
+                # the marker may have been removed as an orphan before the
+                # lock was obtained
+                if (os.path.exists(lock_path) and
+                        os.fstat(lock_file.fileno()).st_ino ==
+                        os.stat(lock_path).st_ino):
+                    return lock_path, lock_file
+            except:
+                lock_file.close()
+                raise
+            lock_file.close()
+
+    def __remove_orphans(self):
+        """
+        Removes the partial files of downloads that failed or were
+        interrupted. A download's files are named after its tmp- marker file
+        and are only orphans when the marker is missing or no longer locked
+        by its process
+        """
+        downloads = dict()
+        for name in os.listdir(self.__objects_dir):
+            if name.startswith('tmp-'):
+                downloads.setdefault(name.split('.', 1)[0], list()).append(
+                    os.path.join(self.__objects_dir, name))
+
+        for marker, paths in downloads.items():
+            lock_path = os.path.join(self.__objects_dir, marker)
+            try:
+                if not fcntl:
+                    if any(time.time() - os.path.getmtime(path)
+                           < ORPHAN_MAX_AGE for path in paths):
+                        continue
+                    self.__remove_paths(paths)
+                    continue
+
+                try:
+                    lock_file = open(lock_path, 'rb')
+                except IOError:
+                    # the download completed or failed after the listing
+                    self.__remove_paths(paths)
+                    continue
+                with lock_file:
+                    if FileLock.lock(lock_file, shared=False, block=False):
+                        self.__remove_paths(paths)
+            except (IOError, OSError) as e:
+                logger.debug('Unable to remove %s - %s', paths, e)
+
+    @staticmethod
+    def __remove_paths(paths):
+        """
+        Removes the files of a partial download
+        """
+        for path in paths:
+            if os.path.exists(path):
+                logger.info('Removing partial download %s', path)
+                os.remove(path)
+
+    def __object_stats(self):
+        """
+        Returns a dict of the paths of all complete cached files to their
+        os.stat() results
+        """
+        out = dict()
+        for name in os.listdir(self.__objects_dir):
+            if not name.startswith('tmp-'):
+                path = os.path.join(self.__objects_dir, name)
+                try:
+                    out[path] = os.stat(path)
+                except OSError:
+                    pass
+        return out
+
+    @staticmethod
+    def __read_entry(index_path):
+        """
+        Returns the index entry dict or None
+        """
+        try:
+            with open(index_path) as index_file:
+                return json.load(index_file)
+        except (IOError, ValueError):
+            return None
+
+    @staticmethod
+    def __get_validators(url):
+        """
+        Returns the lower case response headers used to revalidate an entry
+        or None when the server cannot be reached
+        """
+        try:
+            return file_utils.get_url_headers(url)
+        except Exception as e:
+            logger.warning('Unable to revalidate %s - %s', url, e)
+            return None
+
+    @staticmethod
+    def __is_current(entry, validators):
+        """
+        Returns True when the entry matches the server's validators. Entries
+        for servers returning neither an ETag nor a Last-Modified header are
+        considered current
+        """
+        length = validators.get('content-length')
+        if length is not None and int(length) != entry['size']:
+            return False
+        if validators.get('etag'):
+            return validators['etag'] == entry['etag']
+        if validators.get('last-modified'):
+            return validators['last-modified'] == entry['last_modified']
+        return True
+
+
+class CachedImage:
+    """
+    A cached image file held open with a shared lock
+    """
+
+    def __init__(self, name, image_file, entry):
+        """
+        Constructor
+        :param name: the path to the cached file
+        :param image_file: the open file object holding the lock
+        :param entry: the index entry dict
+        """
+        self.name = name
+        self.file = image_file
+        self.url = entry['url']
+        self.size = entry['size']
+        self.md5 = entry['md5']
+        self.sha256 = entry['sha256']
+
+    def close(self):
+        """
+        Releases the lock
+        """
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FileLock:
+    """
+    Exclusive lock between processes backed by a lock file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.__file = None
+
+    def __enter__(self):
+        self.__file = open(self.path, 'a')
+        FileLock.lock(self.__file, shared=False)
+        return self
+
+    def __exit__(self, *args):
+        self.__file.close()
+        self.__file = None
+
+    @staticmethod
+    def lock(the_file, shared, block=True):
+        """
+        Locks an open file until it is closed. This is a no-op where fcntl
+        is unavailable
+        :param the_file: the file object
+        :param shared: True for a shared lock else exclusive
+        :param block: when False, returns False rather than waiting
+        :return: T/F
+        """
+        if not fcntl:
+            return True
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not block:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(the_file.fileno(), flags)
+            return True
+        except IOError as e:
+            if not block and e.errno in (errno.EAGAIN, errno.EACCES):
+                return False
+            raise
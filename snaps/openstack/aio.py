@@ -0,0 +1,29 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import sys
+
+__author__ = 'spisarski'
+
+"""
+Entry point of the asyncio facade over the OpenStack utilities. The
+coroutines are implemented in async_openstack, which is only imported on
+Python 3.5+ as its syntax cannot be parsed by older interpreters
+"""
+
+if sys.version_info < (3, 5):
+    raise ImportError('snaps.openstack.aio requires Python 3.5 or later')
+
+from snaps.openstack.async_openstack import (  # noqa: E402
+    AsyncOpenStack, AsyncOpenStackError, AsyncService, DEFAULT_MAX_WORKERS)
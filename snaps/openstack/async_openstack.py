@@ -0,0 +1,221 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import functools
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from snaps.openstack.utils import (
+    cinder_utils, glance_utils, heat_utils, keystone_utils, neutron_utils,
+    nova_utils, status_utils)
+
+__author__ = 'spisarski'
+
+"""
+asyncio facade over the OpenStack utilities. This module requires Python 3.5+
+and must be imported through snaps.openstack.aio. Each service
+attribute of an AsyncOpenStack object mirrors the functions of its *_utils
+module as coroutines without the client argument, e.g.
+
+    async with AsyncOpenStack(os_creds) as cloud:
+        flavor = await cloud.nova.get_flavor_by_name('m1.small')
+
+All clients share a single keystone session and therefore its token. The
+underlying python-*client libraries are blocking, so calls are executed on an
+executor bounded by max_workers regardless of the number of coroutines, while
+status waits are served by the batched pollers of status_utils without
+occupying a worker
+"""
+
+logger = logging.getLogger('aio')
+
+DEFAULT_MAX_WORKERS = 20
+
+
+class AsyncOpenStack:
+    """
+    Coroutine API for the OpenStack operations of a set of credentials
+    """
+
+    def __init__(self, os_creds, max_workers=DEFAULT_MAX_WORKERS, loop=None):
+        """
+        Constructor
+        :param os_creds: the OpenStack credentials object
+        :param max_workers: the maximum number of blocking API calls in
+                            progress at once
+        :param loop: the event loop (defaults to the running loop)
+        """
+        self.os_creds = os_creds
+        self.max_workers = max_workers
+        self.__loop = loop
+        self.__executor = None
+        self.__session = None
+        self.__services = dict()
+        self.__services_lock = threading.Lock()
+
+    @property
+    def keystone(self):
+        return self.__service(keystone_utils, keystone_utils.keystone_client)
+
+    @property
+    def nova(self):
+        return self.__service(nova_utils, nova_utils.nova_client)
+
+    @property
+    def neutron(self):
+        return self.__service(neutron_utils, neutron_utils.neutron_client)
+
+    @property
+    def glance(self):
+        return self.__service(glance_utils, glance_utils.glance_client)
+
+    @property
+    def cinder(self):
+        return self.__service(cinder_utils, cinder_utils.cinder_client)
+
+    @property
+    def heat(self):
+        return self.__service(heat_utils, heat_utils.heat_client)
+
+    def open(self):
+        """
+        Acquires the shared keystone session. Each service's client is
+        instantiated upon its first use
+        :return: this object
+        """
+        if not self.__session:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=self.max_workers)
+            self.__session = keystone_utils.acquire_session(self.os_creds)
+        return self
+
+    def close(self):
+        """
+        Waits for the calls in progress and releases the keystone session
+        """
+        if self.__executor:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        if self.__session:
+            keystone_utils.release_session(self.__session)
+            self.__session = None
+        self.__services = dict()
+
+    async def __aenter__(self):
+        return self.open()
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def __service(self, module, client_function):
+        """
+        Returns the AsyncService of a module instantiating its client with the
+        shared session when first requested
+        """
+        if not self.__session:
+            raise AsyncOpenStackError('AsyncOpenStack has not been opened')
+        with self.__services_lock:
+            service = self.__services.get(module)
+            if not service:
+                service = AsyncService(self, module, client_function(
+                    self.os_creds, self.__session))
+                self.__services[module] = service
+            return service
+
+    def __get_loop(self):
+        return self.__loop or asyncio.get_event_loop()
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Executes a blocking function on the executor (i.e. a creator's
+        create() or clean() method)
+        :return: the function's result
+        """
+        if not self.__executor:
+            raise AsyncOpenStackError('AsyncOpenStack has not been opened')
+        return await self.__get_loop().run_in_executor(
+            self.__executor, functools.partial(function, *args, **kwargs))
+
+    async def wait_for_status(self, service, resource_id, expected_status,
+                              fail_statuses=None, not_found_ok=False,
+                              timeout=300, poll_interval=3):
+        """
+        Waits for a resource to reach a status. The waits of all coroutines
+        are batched into a single status query per polling interval
+        :param service: one of 'nova', 'glance', 'cinder' or 'heat'
+        :param resource_id: the ID of the server, image, volume or stack
+        :param expected_status: the status being awaited
+        :param fail_statuses: statuses raising a status_utils.StatusError
+        :param not_found_ok: when True, completes when the resource is gone
+        :param timeout: the number of seconds to wait
+        :param poll_interval: the maximum number of seconds between queries
+        :return: True when the status has been reached else False
+        """
+        fetch_statuses = _STATUS_FUNCTIONS.get(service)
+        if not fetch_statuses:
+            raise AsyncOpenStackError(
+                'Status waits are not supported for ' + str(service))
+        future = status_utils.wait_for_status(
+            getattr(self, service).client, fetch_statuses, resource_id,
+            expected_status, fail_statuses=fail_statuses,
+            not_found_ok=not_found_ok, timeout=timeout,
+            poll_interval=poll_interval, batch_key=self.__session)
+        return await asyncio.wrap_future(future, loop=self.__get_loop())
+
+
+class AsyncService:
+    """
+    Exposes the functions of a *_utils module whose first argument is the
+    client as coroutines bound to that client
+    """
+
+    def __init__(self, cloud, module, client):
+        """
+        Constructor
+        :param cloud: the AsyncOpenStack object executing the calls
+        :param module: the *_utils module
+        :param client: the module's client object
+        """
+        self.cloud = cloud
+        self.module = module
+        self.client = client
+
+    def __getattr__(self, name):
+        function = getattr(self.module, name)
+        if name.startswith('_') or not callable(function):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.cloud.run(function, self.client, *args,
+                                        **kwargs)
+        call.__name__ = name
+        call.__doc__ = function.__doc__
+        return call
+
+
+_STATUS_FUNCTIONS = {
+    'nova': nova_utils.get_server_statuses,
+    'glance': glance_utils.get_image_statuses,
+    'cinder': cinder_utils.get_volume_statuses,
+    'heat': heat_utils.get_stack_statuses,
+}
+
+
+class AsyncOpenStackError(Exception):
+    """
+    Exception to be thrown when the facade is used incorrectly
+    """
@@ -15,10 +15,11 @@
 
 from glanceclient.exc import HTTPNotFound
 import logging
-import time
+import os
 
+from snaps import file_utils, image_cache, thread_utils
 from snaps.openstack.openstack_creator import OpenStackCloudObject
-from snaps.openstack.utils import glance_utils
+from snaps.openstack.utils import glance_utils, status_utils
 from snaps.config import image
 
 __author__ = 'spisarski'
@@ -29,6 +30,11 @@ IMAGE_ACTIVE_TIMEOUT = 600
 POLL_INTERVAL = 3
 STATUS_ACTIVE = 'active'
 
+# When True, an existing active image with the same contents, disk format
+# and extra properties is used rather than uploading the same bits again.
+# Such images are never deleted by clean() and keep their original name
+REUSE_IDENTICAL_IMAGES = False
+
 
 class OpenStackImage(OpenStackCloudObject):
     """
@@ -48,6 +54,8 @@ class OpenStackImage(OpenStackCloudObject):
         self.__kernel_image = None
         self.__ramdisk_image = None
         self.__glance = None
+        self.__reused_image_ids = set()
+        self.__image_aliases = list()
 
     def initialize(self):
         """
@@ -58,8 +66,7 @@ class OpenStackImage(OpenStackCloudObject):
 
         self.__glance = glance_utils.glance_client(
             self._os_creds, self._os_session)
-        self.__image = glance_utils.get_image(
-            self.__glance, image_settings=self.image_settings)
+        self.__image = self.__get_image(self.image_settings)
 
         if self.__image:
             logger.info('Found image with name - ' + self.image_settings.name)
@@ -71,14 +78,12 @@ class OpenStackImage(OpenStackCloudObject):
                 self.image_settings.name)
 
         if self.image_settings.kernel_image_settings:
-            self.__kernel_image = glance_utils.get_image(
-                self.__glance,
-                image_settings=self.image_settings.kernel_image_settings)
+            self.__kernel_image = self.__get_image(
+                self.image_settings.kernel_image_settings)
 
         if self.image_settings.ramdisk_image_settings:
-            self.__ramdisk_image = glance_utils.get_image(
-                self.__glance,
-                image_settings=self.image_settings.ramdisk_image_settings)
+            self.__ramdisk_image = self.__get_image(
+                self.image_settings.ramdisk_image_settings)
 
         return self.__image
 
@@ -93,29 +98,39 @@ class OpenStackImage(OpenStackCloudObject):
         if not self.__image:
             extra_properties = self.image_settings.extra_properties or dict()
 
+            # the kernel and ramdisk images are uploaded concurrently
+            associated = dict()
+            if (self.image_settings.kernel_image_settings
+                    and not self.__kernel_image):
+                associated['kernel'] = (
+                    self.image_settings.kernel_image_settings)
+            if (self.image_settings.ramdisk_image_settings
+                    and not self.__ramdisk_image):
+                associated['ramdisk'] = (
+                    self.image_settings.ramdisk_image_settings)
+
+            def create_associated(image_type):
+                logger.info(
+                    'Creating associated %s image with name - %s',
+                    image_type, associated[image_type].name)
+                created = self.__create_image(associated[image_type])
+                # retained immediately so clean() removes it upon failure
+                if image_type == 'kernel':
+                    self.__kernel_image = created
+                else:
+                    self.__ramdisk_image = created
+
+            thread_utils.execute_graph(
+                dict((image_type, list()) for image_type in associated),
+                create_associated, max_workers=2)
+
             if self.image_settings.kernel_image_settings:
-                if not self.__kernel_image:
-                    logger.info(
-                        'Creating associated kernel image with name - %s',
-                        self.image_settings.kernel_image_settings.name)
-                    self.__kernel_image = glance_utils.create_image(
-                        self.__glance,
-                        self.image_settings.kernel_image_settings)
                 extra_properties['kernel_id'] = self.__kernel_image.id
-
             if self.image_settings.ramdisk_image_settings:
-                if not self.__ramdisk_image:
-                    logger.info(
-                        'Creating associated ramdisk image with name - %s',
-                        self.image_settings.ramdisk_image_settings.name)
-                    self.__ramdisk_image = glance_utils.create_image(
-                        self.__glance,
-                        self.image_settings.ramdisk_image_settings)
                 extra_properties['ramdisk_id'] = self.__ramdisk_image.id
 
             self.image_settings.extra_properties = extra_properties
-            self.__image = glance_utils.create_image(self.__glance,
-                                                     self.image_settings)
+            self.__image = self.__create_image(self.image_settings)
 
             logger.info(
                 'Created image with name - %s', self.image_settings.name)
@@ -138,21 +153,89 @@ class OpenStackImage(OpenStackCloudObject):
         :return: void
         """
         for img in [self.__image, self.__kernel_image, self.__ramdisk_image]:
-            if img:
+            if img and img.id not in self.__reused_image_ids:
                 try:
                     glance_utils.delete_image(self.__glance, img)
                 except HTTPNotFound:
                     pass
 
+        for image_name, image_id in self.__image_aliases:
+            glance_utils.remove_image_alias(image_name, image_id)
+
         self.__image = None
         self.__kernel_image = None
         self.__ramdisk_image = None
+        self.__reused_image_ids = set()
+        self.__image_aliases = list()
 
         if self.__glance:
             self.__glance.http_client.session.session.close()
 
         super(self.__class__, self).clean()
 
+    def __create_image(self, image_settings):
+        """
+        Uploads the image unless an identical one can be reused
+        :param image_settings: the ImageConfig object
+        :return: the Image domain object
+        """
+        if REUSE_IDENTICAL_IMAGES:
+            identical = self.__get_identical_image(image_settings)
+            if identical:
+                logger.info(
+                    'Reusing image %s with identical contents in lieu of '
+                    'uploading image with name - %s', identical.name,
+                    image_settings.name)
+                self.__reused_image_ids.add(identical.id)
+                # later lookups by the configured name (i.e. when creating
+                # VMs) resolve to the reused image
+                glance_utils.add_image_alias(image_settings.name, identical.id)
+                self.__image_aliases.append(
+                    (image_settings.name, identical.id))
+                return identical
+
+        return glance_utils.create_image(self.__glance, image_settings)
+
+    def __get_image(self, image_settings):
+        """
+        Returns the existing image of the configuration where an image
+        standing in for it is not deleted by clean()
+        :param image_settings: the ImageConfig object
+        :return: the Image domain object or None
+        """
+        image = glance_utils.get_image(
+            self.__glance, image_settings=image_settings)
+        if image and glance_utils.get_image_alias(
+                image_settings.name) == image.id:
+            self.__reused_image_ids.add(image.id)
+        return image
+
+    def __get_identical_image(self, image_settings):
+        """
+        Returns an existing active image with the same contents, format and
+        extra properties as the ones configured
+        :param image_settings: the ImageConfig object
+        :return: the Image domain object or None
+        """
+        if image_settings.image_file:
+            image_path = os.path.expanduser(image_settings.image_file)
+            checksum = file_utils.hash_file(image_path, ['md5'])['md5']
+            size = os.path.getsize(image_path)
+        elif image_settings.url and image_cache.get_image_cache():
+            cached_image = image_cache.get_image_cache().get(
+                image_settings.url)
+            if not cached_image:
+                return None
+            with cached_image:
+                checksum = cached_image.md5
+                size = cached_image.size
+        else:
+            return None
+
+        return glance_utils.get_identical_image(
+            self.__glance, checksum, size, image_settings.format,
+            image_settings.extra_properties)
+
     def get_image(self):
         """
         Returns the domain Image object as it was populated when create() was
@@ -204,24 +287,20 @@ class OpenStackImage(OpenStackCloudObject):
         :param poll_interval: The polling interval in seconds
         :return: T/F
         """
-        # sleep and wait for image status change
-        if block:
-            start = time.time()
-        else:
-            start = time.time() - timeout
-
-        while timeout > time.time() - start:
-            status = self._status(expected_status_code)
-            if status:
+        if not block:
+            return self._status(expected_status_code)
+
+        future = status_utils.wait_for_status(
+            self.__glance, glance_utils.get_image_statuses, self.__image.id,
+            expected_status_code, fail_statuses=['ERROR'], timeout=timeout,
+            poll_interval=poll_interval, batch_key=self._os_session)
+        try:
+            if future.result():
                 logger.debug(
                     'Image is active with name - ' + self.image_settings.name)
                 return True
-
-            logger.debug('Retry querying image status in ' + str(
-                poll_interval) + ' seconds')
-            time.sleep(poll_interval)
-            logger.debug('Image status query timeout in ' + str(
-                timeout - (time.time() - start)))
+        except status_utils.StatusError:
+            raise ImageCreationError('Instance had an error during deployment')
 
         logger.error(
             'Timeout checking for image status for ' + expected_status_code)
@@ -17,14 +17,15 @@ import time
 
 from novaclient.exceptions import NotFound
 
+from snaps import thread_utils
 from snaps.config.vm_inst import VmInstanceConfig, FloatingIpConfig
 from snaps.openstack.openstack_creator import OpenStackComputeObject
 from snaps.openstack.utils import (
     glance_utils, cinder_utils, settings_utils, keystone_utils)
 from snaps.openstack.utils import neutron_utils
-from snaps.openstack.utils import nova_utils
+from snaps.openstack.utils import nova_utils, status_utils
 from snaps.openstack.utils.nova_utils import RebootType
-from snaps.provisioning import ansible_utils
+from snaps.provisioning import ansible_utils, ssh_pool
 
 __author__ = 'spisarski'
 
@@ -33,6 +34,7 @@ logger = logging.getLogger('create_instance')
 POLL_INTERVAL = 3
 STATUS_ACTIVE = 'ACTIVE'
 STATUS_DELETED = 'DELETED'
+DEFAULT_GROUP_WORKERS = 10
 
 
 class OpenStackVmInstance(OpenStackComputeObject):
@@ -122,16 +124,15 @@ class OpenStackVmInstance(OpenStackComputeObject):
 
                 fips = neutron_utils.get_port_floating_ips(
                     self.__neutron, self.__ports)
+                port_names = dict(
+                    (port.id, port.name) for name, port in self.__ports)
                 for port_id, fip in fips:
                     settings = self.instance_settings.floating_ip_settings
                     for fip_setting in settings:
                         if port_id == fip_setting.port_id:
                             self.__floating_ip_dict[fip_setting.name] = fip
-                        else:
-                            port = neutron_utils.get_port_by_id(
-                                self.__neutron, port_id)
-                            if port and port.name == fip_setting.port_name:
-                                self.__floating_ip_dict[fip_setting.name] = fip
+                        elif port_names.get(port_id) == fip_setting.port_name:
+                            self.__floating_ip_dict[fip_setting.name] = fip
 
     def __create_vm(self, block=False):
         """
@@ -146,7 +147,30 @@ class OpenStackVmInstance(OpenStackComputeObject):
             self._os_creds.project_name, self.keypair_settings)
         logger.info('Created instance with name - %s',
                     self.instance_settings.name)
+        self.__configure_vm(block)
 
+    def create_from_server(self, vm_inst, block=False):
+        """
+        Adopts a VM instance that has been created on behalf of this object
+        (i.e. within a batch by OpenStackVmInstanceGroup) and applies the
+        remaining configuration such as security groups, volumes and floating
+        IPs
+        :param vm_inst: the VmInst domain object
+        :param block: see create()
+        :return: VMInst domain object
+        """
+        self.initialize()
+        self.__vm = vm_inst
+        self.__configure_vm(block)
+        return self.__vm
+
+    def __configure_vm(self, block=False):
+        """
+        Applies the configuration requiring an existing VM instance
+        :param block: Thread will block until instance has either become
+                      active, error, or timeout waiting. Floating IPs will be
+                      assigned after active when block=True
+        """
         if block:
             if not self.vm_active(block=True):
                 raise VmInstanceCreationError(
@@ -260,6 +284,7 @@ class OpenStackVmInstance(OpenStackComputeObject):
 
         # Cleanup floating IPs
         for name, floating_ip in self.__floating_ip_dict.items():
+            ssh_pool.connection_pool().close(floating_ip.ip)
             logger.info('Deleting Floating IP - ' + floating_ip.ip)
             neutron_utils.delete_floating_ip(self.__neutron, floating_ip)
 
@@ -337,20 +362,28 @@ class OpenStackVmInstance(OpenStackComputeObject):
     def __create_ports(self, port_settings):
         """
         Returns the previously configured ports or creates them if they do not
-        exist
+        exist. The missing ports are created with a single request
         :param port_settings: A list of PortSetting objects
         :return: a list of OpenStack port tuples where the first member is the
                  port name and the second is the port object
         """
-        ports = list()
+        found_ports = list()
+        missing_port_settings = list()
 
         for port_setting in port_settings:
             port = neutron_utils.get_port(
                 self.__neutron, self.__keystone, port_settings=port_setting,
                 project_name=self._os_creds.project_name)
+            found_ports.append(port)
             if not port:
-                port = neutron_utils.create_port(
-                    self.__neutron, self._os_creds, port_setting)
+                missing_port_settings.append(port_setting)
+
+        created_ports = iter(neutron_utils.create_ports_bulk(
+            self.__neutron, self._os_creds, missing_port_settings))
+
+        ports = list()
+        for port_setting, port in zip(port_settings, found_ports):
+            port = port or next(created_ports, None)
             if port:
                 ports.append((port_setting.name, port))
 
@@ -363,6 +396,23 @@ class OpenStackVmInstance(OpenStackComputeObject):
         """
         return self._os_creds
 
+    def vm_created(self):
+        """
+        Returns True when the VM instance has been created or found
+        :return: T/F
+        """
+        return self.__vm is not None
+
+    def missing_port_settings(self):
+        """
+        Returns the configurations of the ports that do not yet exist
+        :return: a list of PortConfig objects
+        """
+        port_names = [name for name, port in self.__ports]
+        return [port_setting for port_setting
+                in self.instance_settings.port_settings
+                if port_setting.name not in port_names]
+
     def get_vm_inst(self):
         """
         Returns the latest version of this server object from OpenStack
@@ -545,28 +595,49 @@ class OpenStackVmInstance(OpenStackComputeObject):
         :param poll_interval: The polling interval in seconds
         :return: T/F
         """
-        # sleep and wait for VM status change
-        if block:
-            start = time.time()
-        else:
+        if not block:
             return self.__status(expected_status_code)
 
-        while timeout > time.time() - start:
-            status = self.__status(expected_status_code)
-            if status:
+        if not self.__vm:
+            return expected_status_code == STATUS_DELETED
+
+        try:
+            if self.vm_status_future(
+                    expected_status_code, timeout, poll_interval).result():
                 logger.info('VM is - ' + expected_status_code)
                 return True
-
-            logger.debug('Retry querying VM status in ' + str(
-                poll_interval) + ' seconds')
-            time.sleep(poll_interval)
-            logger.debug('VM status query timeout in ' + str(
-                timeout - (time.time() - start)))
+        except status_utils.StatusError:
+            raise VmInstanceCreationError(
+                'Instance had an error during deployment')
 
         logger.error(
             'Timeout checking for VM status for ' + expected_status_code)
         return False
 
+    def vm_status_future(self, expected_status_code=STATUS_ACTIVE,
+                         timeout=None, poll_interval=POLL_INTERVAL):
+        """
+        Returns a Future for the VM status reaching the value of
+        expected_status_code. The status queries of all VMs being waited upon
+        with the same credentials are batched together
+        :param expected_status_code: instance status evaluated with this
+                                     string value
+        :param timeout: The timeout value (defaults to the vm_boot_timeout)
+        :param poll_interval: The maximum polling interval in seconds
+        :return: a Future whose result is T/F or raises a
+                 snaps.openstack.utils.status_utils.StatusError when the VM
+                 is in ERROR
+        """
+        if timeout is None:
+            timeout = self.instance_settings.vm_boot_timeout
+
+        return status_utils.wait_for_status(
+            self._nova, nova_utils.get_server_statuses, self.__vm.id,
+            expected_status_code, fail_statuses=['ERROR'],
+            not_found_ok=expected_status_code == STATUS_DELETED,
+            timeout=timeout, poll_interval=poll_interval,
+            batch_key=self._os_session, incremental=True)
+
     def __status(self, expected_status_code):
         """
         Returns True when active else False
@@ -637,17 +708,53 @@ class OpenStackVmInstance(OpenStackComputeObject):
         logger.error('Timeout attempting to connect with VM via SSH')
         return False
 
+    def ssh_probe_address(self):
+        """
+        Returns the IP whose SSH port can be probed with a plain TCP
+        connection before attempting a SSH session
+        :return: the first provisioning floating IP address else None when
+                 there is none or SSH sessions are made through the
+                 ssh_proxy_cmd of the credentials' proxy settings
+        """
+        proxy_settings = self._os_creds.proxy_settings
+        if proxy_settings and proxy_settings.ssh_proxy_cmd:
+            return None
+        fip = self.__get_first_provisioning_floating_ip()
+        if fip:
+            return fip.ip
+
+    def check_ssh_active(self, user_override=None, password=None):
+        """
+        Returns True when a SSH session can be established with a single
+        attempt that does not first wait for the VM to become ACTIVE
+        :param user_override: overrides the user with which to create the
+                              connection
+        :param password: overrides the use of a password instead of a private
+                         key with which to create the connection
+        :return: T/F
+        """
+        return self.__ssh_active(
+            user_override=user_override, password=password)
+
     def __ssh_active(self, user_override=None, password=None):
         """
         Returns True when can create a SSH session else False
         :return: T/F
         """
         if len(self.__floating_ip_dict) > 0:
-            ssh = self.ssh_client(
-                user_override=user_override, password=password)
-            if ssh:
-                ssh.close()
-                return True
+            probe_address = self.ssh_probe_address()
+            if probe_address and not ssh_pool.probe_ports([probe_address]):
+                logger.debug('SSH port not yet open on %s', probe_address)
+                return False
+            # A pooled transport can still appear active after the VM has
+            # been rebooted so the session is proven with a no-op command
+            ip, user, private_key, password = self.__ssh_args(
+                user_override, password)
+            result = ssh_pool.connection_pool().exec_command(
+                ip, user, 'true', private_key_filepath=private_key,
+                password=password,
+                proxy_settings=self._os_creds.proxy_settings)
+            return result is not None and result[0] == 0
         return False
 
     def cloud_init_complete(self, block=False, poll_interval=POLL_INTERVAL):
@@ -687,17 +794,27 @@ class OpenStackVmInstance(OpenStackComputeObject):
         logger.error('Timeout waiting for cloud-init to complete')
         return False
 
+    def check_cloud_init_complete(self):
+        """
+        Returns True when cloud-init has completed with a single check that
+        does not first wait for the VM to become ACTIVE or accept SSH
+        sessions
+        :return: T/F
+        """
+        return self.__cloud_init_complete()
+
     def __cloud_init_complete(self):
         """
         Returns True when can create a SSH session else False
         :return: T/F
         """
         if len(self.__floating_ip_dict) > 0:
-            ssh = self.ssh_client()
-            if ssh:
-                stdin1, stdout1, sterr1 = ssh.exec_command(
-                    'ls -l /var/lib/cloud/instance/boot-finished')
-                return stdout1.channel.recv_exit_status() == 0
+            ip, user, private_key, password = self.__ssh_args()
+            result = ssh_pool.connection_pool().exec_command(
+                ip, user, 'ls -l /var/lib/cloud/instance/boot-finished',
+                private_key_filepath=private_key, password=password,
+                proxy_settings=self._os_creds.proxy_settings)
+            return result is not None and result[0] == 0
         return False
 
     def get_floating_ip(self, fip_name=None):
@@ -723,6 +840,24 @@ class OpenStackVmInstance(OpenStackComputeObject):
         """
         fip = self.get_floating_ip(fip_name)
 
+        if fip:
+            ip, ansible_user, private_key, password = self.__ssh_args(
+                user_override, password)
+            return ansible_utils.ssh_client(
+                ip, ansible_user,
+                private_key_filepath=private_key,
+                password=password,
+                proxy_settings=self._os_creds.proxy_settings)
+        else:
+            FloatingIPAllocationError(
+                'Cannot return an SSH client. No Floating IP configured')
+
+    def __ssh_args(self, user_override=None, password=None):
+        """
+        Returns the values with which to connect to the first provisioning
+        floating IP
+        :return: tuple 4 (ip, user, private key filepath, password)
+        """
         ansible_user = self.get_image_user()
         if user_override:
             ansible_user = user_override
@@ -732,16 +867,8 @@ class OpenStackVmInstance(OpenStackComputeObject):
         else:
             private_key = self.keypair_settings.private_filepath
 
-        if fip:
-            return ansible_utils.ssh_client(
-                self.__get_first_provisioning_floating_ip().ip,
-                ansible_user,
-                private_key_filepath=private_key,
-                password=password,
-                proxy_settings=self._os_creds.proxy_settings)
-        else:
-            FloatingIPAllocationError(
-                'Cannot return an SSH client. No Floating IP configured')
+        return (self.__get_first_provisioning_floating_ip().ip, ansible_user,
+                private_key, password)
 
     def add_security_group(self, security_group):
         """
@@ -794,6 +921,10 @@ class OpenStackVmInstance(OpenStackComputeObject):
         nova_utils.reboot_server(
             self._nova, self.__vm, reboot_type=reboot_type)
 
+        # Drop the pooled SSH connections established prior to the reboot
+        for floating_ip in self.__floating_ip_dict.values():
+            ssh_pool.connection_pool().close(floating_ip.ip)
+
 
 def generate_creator(os_creds, vm_inst, image_config, project_name,
                      keypair_config=None):
@@ -823,6 +954,125 @@ def generate_creator(os_creds, vm_inst, image_config, project_name,
         keystone_utils.close_session(session)
 
 
+class OpenStackVmInstanceGroup(OpenStackComputeObject):
+    """
+    Class responsible for managing the identical VM instances configured by a
+    VmInstanceConfig whose count is greater than one. Each member is managed
+    by an OpenStackVmInstance object configured by member_configs()
+    """
+
+    def __init__(self, os_creds, instance_settings, image_settings,
+                 keypair_settings=None, max_workers=DEFAULT_GROUP_WORKERS):
+        """
+        Constructor
+        :param os_creds: The connection credentials to the OpenStack API
+        :param instance_settings: Contains the settings for the VMs
+        :param image_settings: The OpenStack image object settings
+        :param keypair_settings: The keypair metadata (Optional)
+        :param max_workers: the maximum number of members created or
+                            destroyed at once
+        """
+        super(self.__class__, self).__init__(os_creds)
+
+        self.__neutron = None
+        self.__glance = None
+
+        self.instance_settings = instance_settings
+        self.image_settings = image_settings
+        self.keypair_settings = keypair_settings
+        self.max_workers = max_workers
+
+        self.creators = [
+            OpenStackVmInstance(os_creds, member_config, image_settings,
+                                keypair_settings)
+            for member_config in instance_settings.member_configs()]
+
+    def initialize(self):
+        """
+        Loads the existing members
+        :return: a list of VMInst domain objects for the members found
+        """
+        super(self.__class__, self).initialize()
+
+        self.__neutron = neutron_utils.neutron_client(
+            self._os_creds, self._os_session)
+        self.__glance = glance_utils.glance_client(
+            self._os_creds, self._os_session)
+
+        self.__execute(lambda creator: creator.initialize())
+        return [creator.get_vm_inst() for creator in self.creators
+                if creator.vm_created()]
+
+    def create(self, block=False):
+        """
+        Creates the members that do not already exist. When none of their
+        ports exist and every port configuration only requires a network (see
+        nova_utils.is_batchable_port()), the VMs are booted with a single
+        request. Otherwise their missing ports are created with a single
+        request before the VMs are created concurrently
+        :param block: see OpenStackVmInstance.create()
+        :return: a list of VMInst domain objects
+        """
+        self.initialize()
+
+        pending = [creator for creator in self.creators
+                   if not creator.vm_created()]
+        batch = len(pending) > 1 and all(
+            nova_utils.is_batchable_port(port_setting)
+            for port_setting in self.instance_settings.port_settings)
+        for creator in pending:
+            if (len(creator.missing_port_settings()) !=
+                    len(creator.instance_settings.port_settings)):
+                batch = False
+
+        vm_dict = dict()
+        if batch:
+            vm_insts = nova_utils.create_servers(
+                self._nova, self._keystone, self.__neutron, self.__glance,
+                self.instance_settings.name,
+                [creator.instance_settings for creator in pending],
+                self.image_settings, self._os_creds.project_name,
+                self.keypair_settings)
+            vm_dict = dict(zip(pending, vm_insts))
+        else:
+            neutron_utils.create_ports_bulk(
+                self.__neutron, self._os_creds,
+                [port_setting for creator in self.creators
+                 for port_setting in creator.missing_port_settings()])
+
+        def create_member(creator):
+            if creator in vm_dict:
+                return creator.create_from_server(vm_dict[creator], block)
+            return creator.create(block)
+
+        results = self.__execute(create_member)
+        return [results[creator] for creator in self.creators]
+
+    def clean(self):
+        """
+        Destroys the member VM instances
+        """
+        self.__execute(lambda creator: creator.clean())
+        super(self.__class__, self).clean()
+
+    def get_vm_insts(self):
+        """
+        Returns the latest version of each member's server object
+        :return: a list of VMInst domain objects
+        """
+        return [creator.get_vm_inst() for creator in self.creators]
+
+    def __execute(self, task):
+        """
+        Executes a task for every member concurrently
+        :param task: the function receiving the OpenStackVmInstance object
+        :return: a dict of each OpenStackVmInstance object to its result
+        """
+        return thread_utils.execute_graph(
+            dict((creator, list()) for creator in self.creators), task,
+            max_workers=self.max_workers)
+
+
 class VmInstanceSettings(VmInstanceConfig):
     """
     Deprecated, use snaps.config.vm_inst.VmInstanceConfig instead
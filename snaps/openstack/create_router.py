@@ -113,6 +113,7 @@ class OpenStackRouter(OpenStackNetworkObject):
                     raise RouterCreationError(
                         'Subnet not found with name {}'.format(sub_config))
 
+            missing_port_settings = list()
             for port_setting in self.router_settings.port_settings:
                 port = neutron_utils.get_port(
                     self._neutron, self._keystone, port_settings=port_setting,
@@ -122,22 +123,24 @@ class OpenStackRouter(OpenStackNetworkObject):
                     self.router_settings.name)
                 if port:
                     self.__ports.append(port)
+                else:
+                    missing_port_settings.append(port_setting)
+
+            ports = neutron_utils.create_ports_bulk(
+                self._neutron, self._os_creds, missing_port_settings)
+            if len(ports) != len(missing_port_settings):
+                raise RouterCreationError(
+                    'Error creating ports with names - {}'.format(
+                        [port_setting.name for port_setting
+                         in missing_port_settings]))
 
-                if not port:
-                    port = neutron_utils.create_port(
-                        self._neutron, self._os_creds, port_setting)
-                    if port:
-                        logger.info(
-                            'Created port %s for router - %s',
-                            port_setting.name,
-                            self.router_settings.name)
-                        self.__ports.append(port)
-                        neutron_utils.add_interface_router(
-                            self._neutron, self.__router, port=port)
-                    else:
-                        raise RouterCreationError(
-                            'Error creating port with name - '
-                            + port_setting.name)
+            for port_setting, port in zip(missing_port_settings, ports):
+                logger.info(
+                    'Created port %s for router - %s', port_setting.name,
+                    self.router_settings.name)
+                self.__ports.append(port)
+                neutron_utils.add_interface_router(
+                    self._neutron, self.__router, port=port)
 
         self.__router = neutron_utils.get_router_by_id(
             self._neutron, self.__router.id)
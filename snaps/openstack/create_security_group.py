@@ -98,16 +98,29 @@ class OpenStackSecurityGroup(OpenStackNetworkObject):
                 self.__rules[auto_rule_setting] = auto_rule
                 ctr += 1
 
-            # Create the custom rules
-            for sec_grp_rule_setting in self.sec_grp_settings.rule_settings:
-                try:
-                    custom_rule = neutron_utils.create_security_group_rule(
-                        self._neutron, self._keystone, sec_grp_rule_setting,
-                        self._os_creds.project_name)
+            # Create the custom rules with a single request falling back to
+            # one request per rule when any of them conflicts
+            sec_grp_ids = {
+                self.__security_group.name: self.__security_group.id}
+            rule_settings = self.sec_grp_settings.rule_settings
+            try:
+                custom_rules = neutron_utils.create_security_group_rules(
+                    self._neutron, self._keystone, rule_settings,
+                    self._os_creds.project_name, sec_grp_ids)
+                for sec_grp_rule_setting, custom_rule in zip(
+                        rule_settings, custom_rules):
                     self.__rules[sec_grp_rule_setting] = custom_rule
-                except Conflict as e:
-                    logger.warn('Unable to create rule due to conflict - %s',
-                                e)
+            except Conflict:
+                for sec_grp_rule_setting in rule_settings:
+                    try:
+                        custom_rule = neutron_utils.create_security_group_rule(
+                            self._neutron, self._keystone,
+                            sec_grp_rule_setting, self._os_creds.project_name,
+                            sec_grp_ids)
+                        self.__rules[sec_grp_rule_setting] = custom_rule
+                    except Conflict as e:
+                        logger.warn(
+                            'Unable to create rule due to conflict - %s', e)
 
             # Refresh security group object to reflect the new rules added
             self.__security_group = neutron_utils.get_security_group_by_id(
@@ -122,8 +135,10 @@ class OpenStackSecurityGroup(OpenStackNetworkObject):
                     SecurityGroupRuleConfig object
         :return: the newly instantiated SecurityGroupRuleConfig object
         """
-        sec_grp = neutron_utils.get_security_group_by_id(
-            self._neutron, rule.security_group_id)
+        sec_grp = self.__security_group
+        if not sec_grp or sec_grp.id != rule.security_group_id:
+            sec_grp = neutron_utils.get_security_group_by_id(
+                self._neutron, rule.security_group_id)
 
         setting = SecurityGroupRuleConfig(
             description=rule.description,
@@ -14,7 +14,6 @@
 # limitations under the License.
 
 import logging
-import time
 
 from heatclient.exc import HTTPNotFound
 
@@ -31,14 +30,19 @@ from snaps.openstack.create_volume_type import OpenStackVolumeType
 from snaps.openstack.openstack_creator import OpenStackCloudObject
 from snaps.openstack.utils import (
     nova_utils, settings_utils, glance_utils, cinder_utils)
-from snaps.openstack.utils import heat_utils, neutron_utils
-from snaps.thread_utils import worker_pool
+from snaps.openstack.utils import heat_utils, neutron_utils, status_utils
+from snaps.thread_utils import named_pool
 
 
 __author__ = 'spisarski'
 
 logger = logging.getLogger('create_stack')
 
+# The creator types are built on their own pool as the VM creators are
+# themselves built on the 'heat' pool
+INVENTORY_POOL = 'stack_inventory'
+INVENTORY_WORKERS = 8
+
 
 class OpenStackHeatStack(OpenStackCloudObject, object):
     """
@@ -46,7 +50,7 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
     """
 
     def __init__(self, os_creds, stack_settings, image_settings=None,
-                 keypair_settings=None):
+                 keypair_settings=None, event_callback=None):
         """
         Constructor
         :param os_creds: The OpenStack connection credentials
@@ -55,6 +59,9 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
                                for spawning this stack
         :param keypair_settings: A list of KeypairConfig objects that were
                                  used for spawning this stack
+        :param event_callback: function called with each SNAPS-OO Event
+                               domain object received while blocking on the
+                               stack's status (i.e. to report progress)
         :return:
         """
         super(self.__class__, self).__init__(os_creds)
@@ -71,8 +78,12 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
         else:
             self.keypair_settings = None
 
+        self.event_callback = event_callback
+
         self.__stack = None
         self.__heat_cli = None
+        self.__event_marker = None
+        self.__resource_timings = dict()
 
         self.__neutron = None
         self.__nova = None
@@ -136,6 +147,7 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
         """
         if self.__stack:
             logger.info('Updating stack - %s', self.__stack.name)
+            self.__mark_events()
             heat_utils.update_stack(self.__heat_cli, self.__stack, env_vals)
             if self.stack_updated(block=block):
                 logger.info('Stack %s is now updated with params: %s',
@@ -158,6 +170,7 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
         if self.__stack:
             try:
                 logger.info('Deleting stack - %s', self.__stack.name)
+                self.__mark_events()
                 heat_utils.delete_stack(self.__heat_cli, self.__stack)
 
                 try:
@@ -181,6 +194,7 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
                             self.__stack.name)
 
                 # Delete Stack again
+                self.__mark_events()
                 heat_utils.delete_stack(self.__heat_cli, self.__stack)
                 deleted = self.stack_deleted(block=True)
                 if not deleted:
@@ -274,16 +288,18 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
             snaps.config.stack.STATUS_DELETE_COMPLETE, block, timeout,
             poll_interval, snaps.config.stack.STATUS_DELETE_FAILED)
 
-    def get_network_creators(self):
+    def get_network_creators(self, resource_index=None):
         """
         Returns a list of network creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackNetwork objects
         """
 
         out = list()
         stack_networks = heat_utils.get_stack_networks(
-            self.__heat_cli, self.__neutron, self.__stack)
+            self.__heat_cli, self.__neutron, self.__stack, resource_index)
 
         for stack_network in stack_networks:
             net_settings = settings_utils.create_network_config(
@@ -294,16 +310,18 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def get_security_group_creators(self):
+    def get_security_group_creators(self, resource_index=None):
         """
         Returns a list of security group creator objects as configured by the
         heat template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackNetwork objects
         """
 
         out = list()
         stack_security_groups = heat_utils.get_stack_security_groups(
-            self.__heat_cli, self.__neutron, self.__stack)
+            self.__heat_cli, self.__neutron, self.__stack, resource_index)
 
         for stack_security_group in stack_security_groups:
             settings = settings_utils.create_security_group_config(
@@ -314,16 +332,18 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def get_router_creators(self):
+    def get_router_creators(self, resource_index=None):
         """
         Returns a list of router creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackRouter objects
         """
 
         out = list()
         stack_routers = heat_utils.get_stack_routers(
-            self.__heat_cli, self.__neutron, self.__stack)
+            self.__heat_cli, self.__neutron, self.__stack, resource_index)
 
         for routers in stack_routers:
             settings = settings_utils.create_router_config(
@@ -334,11 +354,9 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def __create_vm_inst(self, heat_keypair_option, stack_server):
+    def __create_vm_inst(self, heat_keypair_option, stack_server,
+                         vm_inst_settings):
 
-        vm_inst_settings = settings_utils.create_vm_inst_config(
-            self.__nova, self._keystone, self.__neutron, stack_server,
-            self._os_creds.project_name)
         image_settings = settings_utils.determine_image_config(
             self.__glance, stack_server, self.image_settings)
         keypair_settings = settings_utils.determine_keypair_config(
@@ -351,10 +369,13 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
         vm_inst_creator.initialize()
         return vm_inst_creator
 
-    def get_vm_inst_creators(self, heat_keypair_option=None):
+    def get_vm_inst_creators(self, heat_keypair_option=None,
+                             resource_index=None):
         """
         Returns a list of VM Instance creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackVmInstance objects
         """
 
@@ -362,14 +383,17 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         stack_servers = heat_utils.get_stack_servers(
             self.__heat_cli, self.__nova, self.__neutron, self._keystone,
-            self.__stack, self._os_creds.project_name)
+            self.__stack, self._os_creds.project_name,
+            resource_index=resource_index)
+
+        vm_inst_settings = settings_utils.create_vm_inst_configs(
+            self.__nova, self.__neutron, stack_servers)
 
         workers = []
-        for stack_server in stack_servers:
-            worker = worker_pool().apply_async(
+        for stack_server, settings in zip(stack_servers, vm_inst_settings):
+            worker = named_pool('heat').apply_async(
                 self.__create_vm_inst,
-                (heat_keypair_option,
-                    stack_server))
+                (heat_keypair_option, stack_server, settings))
             workers.append(worker)
 
         for worker in workers:
@@ -377,16 +401,18 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def get_volume_creators(self):
+    def get_volume_creators(self, resource_index=None):
         """
         Returns a list of Volume creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackVolume objects
         """
 
         out = list()
         volumes = heat_utils.get_stack_volumes(
-            self.__heat_cli, self.__cinder, self.__stack)
+            self.__heat_cli, self.__cinder, self.__stack, resource_index)
 
         for volume in volumes:
             settings = settings_utils.create_volume_config(volume)
@@ -401,16 +427,18 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def get_volume_type_creators(self):
+    def get_volume_type_creators(self, resource_index=None):
         """
         Returns a list of VolumeType creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackVolumeType objects
         """
 
         out = list()
         vol_types = heat_utils.get_stack_volume_types(
-            self.__heat_cli, self.__cinder, self.__stack)
+            self.__heat_cli, self.__cinder, self.__stack, resource_index)
 
         for volume in vol_types:
             settings = settings_utils.create_volume_type_config(volume)
@@ -426,17 +454,20 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def get_keypair_creators(self, outputs_pk_key=None):
+    def get_keypair_creators(self, outputs_pk_key=None,
+                             resource_index=None):
         """
         Returns a list of keypair creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackKeypair objects
         """
 
         out = list()
 
         keypairs = heat_utils.get_stack_keypairs(
-            self.__heat_cli, self.__nova, self.__stack)
+            self.__heat_cli, self.__nova, self.__stack, resource_index)
 
         for keypair in keypairs:
             settings = settings_utils.create_keypair_config(
@@ -453,17 +484,19 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
-    def get_flavor_creators(self):
+    def get_flavor_creators(self, resource_index=None):
         """
         Returns a list of Flavor creator objects as configured by the heat
         template
+        :param resource_index: the stack's heat_utils.get_resource_index()
+                               value to avoid listing its resources again
         :return: list() of OpenStackFlavor objects
         """
 
         out = list()
 
         flavors = heat_utils.get_stack_flavors(
-            self.__heat_cli, self.__nova, self.__stack)
+            self.__heat_cli, self.__nova, self.__stack, resource_index)
 
         for flavor in flavors:
             settings = settings_utils.create_flavor_config(flavor)
@@ -478,6 +511,47 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
 
         return out
 
+    def get_all_creators(self, heat_keypair_option=None, outputs_pk_key=None,
+                         max_workers=INVENTORY_WORKERS):
+        """
+        Returns the creator objects of every supported resource deployed by
+        the heat template including those of nested stacks. The stack's
+        resources are listed once and each type of creator is built
+        concurrently
+        :param heat_keypair_option: the output key of the VMs' private key
+        :param outputs_pk_key: the output key of the keypairs' private key
+        :param max_workers: the number of creator types built at once when
+                            the pool has not been configured by
+                            thread_utils.POOL_SIZES or the environment
+        :return: a StackInventory object
+        """
+        resource_index = heat_utils.get_resource_index(
+            self.__heat_cli, self.__stack.id)
+
+        getters = {
+            'networks': lambda: self.get_network_creators(
+                resource_index=resource_index),
+            'security_groups': lambda: self.get_security_group_creators(
+                resource_index=resource_index),
+            'routers': lambda: self.get_router_creators(
+                resource_index=resource_index),
+            'vm_insts': lambda: self.get_vm_inst_creators(
+                heat_keypair_option, resource_index=resource_index),
+            'volumes': lambda: self.get_volume_creators(
+                resource_index=resource_index),
+            'volume_types': lambda: self.get_volume_type_creators(
+                resource_index=resource_index),
+            'keypairs': lambda: self.get_keypair_creators(
+                outputs_pk_key, resource_index=resource_index),
+            'flavors': lambda: self.get_flavor_creators(
+                resource_index=resource_index),
+        }
+        pool = named_pool(INVENTORY_POOL, max_workers)
+        workers = [(key, pool.apply_async(getter))
+                   for key, getter in getters.items()]
+        return StackInventory(resource_index=resource_index, **dict(
+            (key, worker.get()) for key, worker in workers))
+
     def _stack_status_check(self, expected_status_code, block, timeout,
                             poll_interval, fail_status):
         """
@@ -492,29 +566,58 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
         :param fail_status: Returns false if the fail_status code is found
         :return: T/F
         """
-        # sleep and wait for stack status change
-        if block:
-            start = time.time()
-        else:
-            start = time.time() - timeout
-
-        while timeout > time.time() - start:
-            status = self._status(expected_status_code, fail_status)
-            if status:
+        if not block:
+            return self._status(expected_status_code, fail_status)
+
+        fail_statuses = [fail_status] if fail_status else None
+        waiter = heat_utils.StackEventWaiter(
+            self.__heat_cli, self.__stack.id, callback=self.event_callback,
+            marker=self.__event_marker)
+        try:
+            if waiter.wait(
+                    expected_status_code, fail_statuses=fail_statuses,
+                    not_found_ok=(expected_status_code ==
+                                  snaps.config.stack.STATUS_DELETE_COMPLETE),
+                    timeout=timeout, poll_interval=poll_interval):
                 logger.debug(
                     'Stack is active with name - ' + self.stack_settings.name)
                 return True
-
-            logger.debug('Retry querying stack status in ' + str(
-                poll_interval) + ' seconds')
-            time.sleep(poll_interval)
-            logger.debug('Stack status query timeout in ' + str(
-                timeout - (time.time() - start)))
+        except status_utils.StatusError:
+            self.__log_failed_resources()
+            raise StackError('Stack had an error')
+        finally:
+            self.__event_marker = waiter.marker
+            self.__resource_timings = waiter.timings()
+            for res_type, timing in self.__resource_timings.items():
+                logger.info(
+                    'Stack %s spent %.1fs on %d %s resource(s), max %.1fs',
+                    self.stack_settings.name, timing['total'],
+                    timing['count'], res_type, timing['max'])
 
         logger.error(
             'Timeout checking for stack status for ' + expected_status_code)
         return False
 
+    def get_resource_timings(self):
+        """
+        Returns the time spent on each type of resource during the last
+        blocking status check
+        :return: a dict where the key is the resource type and the value is a
+                 dict with the keys 'count', 'total' and 'max' in seconds
+        """
+        return dict(self.__resource_timings)
+
+    def __mark_events(self):
+        """
+        Skips the stack's existing events so the next status check only
+        considers those caused by the following action
+        """
+        try:
+            self.__event_marker = heat_utils.get_latest_event_id(
+                self.__heat_cli, self.__stack.id)
+        except HTTPNotFound:
+            self.__event_marker = None
+
     def _status(self, expected_status_code,
                 fail_status=snaps.config.stack.STATUS_CREATE_FAILED):
         """
@@ -530,24 +633,29 @@ class OpenStackHeatStack(OpenStackCloudObject, object):
             return False
 
         if fail_status and status == fail_status:
-            resources = heat_utils.get_resources(
-                self.__heat_cli, self.__stack.id)
-            logger.error('Stack %s failed', self.__stack.name)
-            for resource in resources:
-                if (resource.status !=
-                        snaps.config.stack.STATUS_CREATE_COMPLETE):
-                    logger.error(
-                        'Resource: [%s] status: [%s] reason: [%s]',
-                        resource.name, resource.status, resource.status_reason)
-                else:
-                    logger.debug(
-                        'Resource: [%s] status: [%s] reason: [%s]',
-                        resource.name, resource.status, resource.status_reason)
-
+            self.__log_failed_resources()
             raise StackError('Stack had an error')
         logger.debug('Stack status is - ' + status)
         return status == expected_status_code
 
+    def __log_failed_resources(self):
+        """
+        Logs the status of each of the failed stack's resources
+        """
+        resources = heat_utils.get_resources(
+            self.__heat_cli, self.__stack.id)
+        logger.error('Stack %s failed', self.__stack.name)
+        for resource in resources:
+            if (resource.status !=
+                    snaps.config.stack.STATUS_CREATE_COMPLETE):
+                logger.error(
+                    'Resource: [%s] status: [%s] reason: [%s]',
+                    resource.name, resource.status, resource.status_reason)
+            else:
+                logger.debug(
+                    'Resource: [%s] status: [%s] reason: [%s]',
+                    resource.name, resource.status, resource.status_reason)
+
 
 def generate_creator(os_creds, stack_inst, image_settings):
     """
@@ -565,6 +673,47 @@ def generate_creator(os_creds, stack_inst, image_settings):
     return heat_creator
 
 
+class StackInventory(object):
+    """
+    The creator objects of the resources deployed by a heat stack grouped by
+    type
+    """
+
+    def __init__(self, resource_index, networks, security_groups, routers,
+                 vm_insts, volumes, volume_types, keypairs, flavors):
+        """
+        Constructor
+        :param resource_index: the value of heat_utils.get_resource_index()
+        :param networks: list of OpenStackNetwork objects
+        :param security_groups: list of OpenStackSecurityGroup objects
+        :param routers: list of OpenStackRouter objects
+        :param vm_insts: list of OpenStackVmInstance objects
+        :param volumes: list of OpenStackVolume objects
+        :param volume_types: list of OpenStackVolumeType objects
+        :param keypairs: list of OpenStackKeypair objects
+        :param flavors: list of OpenStackFlavor objects
+        """
+        self.resource_index = resource_index
+        self.networks = networks
+        self.security_groups = security_groups
+        self.routers = routers
+        self.vm_insts = vm_insts
+        self.volumes = volumes
+        self.volume_types = volume_types
+        self.keypairs = keypairs
+        self.flavors = flavors
+
+    def creators(self):
+        """
+        Returns every creator in the order of their dependencies such that
+        reversing the list yields a safe order for cleanup
+        :return: a list of creator objects
+        """
+        return (self.flavors + self.keypairs + self.volume_types +
+                self.volumes + self.security_groups + self.networks +
+                self.routers + self.vm_insts)
+
+
 class StackSettings(StackConfig):
     """
     Class to hold the configuration settings required for creating OpenStack
@@ -14,13 +14,12 @@
 # limitations under the License.
 
 import logging
-import time
 
 from cinderclient.exceptions import NotFound
 
 from snaps.config.volume import VolumeConfig
 from snaps.openstack.openstack_creator import OpenStackVolumeObject
-from snaps.openstack.utils import cinder_utils
+from snaps.openstack.utils import cinder_utils, status_utils
 
 __author__ = 'spisarski'
 
@@ -189,24 +188,23 @@ class OpenStackVolume(OpenStackVolumeObject):
         :param poll_interval: The polling interval in seconds
         :return: T/F
         """
-        # sleep and wait for volume status change
-        if block:
-            start = time.time()
-        else:
-            start = time.time() - timeout + 1
+        if not block:
+            return self._status(expected_status_code)
 
-        while timeout > time.time() - start:
-            status = self._status(expected_status_code)
-            if status:
+        future = status_utils.wait_for_status(
+            self._cinder, cinder_utils.get_volume_statuses, self.__volume.id,
+            expected_status_code, fail_statuses=[STATUS_FAILED],
+            not_found_ok=expected_status_code == STATUS_DELETED,
+            timeout=timeout, poll_interval=poll_interval,
+            batch_key=self._os_session)
+        try:
+            if future.result():
                 logger.debug('Volume is active with name - %s',
                              self.volume_settings.name)
                 return True
-
-            logger.debug('Retry querying volume status in %s seconds',
-                         str(poll_interval))
-            time.sleep(poll_interval)
-            logger.debug('Volume status query timeout in %s',
-                         str(timeout - (time.time() - start)))
+        except status_utils.StatusError:
+            raise VolumeCreationError(
+                'Instance had an error during deployment')
 
         logger.error(
             'Timeout checking for volume status for ' + expected_status_code)
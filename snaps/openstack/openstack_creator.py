@@ -34,7 +34,8 @@ class OpenStackCloudObject(CloudObject):
         self._keystone = None
 
     def initialize(self):
-        self._os_session = keystone_utils.keystone_session(self._os_creds)
+        if not self._os_session:
+            self._os_session = keystone_utils.acquire_session(self._os_creds)
         self._keystone = keystone_utils.keystone_client(
             self._os_creds, session=self._os_session)
 
@@ -46,7 +47,8 @@ class OpenStackCloudObject(CloudObject):
 
     def clean(self):
         if self._os_session:
-            keystone_utils.close_session(self._os_session)
+            keystone_utils.release_session(self._os_session)
+            self._os_session = None
 
 
 class OpenStackComputeObject(OpenStackCloudObject):
@@ -0,0 +1,92 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+import unittest
+
+from snaps.openstack.aio import AsyncOpenStack, AsyncService
+from snaps.openstack.os_credentials import OSCreds
+
+__author__ = 'spisarski'
+
+
+class FakeUtils:
+    """
+    Stands in for a *_utils module recording the concurrent calls
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def get_thing(self, client, thing_id):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return client, thing_id
+
+
+class AsyncOpenStackUnitTests(unittest.TestCase):
+    """
+    Tests the asyncio facade in aio.py
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.cloud = AsyncOpenStack(OSCreds(
+            username='user', password='pass', auth_url='http://foo:5000/v3',
+            project_name='project'), max_workers=3, loop=self.loop)
+        self.cloud.open()
+
+    def tearDown(self):
+        self.cloud.close()
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_shared_session(self):
+        """
+        Tests that every service client uses the same keystone session
+        """
+        self.assertIs(self.cloud.nova, self.cloud.nova)
+        self.assertIs(self.cloud.nova.client.client.session,
+                      self.cloud.neutron.client.httpclient.session)
+
+    def test_bounded_calls(self):
+        """
+        Tests that many coroutines share the bounded executor
+        """
+        fake_utils = FakeUtils()
+        service = AsyncService(self.cloud, fake_utils, 'client')
+        results = self.loop.run_until_complete(asyncio.gather(
+            *[service.get_thing(index) for index in range(12)]))
+
+        self.assertEqual([('client', index) for index in range(12)], results)
+        self.assertLessEqual(fake_utils.max_running, 3)
+
+    def test_private_functions_hidden(self):
+        """
+        Tests that only public functions are exposed
+        """
+        self.assertTrue(callable(self.cloud.nova.get_flavor_by_name))
+        with self.assertRaises(AttributeError):
+            getattr(self.cloud.nova, '__get_os_flavor')
+        with self.assertRaises(AttributeError):
+            getattr(self.cloud.nova, 'POLL_INTERVAL')
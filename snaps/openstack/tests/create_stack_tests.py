@@ -411,6 +411,30 @@ class CreateStackSuccessTests(OSIntegrationTestCase):
         self.assertIsNotNone(nova_utils.get_server_object_by_id(
             nova, neutron, keystone, vm_inst_creators[0].get_vm_inst().id))
 
+    def test_retrieve_all_creators(self):
+        """
+        Tests the creation of an OpenStack stack from Heat template file and
+        the retrieval of all of its creators with a single resource listing.
+        """
+        stack_settings = StackConfig(
+            name=self.__class__.__name__ + '-' + str(self.guid) + '-stack',
+            template_path=self.heat_tmplt_path,
+            env_values=self.env_values)
+        self.stack_creator = OpenStackHeatStack(
+            self.os_creds, stack_settings)
+        created_stack = self.stack_creator.create(block=True)
+        self.assertIsNotNone(created_stack)
+
+        inventory = self.stack_creator.get_all_creators()
+        self.assertEqual(1, len(inventory.networks))
+        self.assertEqual(self.network_name,
+                         inventory.networks[0].get_network().name)
+        self.assertEqual(1, len(inventory.vm_insts))
+        self.assertEqual(self.vm_inst_name,
+                         inventory.vm_insts[0].get_vm_inst().name)
+        self.assertEqual(0, len(inventory.volumes))
+        self.assertEqual(2, len(inventory.creators()))
+
 
 class CreateStackFloatingIpTests(OSIntegrationTestCase):
     """
@@ -19,7 +19,7 @@ from cinderclient.exceptions import NotFound
 
 from snaps.domain.volume import (
     QoSSpec, VolumeType, VolumeTypeEncryption, Volume)
-from snaps.openstack.utils import keystone_utils
+from snaps.openstack.utils import keystone_utils, resource_cache
 
 __author__ = 'spisarski'
 
@@ -51,7 +51,8 @@ def cinder_client(os_creds, session=None):
 def get_volume(cinder, keystone=None, volume_name=None, volume_settings=None,
                project_name=None):
     """
-    Returns an OpenStack volume object for a given name
+    Returns an OpenStack volume object for a given name. The name is filtered
+    by the server so only the matching volumes are retrieved
     :param cinder: the Cinder client
     :param keystone: the Keystone client (required if project_name or
                      volume_settings.project_name is not None
@@ -63,7 +64,7 @@ def get_volume(cinder, keystone=None, volume_name=None, volume_settings=None,
     if volume_settings:
         volume_name = volume_settings.name
 
-    volumes = cinder.volumes.list()
+    volumes = cinder.volumes.list(search_opts={'name': volume_name})
     for os_volume in volumes:
         if os_volume.name == volume_name:
             project_id = None
@@ -75,10 +76,8 @@ def get_volume(cinder, keystone=None, volume_name=None, volume_settings=None,
                 project_name = volume_settings.project_name
 
             if project_name:
-                project = keystone_utils.get_project_by_id(
-                    keystone, project_id)
-
-                if project and project.name == project_name:
+                if keystone_utils.get_project_name_by_id(
+                        keystone, project_id) == project_name:
                     return __map_os_volume_to_domain(os_volume)
             else:
                 return __map_os_volume_to_domain(os_volume)
@@ -105,6 +104,36 @@ def get_volume_by_id(cinder, volume_id):
     return __map_os_volume_to_domain(os_volume)
 
 
+def get_volumes_by_ids(cinder, volume_ids):
+    """
+    Returns the volumes with the given IDs using a single query for the
+    project's volumes. Volumes not listed are looked up individually
+    :param cinder: the Cinder client
+    :param volume_ids: the IDs of the volumes to retrieve
+    :return: a list of SNAPS-OO Domain Volume objects for the volumes found
+             in the order of volume_ids
+    """
+    volume_ids = [volume_id for volume_id in volume_ids if volume_id]
+    if not volume_ids:
+        return list()
+
+    os_volume_dict = dict(
+        (os_volume.id, os_volume) for os_volume in cinder.volumes.list()
+        if os_volume.id in volume_ids)
+
+    out = list()
+    for volume_id in volume_ids:
+        os_volume = os_volume_dict.get(volume_id)
+        if not os_volume:
+            try:
+                os_volume = __get_os_volume_by_id(cinder, volume_id)
+            except NotFound:
+                logger.warn('Volume cannot be located with ID %s', volume_id)
+                continue
+        out.append(__map_os_volume_to_domain(os_volume))
+    return out
+
+
 def __map_os_volume_to_domain(os_volume):
     """
     Returns a SNAPS-OO domain Volume object that is created by an OpenStack
@@ -137,6 +166,30 @@ def get_volume_status(cinder, volume):
     return os_volume.status
 
 
+def get_volume_statuses(cinder, volume_ids, since=None):
+    """
+    Returns the statuses of a collection of volumes with a single query
+    :param cinder: the Cinder client
+    :param volume_ids: the IDs of the volumes
+    :param since: not supported by the API and ignored
+    :return: dict where the key is the volume ID and the value its status for
+             each volume found
+    """
+    if len(volume_ids) == 1:
+        try:
+            os_volume = cinder.volumes.get(volume_ids[0])
+            return {os_volume.id: os_volume.status}
+        except NotFound:
+            return dict()
+
+    volume_ids = set(volume_ids)
+    out = dict()
+    for os_volume in cinder.volumes.list():
+        if os_volume.id in volume_ids:
+            out[os_volume.id] = os_volume.status
+    return out
+
+
 def create_volume(cinder, keystone, volume_settings):
     """
     Creates and returns OpenStack volume object with an external URL
@@ -179,6 +232,10 @@ def delete_volume(cinder, volume):
     return cinder.volumes.delete(volume.id)
 
 
+@resource_cache.cached('volume_type', lambda volume_type_name=None,
+                       volume_type_settings=None: (
+                           volume_type_settings.name if volume_type_settings
+                           else volume_type_name))
 def get_volume_type(cinder, volume_type_name=None, volume_type_settings=None):
     """
     Returns an OpenStack volume type object for a given name
@@ -215,6 +272,7 @@ def __get_os_volume_type_by_id(cinder, volume_type_id):
                     volume_type_id)
 
 
+@resource_cache.cached('volume_type', lambda volume_type_id: volume_type_id)
 def get_volume_type_by_id(cinder, volume_type_id):
     """
     Returns an OpenStack volume type object for a given name
@@ -236,6 +294,7 @@ def get_volume_type_by_id(cinder, volume_type_id):
                           os_vol_type.is_public, encryption, qos_spec)
 
 
+@resource_cache.invalidates('volume_type')
 def create_volume_type(cinder, type_settings):
     """
     Creates and returns OpenStack volume type object with an external URL
@@ -269,6 +328,7 @@ def create_volume_type(cinder, type_settings):
                       vol_encryption, qos_spec)
 
 
+@resource_cache.invalidates('volume_type')
 def delete_volume_type(cinder, vol_type):
     """
     Deletes an volume from OpenStack
@@ -300,6 +360,7 @@ def get_volume_encryption_by_type(cinder, volume_type):
             encryption.control_location, encryption.provider, cipher, key_size)
 
 
+@resource_cache.invalidates('volume_type')
 def create_volume_encryption(cinder, volume_type, encryption_settings):
     """
     Creates and returns OpenStack volume type object with an external URL
@@ -332,6 +393,7 @@ def create_volume_encryption(cinder, volume_type, encryption_settings):
         encryption.control_location, encryption.provider, cipher, key_size)
 
 
+@resource_cache.invalidates('volume_type')
 def delete_volume_type_encryption(cinder, vol_type):
     """
     Deletes an volume from OpenStack
@@ -364,6 +426,8 @@ def __get_os_qos(cinder, qos_name=None, qos_settings=None):
             return qos
 
 
+@resource_cache.cached('qos', lambda qos_name=None, qos_settings=None: (
+    qos_settings.name if qos_settings else qos_name))
 def get_qos(cinder, qos_name=None, qos_settings=None):
     """
     Returns an OpenStack QoS object for a given name
@@ -378,6 +442,7 @@ def get_qos(cinder, qos_name=None, qos_settings=None):
                        consumer=os_qos.consumer)
 
 
+@resource_cache.cached('qos', lambda qos_id: qos_id)
 def get_qos_by_id(cinder, qos_id):
     """
     Returns an OpenStack qos object for a given name
@@ -389,6 +454,7 @@ def get_qos_by_id(cinder, qos_id):
     return QoSSpec(name=qos.name, spec_id=qos.id, consumer=qos.consumer)
 
 
+@resource_cache.invalidates('qos', 'volume_type')
 def create_qos(cinder, qos_settings):
     """
     Creates and returns OpenStack qos object with an external URL
@@ -403,6 +469,7 @@ def create_qos(cinder, qos_settings):
     return QoSSpec(name=qos.name, spec_id=qos.id, consumer=qos.consumer)
 
 
+@resource_cache.invalidates('qos', 'volume_type')
 def delete_qos(cinder, qos):
     """
     Deletes an QoS from OpenStack
@@ -23,7 +23,8 @@ from snaps.openstack.create_image import OpenStackImage
 from snaps.openstack.create_network import OpenStackNetwork
 from snaps.openstack.create_router import OpenStackRouter
 from snaps.openstack.create_keypairs import OpenStackKeypair
-from snaps.openstack.create_instance import OpenStackVmInstance
+from snaps.openstack.create_instance import (
+    OpenStackVmInstance, OpenStackVmInstanceGroup)
 from snaps.openstack.create_security_group import OpenStackSecurityGroup
 
 logger = logging.getLogger('deploy_utils')
@@ -141,6 +142,32 @@ def create_vm_instance(os_creds, instance_settings, image_settings,
     return vm_creator
 
 
+def create_vm_instance_group(os_creds, instance_settings, image_settings,
+                             keypair_creator=None, init_only=False):
+    """
+    Creates the VM instances of a VmInstanceConfig whose count is greater
+    than one
+    :param os_creds: The OpenStack credentials
+    :param instance_settings: Instance of VmInstanceConfig
+    :param image_settings: The object containing image settings
+    :param keypair_creator: The object responsible for creating the keypair
+                            associated with these VM instances. (optional)
+    :param init_only: Denotes whether or not this is being called for
+                      initialization (T) or creation (F) (default False)
+    :return: A reference to the VM instance group object
+    """
+    kp_settings = None
+    if keypair_creator:
+        kp_settings = keypair_creator.keypair_settings
+    group_creator = OpenStackVmInstanceGroup(
+        os_creds, instance_settings, image_settings, kp_settings)
+    if init_only:
+        group_creator.initialize()
+    else:
+        group_creator.create()
+    return group_creator
+
+
 def create_user(os_creds, user_settings):
     """
     Creates an OpenStack user
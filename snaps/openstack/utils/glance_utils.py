@@ -14,13 +14,16 @@
 # limitations under the License.
 import logging
 import os
+import threading
+import time
 import uuid
 
-from snaps import file_utils
+from snaps import file_utils, image_cache
 from glanceclient.client import Client
+from glanceclient.exc import HTTPNotFound
 
 from snaps.domain.image import Image
-from snaps.openstack.utils import keystone_utils
+from snaps.openstack.utils import keystone_utils, resource_cache
 
 __author__ = 'spisarski'
 
@@ -29,6 +32,25 @@ logger = logging.getLogger('glance_utils')
 VERSION_1 = 1.0
 VERSION_2 = 2.0
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+PROGRESS_LOG_INTERVAL = 10
+
+# When True, images configured with a URL are imported by Glance directly
+# with the web-download import method whenever the cloud supports it. This
+# requires the Glance nodes to reach the URL themselves as neither the image
+# cache nor the proxy settings apply. Failed imports fall back to
+# downloading then uploading the image
+WEB_DOWNLOAD_IMPORT = False
+IMPORT_METHOD_WEB_DOWNLOAD = 'web-download'
+IMPORT_TIMEOUT = 600
+IMPORT_START_TIMEOUT = 60
+IMPORT_POLL_INTERVAL = 3
+
+# Configured image names resolved to existing images with identical contents
+# where the key is the name and the value is the image ID
+_image_aliases = dict()
+_image_aliases_lock = threading.Lock()
+
 """
 Utilities for basic neutron API calls
 """
@@ -49,6 +71,19 @@ def glance_client(os_creds, session=None):
                   region_name=os_creds.region_name)
 
 
+def __image_query_key(image_name, image_settings):
+    """
+    Returns the resource cache key of a get_image() query
+    """
+    if image_settings:
+        return (image_settings.name, image_settings.format,
+                image_settings.exists)
+    return image_name,
+
+
+@resource_cache.cached('image', lambda image_name=None,
+                       image_settings=None: __image_query_key(
+                           image_name, image_settings))
 def get_image(glance, image_name=None, image_settings=None):
     """
     Returns an OpenStack image object for a given name
@@ -78,7 +113,93 @@ def get_image(glance, image_name=None, image_settings=None):
                 name=image['name'], image_id=image['id'],
                 size=image['size'], properties=image.get('properties'))
 
+    image_id = get_image_alias(img_filter.get('name'))
+    if image_id:
+        try:
+            image = glance.images.get(image_id)
+        except HTTPNotFound:
+            return None
+        if glance.version == VERSION_1:
+            return Image(name=image.name, image_id=image.id,
+                         size=image.size, properties=image.properties)
+        return Image(
+            name=image['name'], image_id=image['id'],
+            size=image['size'], properties=image.get('properties'))
+
 
+def add_image_alias(image_name, image_id):
+    """
+    Records that the image with the given ID stands in for the image name so
+    get_image() lookups by that name return it
+    :param image_name: the configured image name
+    :param image_id: the ID of the existing image
+    """
+    with _image_aliases_lock:
+        _image_aliases[image_name] = image_id
+
+
+@resource_cache.invalidates('image')
+def remove_image_alias(image_name, image_id):
+    """
+    Removes the alias of an image name when it is still held by the image
+    :param image_name: the configured image name
+    :param image_id: the ID of the existing image
+    """
+    with _image_aliases_lock:
+        if _image_aliases.get(image_name) == image_id:
+            del _image_aliases[image_name]
+
+
+def get_image_alias(image_name):
+    """
+    Returns the ID of the image standing in for an image name
+    :param image_name: the configured image name
+    :return: the image ID or None
+    """
+    with _image_aliases_lock:
+        return _image_aliases.get(image_name)
+
+
+def get_identical_image(glance, checksum, size, disk_format,
+                        extra_properties=None):
+    """
+    Returns an active image whose contents and properties match the ones
+    given so its bits do not need to be uploaded again
+    :param glance: the Glance client
+    :param checksum: the MD5 hex digest of the image's contents
+    :param size: the number of bytes of the image's contents
+    :param disk_format: the image's disk format
+    :param extra_properties: dict of custom properties the image must have
+    :return: the SNAPS-OO Domain Image object or None
+    """
+    img_filter = {'checksum': checksum, 'status': 'active',
+                  'disk_format': disk_format}
+    for image in glance.images.list(**{'filters': img_filter}):
+        if glance.version == VERSION_1:
+            image = glance.images.get(image.id)
+            found = Image(name=image.name, image_id=image.id,
+                          size=image.size, properties=image.properties)
+            props = image.properties or dict()
+            image_checksum = image.checksum
+            image_status = image.status
+        else:
+            found = Image(
+                name=image['name'], image_id=image['id'],
+                size=image['size'], properties=image.get('properties'))
+            props = image
+            image_checksum = image.get('checksum')
+            image_status = image.get('status')
+
+        # filters unsupported by the server are silently ignored
+        if (image_checksum != checksum or image_status != 'active'
+                or found.size != size):
+            continue
+        if all(str(props.get(key)) == str(value)
+               for key, value in (extra_properties or dict()).items()):
+            return found
+
+
+@resource_cache.cached('image', lambda image_id: image_id)
 def get_image_by_id(glance, image_id):
     """
     Returns an OpenStack image object for a given name
@@ -109,6 +230,37 @@ def get_image_status(glance, image):
         raise GlanceException('Unsupported glance client version')
 
 
+def get_image_statuses(glance, image_ids, since=None):
+    """
+    Returns the statuses of a collection of images with a single query when
+    supported by the Glance API version
+    :param glance: the Glance client
+    :param image_ids: the IDs of the images
+    :param since: not supported by the API and ignored
+    :return: dict where the key is the image ID and the value its status for
+             each image found
+    """
+    out = dict()
+    if glance.version == VERSION_2 and len(image_ids) > 1:
+        os_images = glance.images.list(
+            filters={'id': 'in:' + ','.join(image_ids)})
+        for os_image in os_images:
+            out[os_image['id']] = os_image['status']
+        return out
+
+    for image_id in image_ids:
+        try:
+            os_image = glance.images.get(image_id)
+        except HTTPNotFound:
+            continue
+        if glance.version == VERSION_1:
+            out[image_id] = os_image.status
+        else:
+            out[image_id] = os_image['status']
+    return out
+
+
+@resource_cache.invalidates('image')
 def create_image(glance, image_settings):
     """
     Creates and returns OpenStack image object with an external URL
@@ -163,49 +315,67 @@ def __create_image_v1(glance, image_settings):
             image_file.close()
 
 
+def __download_progress_logger(url):
+    """
+    Returns a download progress callback logging every 10% downloaded
+    :param url: the URL being downloaded
+    :return: the callback function
+    """
+    logged = {'percent': 0}
+
+    def log_progress(done, total):
+        if total:
+            percent = done * 100 // total
+            if percent >= logged['percent'] + 10:
+                logged['percent'] = percent
+                logger.debug('Downloaded %s%% of %s', percent, url)
+
+    return log_progress
+
+
 def __create_image_v2(glance, image_settings):
     """
-    Creates and returns OpenStack image object with an external URL
+    Creates and returns OpenStack image object with an external URL. Images
+    configured with a URL are imported by Glance when it supports the
+    web-download import method else they are downloaded then uploaded
     :param glance: the glance client v2
     :param image_settings: the image settings object
     :return: the OpenStack image object
     :raise GlanceException or IOException or URLError
     """
+    if image_settings.image_file is None and image_settings.url:
+        if WEB_DOWNLOAD_IMPORT and supports_import_method(
+                glance, IMPORT_METHOD_WEB_DOWNLOAD):
+            image = __import_image_v2(glance, image_settings)
+            if image:
+                return image
+
     cleanup_temp_file = False
     image_file = None
+    cached_image = None
     if image_settings.image_file is not None:
         image_filename = image_settings.image_file
     elif image_settings.url:
-        file_name = str(uuid.uuid4())
-        try:
+        cache = image_cache.get_image_cache()
+        if cache:
+            cached_image = cache.get(image_settings.url)
+        if cached_image:
+            image_filename = cached_image.name
+        else:
+            file_name = str(uuid.uuid4())
             image_file = file_utils.download(
-                image_settings.url, './tmp', file_name)
+                image_settings.url, './tmp', file_name,
+                progress_callback=__download_progress_logger(
+                    image_settings.url))
             image_filename = image_file.name
-        except:
-            if image_file:
-                os.remove(image_file.name)
-            raise
-
-        cleanup_temp_file = True
+            cleanup_temp_file = True
     else:
         raise GlanceException('Filename or URL of image not configured')
 
     os_image = None
     try:
-        kwargs = dict()
-        kwargs['name'] = image_settings.name
-        kwargs['disk_format'] = image_settings.format
-        kwargs['container_format'] = 'bare'
-
-        if image_settings.public:
-            kwargs['visibility'] = 'public'
-
-        if image_settings.extra_properties:
-            kwargs.update(image_settings.extra_properties)
-
-        os_image = glance.images.create(**kwargs)
-        image_file = open(os.path.expanduser(image_filename), 'rb')
-        glance.images.upload(os_image['id'], image_file)
+        os_image = glance.images.create(**__image_v2_kwargs(image_settings))
+        upload_image_file(glance, os_image['id'], image_filename)
     except:
         logger.error('Unexpected exception creating image. Rolling back')
         if os_image:
@@ -214,16 +384,144 @@ def __create_image_v2(glance, image_settings):
                 size=os_image['size'], properties=os_image.get('properties')))
         raise
     finally:
-        if image_file:
-            logger.debug('Closing file %s', image_file.name)
-            image_file.close()
         if cleanup_temp_file:
-            logger.info('Removing file %s', image_file.name)
+            logger.info('Removing file %s', image_filename)
             os.remove(image_filename)
+        if cached_image:
+            cached_image.close()
 
     return get_image_by_id(glance, os_image['id'])
 
 
+def __image_v2_kwargs(image_settings):
+    """
+    Returns the arguments used to create a Glance v2 image record
+    :param image_settings: the image settings object
+    :return: a dict
+    """
+    kwargs = dict()
+    kwargs['name'] = image_settings.name
+    kwargs['disk_format'] = image_settings.format
+    kwargs['container_format'] = 'bare'
+
+    if image_settings.public:
+        kwargs['visibility'] = 'public'
+
+    if image_settings.extra_properties:
+        kwargs.update(image_settings.extra_properties)
+    return kwargs
+
+
+def __import_image_v2(glance, image_settings):
+    """
+    Creates an image record and has Glance import its data from the
+    configured URL with the web-download import method. As the import
+    completes asynchronously, the image is polled until it is active or the
+    import has failed
+    :param glance: the glance client v2
+    :param image_settings: the image settings object
+    :return: the Image domain object or None when the import is rejected or
+             fails
+    """
+    os_image = glance.images.create(**__image_v2_kwargs(image_settings))
+    try:
+        glance.images.image_import(
+            os_image['id'], method=IMPORT_METHOD_WEB_DOWNLOAD,
+            uri=image_settings.url)
+        logger.info('Importing image %s from %s', image_settings.name,
+                    image_settings.url)
+        error = __wait_for_import(glance, os_image['id'])
+    except Exception as e:
+        error = e
+
+    if error:
+        logger.warning(
+            'Unable to import image %s from %s, uploading it instead - %s',
+            image_settings.name, image_settings.url, error)
+        delete_image(glance, Image(
+            name=os_image['name'], image_id=os_image['id'],
+            size=os_image['size'], properties=os_image.get('properties')))
+        return None
+
+    return get_image_by_id(glance, os_image['id'])
+
+
+def __wait_for_import(glance, image_id):
+    """
+    Polls an image being imported until it is active
+    :param glance: the glance client v2
+    :param image_id: the ID of the image
+    :return: None when active else the reason the import failed
+    """
+    start = time.time()
+    started = False
+    while time.time() - start < IMPORT_TIMEOUT:
+        os_image = glance.images.get(image_id)
+        status = os_image['status']
+        if status == 'active':
+            return None
+        if os_image.get('os_glance_failed_import'):
+            return 'import failed on stores ' + os_image[
+                'os_glance_failed_import']
+        if status == 'importing':
+            started = True
+        elif status != 'queued':
+            return 'image status ' + status
+        elif started:
+            # Glance releases from versions not recording failed imports
+            # return the image to queued
+            return 'image returned to queued'
+        elif time.time() - start > IMPORT_START_TIMEOUT:
+            return 'import not started after {} seconds'.format(
+                IMPORT_START_TIMEOUT)
+        time.sleep(IMPORT_POLL_INTERVAL)
+    return 'import not complete after {} seconds'.format(IMPORT_TIMEOUT)
+
+
+def supports_import_method(glance, method):
+    """
+    Returns True when the Glance v2 API advertises the given interoperable
+    image import method
+    :param glance: the glance client
+    :param method: the import method name (i.e. 'web-download')
+    :return: T/F
+    """
+    if (glance.version != VERSION_2
+            or not hasattr(glance.images, 'get_import_info')):
+        return False
+    try:
+        import_info = glance.images.get_import_info()
+    except Exception as e:
+        logger.debug('Unable to retrieve the image import methods - %s', e)
+        return False
+    return method in import_info.get('import-methods', dict()).get(
+        'value', list())
+
+
+def upload_image_file(glance, image_id, file_path,
+                      chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Streams the contents of a file as the image's data logging the upload
+    throughput
+    :param glance: the glance client v2
+    :param image_id: the ID of the image record
+    :param file_path: the path to the image file
+    :param chunk_size: the number of bytes sent at a time
+    :return: the UploadStream object holding the transfer statistics
+    """
+    file_path = os.path.expanduser(file_path)
+    with open(file_path, 'rb') as image_file:
+        stream = UploadStream(
+            image_file, os.path.getsize(file_path), chunk_size)
+        glance.images.upload(image_id, stream)
+
+    logger.info('Uploaded %s bytes of image %s in %.1f seconds (%.1f MB/s)',
+                stream.sent, image_id, stream.elapsed(),
+                stream.throughput() / (1024 * 1024))
+    return stream
+
+
+@resource_cache.invalidates('image')
 def delete_image(glance, image):
     """
     Deletes an image from OpenStack
@@ -238,3 +536,67 @@ class GlanceException(Exception):
     """
     Exception when calls to the Glance client cannot be served properly
     """
+
+
+class UploadStream:
+    """
+    File-like wrapper reading an image file in blocks of at most chunk_size
+    bytes, so the transfer block size can be tuned, while periodically
+    logging the upload throughput
+    """
+
+    def __init__(self, image_file, size, chunk_size=UPLOAD_CHUNK_SIZE):
+        """
+        Constructor
+        :param image_file: the open file object
+        :param size: the number of bytes to upload
+        :param chunk_size: the maximum number of bytes returned by each read
+        """
+        self.image_file = image_file
+        self.size = size
+        self.chunk_size = chunk_size
+        self.sent = 0
+        self.__start = None
+        self.__end = None
+        self.__last_log = None
+
+    def read(self, size=-1):
+        """
+        Returns the next block of the file
+        :param size: the maximum number of bytes to return, which is further
+                     bounded by chunk_size (all when negative or None)
+        :return: the bytes read or an empty bytes object once complete
+        """
+        if size == 0:
+            return b''
+        if size is None or size < 0 or size > self.chunk_size:
+            size = self.chunk_size
+        now = time.time()
+        if self.__start is None:
+            self.__start = now
+            self.__last_log = now
+
+        chunk = self.image_file.read(size)
+        self.sent += len(chunk)
+        if not chunk:
+            self.__end = self.__end or now
+        elif now - self.__last_log >= PROGRESS_LOG_INTERVAL:
+            self.__last_log = now
+            logger.debug('Uploaded %s of %s bytes (%.1f MB/s)', self.sent,
+                         self.size, self.throughput() / (1024 * 1024))
+        return chunk
+
+    def elapsed(self):
+        """
+        Returns the number of seconds spent uploading
+        """
+        if self.__start is None:
+            return 0
+        return (self.__end or time.time()) - self.__start
+
+    def throughput(self):
+        """
+        Returns the average number of bytes sent per second
+        """
+        elapsed = self.elapsed()
+        return self.sent / elapsed if elapsed else 0
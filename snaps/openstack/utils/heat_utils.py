@@ -14,24 +14,32 @@
 # limitations under the License.
 import logging
 import os
+import time
+
+from datetime import datetime
 
 from heatclient.client import Client
+from heatclient.exc import HTTPNotFound
 from heatclient.common.template_format import yaml_loader
 from novaclient.exceptions import NotFound
 from oslo_serialization import jsonutils
 import yaml
 
 from snaps import file_utils
-from snaps.domain.stack import Stack, Resource, Output
+from snaps.domain.stack import Stack, Resource, Output, Event
 from snaps.openstack.utils import (
-    keystone_utils, neutron_utils, nova_utils, cinder_utils)
-from snaps.thread_utils import worker_pool
+    keystone_utils, neutron_utils, nova_utils, cinder_utils, status_utils)
+from snaps.thread_utils import named_pool
 
 
 __author__ = 'spisarski'
 
 logger = logging.getLogger('heat_utils')
 
+# Levels of nested stacks traversed, equal to Heat's default
+# max_nested_stack_depth
+NESTED_DEPTH = 5
+
 
 def heat_client(os_creds, session=None):
     """
@@ -100,6 +108,21 @@ def get_stack_status(heat_cli, stack_id):
     return heat_cli.stacks.get(stack_id).stack_status
 
 
+def get_stack_statuses(heat_cli, stack_ids, since=None):
+    """
+    Returns the statuses of a collection of Heat stacks with a single query
+    :param heat_cli: the OpenStack heat client
+    :param stack_ids: the IDs of the heat stacks
+    :param since: not supported by the API and ignored
+    :return: dict where the key is the stack ID and the value its status for
+             each stack found
+    """
+    out = dict()
+    for stack in heat_cli.stacks.list(filters={'id': list(stack_ids)}):
+        out[stack.id] = stack.stack_status
+    return out
+
+
 def get_stack_status_reason(heat_cli, stack_id):
     """
     Returns the current status of the Heat stack
@@ -205,6 +228,213 @@ def get_resources(heat_cli, res_id, res_type=None):
         return out
 
 
+def get_resource_index(heat_cli, stack_id, nested_depth=NESTED_DEPTH):
+    """
+    Returns the resources of a stack and of its nested stacks (i.e. the
+    members of an OS::Heat::ResourceGroup) with a single query
+    :param heat_cli: the OpenStack heat client
+    :param stack_id: the ID of the heat stack
+    :param nested_depth: the number of nested stack levels to traverse
+    :return: a dict where the key is the resource type and the value is the
+             list of Resource domain objects of that type having a physical
+             resource ID
+    """
+    out = dict()
+    resource_ids = set()
+    for os_resource in heat_cli.resources.list(
+            stack_id, nested_depth=nested_depth):
+        resource_id = os_resource.physical_resource_id
+        if not resource_id or resource_id in resource_ids:
+            continue
+        resource_ids.add(resource_id)
+        out.setdefault(os_resource.resource_type, list()).append(Resource(
+            name=os_resource.resource_name,
+            resource_type=os_resource.resource_type,
+            resource_id=resource_id,
+            status=os_resource.resource_status,
+            status_reason=os_resource.resource_status_reason))
+    return out
+
+
+def __get_resource_ids(heat_cli, stack, res_type, resource_index):
+    """
+    Returns the physical IDs of a stack's resources of a given type
+    :param heat_cli: the OpenStack heat client
+    :param stack: the SNAPS-OO Stack domain object
+    :param res_type: the resource type
+    :param resource_index: the value returned by get_resource_index() else
+                           None to query it
+    :return: a list of IDs
+    """
+    if resource_index is None:
+        resource_index = get_resource_index(heat_cli, stack.id)
+    return [resource.id for resource in resource_index.get(res_type, [])]
+
+
+def get_stack_events(heat_cli, stack_id, marker=None,
+                     nested_depth=NESTED_DEPTH):
+    """
+    Returns the events of a stack and its nested stacks in the order they
+    occurred
+    :param heat_cli: the OpenStack heat client
+    :param stack_id: the ID of the heat stack
+    :param marker: the ID of the last event already received, only later
+                   events are returned when set
+    :param nested_depth: the number of nested stack levels to traverse
+    :return: a list of Event domain objects
+    """
+    args = {'sort_dir': 'asc', 'nested_depth': nested_depth}
+    if marker:
+        args['marker'] = marker
+
+    out = list()
+    for os_event in heat_cli.events.list(stack_id, **args):
+        out.append(Event(
+            event_id=os_event.id,
+            stack_name=getattr(os_event, 'stack_name', None),
+            name=os_event.resource_name,
+            resource_type=getattr(os_event, 'resource_type', None),
+            resource_id=os_event.physical_resource_id,
+            status=os_event.resource_status,
+            status_reason=os_event.resource_status_reason,
+            event_time=os_event.event_time))
+    return out
+
+
+def get_latest_event_id(heat_cli, stack_id):
+    """
+    Returns the ID of a stack's most recent event
+    :param heat_cli: the OpenStack heat client
+    :param stack_id: the ID of the heat stack
+    :return: the ID or None when the stack has no events
+    """
+    for os_event in heat_cli.events.list(
+            stack_id, sort_dir='desc', limit=1, nested_depth=NESTED_DEPTH):
+        return os_event.id
+
+
+class StackEventWaiter:
+    """
+    Waits for a stack to reach a status by following its event stream. Each
+    poll only returns the events that occurred since the previous one
+    """
+
+    def __init__(self, heat_cli, stack_id, callback=None, marker=None):
+        """
+        Constructor
+        :param heat_cli: the OpenStack heat client
+        :param stack_id: the ID of the heat stack
+        :param callback: function called with each Event domain object as it
+                         is received
+        :param marker: the ID of the last event not to be considered (i.e.
+                       the value of get_latest_event_id() prior to an update)
+        """
+        self.heat_cli = heat_cli
+        self.stack_id = stack_id
+        self.callback = callback
+        self.marker = marker
+        self.__started = dict()
+        self.__timings = dict()
+
+    def wait(self, expected_status, fail_statuses=None, not_found_ok=False,
+             timeout=300, poll_interval=3):
+        """
+        Blocks until the stack reports the expected status
+        :param expected_status: the stack status being awaited
+        :param fail_statuses: stack statuses raising a StatusError
+        :param not_found_ok: when True, the stack no longer existing is
+                             considered a success
+        :param timeout: the number of seconds to wait
+        :param poll_interval: the number of seconds between queries
+        :return: True when the status has been reached else False
+        :raise: status_utils.StatusError upon the first failed resource
+        """
+        fail_statuses = fail_statuses or list()
+        end_time = time.time() + timeout
+        while True:
+            try:
+                events = get_stack_events(
+                    self.heat_cli, self.stack_id, self.marker)
+            except HTTPNotFound:
+                if not_found_ok:
+                    return True
+                raise
+
+            for event in events:
+                self.marker = event.id
+                self.__record(event)
+                if self.callback:
+                    self.callback(event)
+
+                if event.resource_id == self.stack_id:
+                    if event.status in fail_statuses:
+                        raise status_utils.StatusError(
+                            self.stack_id, event.status)
+                    if (event.status == expected_status and
+                            self.__confirm(expected_status, not_found_ok)):
+                        return True
+                elif event.status and event.status.endswith('_FAILED'):
+                    logger.error('Resource %s failed - %s', event.name,
+                                 event.status_reason)
+                    raise status_utils.StatusError(
+                        event.resource_id or event.name, event.status)
+
+            if time.time() + poll_interval > end_time:
+                return False
+            time.sleep(poll_interval)
+
+    def __confirm(self, expected_status, not_found_ok):
+        """
+        Returns True when the stack's current status is the one reported by
+        its latest event, which guards against events replayed without a
+        marker
+        """
+        try:
+            return get_stack_status(
+                self.heat_cli, self.stack_id) == expected_status
+        except HTTPNotFound:
+            return not_found_ok
+
+    def __record(self, event):
+        """
+        Records the duration of each resource's action by its type
+        """
+        key = (event.stack_name, event.name)
+        event_time = _parse_event_time(event.event_time)
+        if event.status and event.status.endswith('_IN_PROGRESS'):
+            self.__started[key] = event_time
+        elif key in self.__started:
+            started = self.__started.pop(key)
+            if started and event_time:
+                duration = (event_time - started).total_seconds()
+                timing = self.__timings.setdefault(
+                    event.type, {'count': 0, 'total': 0.0, 'max': 0.0})
+                timing['count'] += 1
+                timing['total'] += duration
+                timing['max'] = max(timing['max'], duration)
+
+    def timings(self):
+        """
+        Returns the time spent on the resources completed while waiting
+        :return: a dict where the key is the resource type and the value is a
+                 dict with the keys 'count', 'total' and 'max' in seconds
+        """
+        return dict((res_type, dict(timing))
+                    for res_type, timing in self.__timings.items())
+
+
+def _parse_event_time(event_time):
+    """
+    Returns the datetime of an event's time else None when not parsable
+    """
+    for time_format in ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S',
+                        '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%S.%f'):
+        try:
+            return datetime.strptime(event_time, time_format)
+        except (TypeError, ValueError):
+            pass
+
+
 def get_outputs(heat_cli, stack):
     """
     Returns all of the SNAPS-OO Output domain objects for the defined outputs
@@ -228,154 +458,109 @@ def get_outputs(heat_cli, stack):
     return out
 
 
-def get_stack_networks(heat_cli, neutron, stack):
+def get_stack_networks(heat_cli, neutron, stack, resource_index=None):
     """
     Returns a list of Network domain objects deployed by this stack
     :param heat_cli: the OpenStack heat client object
     :param neutron: the OpenStack neutron client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of Network objects
     """
 
-    out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Neutron::Net')
-    workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(neutron_utils.get_network_by_id,
-                                           (neutron, resource.id))
-        workers.append(worker)
-
-    for worker in workers:
-        network = worker.get()
-        if network:
-            out.append(network)
-
-    return out
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Neutron::Net', resource_index)
+    return neutron_utils.get_networks_by_ids(neutron, resource_ids)
 
 
-def get_stack_routers(heat_cli, neutron, stack):
+def get_stack_routers(heat_cli, neutron, stack, resource_index=None):
     """
     Returns a list of Network domain objects deployed by this stack
     :param heat_cli: the OpenStack heat client object
     :param neutron: the OpenStack neutron client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of Network objects
     """
 
-    out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Neutron::Router')
-    workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(neutron_utils.get_router_by_id,
-                                           (neutron, resource.id))
-        workers.append(worker)
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Neutron::Router', resource_index)
+    return neutron_utils.get_routers_by_ids(neutron, resource_ids)
 
-    for worker in workers:
-        router = worker.get()
-        if router:
-            out.append(router)
 
-    return out
-
-
-def get_stack_security_groups(heat_cli, neutron, stack):
+def get_stack_security_groups(heat_cli, neutron, stack, resource_index=None):
     """
     Returns a list of SecurityGroup domain objects deployed by this stack
     :param heat_cli: the OpenStack heat client object
     :param neutron: the OpenStack neutron client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of SecurityGroup objects
     """
 
-    out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Neutron::SecurityGroup')
-    workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(
-            neutron_utils.get_security_group_by_id,
-            (neutron, resource.id))
-        workers.append(worker)
-
-    for worker in workers:
-        security_group = worker.get()
-        if security_group:
-            out.append(security_group)
-
-    return out
+    return neutron_utils.get_security_groups_by_ids(
+        neutron, __get_resource_ids(
+            heat_cli, stack, 'OS::Neutron::SecurityGroup', resource_index))
 
 
-def get_stack_servers(heat_cli, nova, neutron, keystone, stack, project_name):
+def get_stack_servers(heat_cli, nova, neutron, keystone, stack, project_name,
+                      resource_index=None):
     """
-    Returns a list of VMInst domain objects associated with a Stack
+    Returns a list of VMInst domain objects associated with a Stack including
+    those of its nested stacks and resource groups
     :param heat_cli: the OpenStack heat client object
     :param nova: the OpenStack nova client object
     :param neutron: the OpenStack neutron client object
     :param keystone: the OpenStack keystone client object
     :param stack: the SNAPS-OO Stack domain object
     :param project_name: the associated project ID
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of VMInst domain objects
     """
 
     out = list()
-    srvr_res = get_resources(heat_cli, stack.id, 'OS::Nova::Server')
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Nova::Server', resource_index)
     workers = []
-    for resource in srvr_res:
-        worker = worker_pool().apply_async(
+    for resource_id in resource_ids:
+        worker = named_pool('nova').apply_async(
             nova_utils.get_server_object_by_id,
-            (nova, neutron, keystone, resource.id, project_name))
-        workers.append((resource.id, worker))
+            (nova, neutron, keystone, resource_id, project_name))
+        workers.append((resource_id, worker))
 
-    for worker in workers:
-        resource_id = worker[0]
+    for resource_id, worker in workers:
         try:
-            server = worker[1].get()
+            server = worker.get()
             if server:
                 out.append(server)
         except NotFound:
             logger.warn('VmInst cannot be located with ID %s', resource_id)
 
-    res_grps = get_resources(heat_cli, stack.id, 'OS::Heat::ResourceGroup')
-    for res_grp in res_grps:
-        res_ress = get_resources(heat_cli, res_grp.id)
-        workers = []
-        for res_res in res_ress:
-            res_res_srvrs = get_resources(
-                heat_cli, res_res.id, 'OS::Nova::Server')
-            for res_srvr in res_res_srvrs:
-                worker = worker_pool().apply_async(
-                    nova_utils.get_server_object_by_id,
-                    (nova, neutron, keystone, res_srvr.id, project_name))
-                workers.append(worker)
-
-        for worker in workers:
-            server = worker.get()
-            if server:
-                out.append(server)
-
     return out
 
 
-def get_stack_keypairs(heat_cli, nova, stack):
+def get_stack_keypairs(heat_cli, nova, stack, resource_index=None):
     """
     Returns a list of Keypair domain objects associated with a Stack
     :param heat_cli: the OpenStack heat client object
     :param nova: the OpenStack nova client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of VMInst domain objects
     """
 
     out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Nova::KeyPair')
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Nova::KeyPair', resource_index)
     workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(
-            nova_utils.get_keypair_by_id, (nova, resource.id))
-        workers.append((resource.id, worker))
+    for resource_id in resource_ids:
+        worker = named_pool('nova').apply_async(
+            nova_utils.get_keypair_by_id, (nova, resource_id))
+        workers.append((resource_id, worker))
 
-    for worker in workers:
-        resource_id = worker[0]
+    for resource_id, worker in workers:
         try:
-            keypair = worker[1].get()
+            keypair = worker.get()
             if keypair:
                 out.append(keypair)
         except NotFound:
@@ -384,56 +569,43 @@ def get_stack_keypairs(heat_cli, nova, stack):
     return out
 
 
-def get_stack_volumes(heat_cli, cinder, stack):
+def get_stack_volumes(heat_cli, cinder, stack, resource_index=None):
     """
     Returns an instance of Volume domain objects created by this stack
     :param heat_cli: the OpenStack heat client object
     :param cinder: the OpenStack cinder client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of Volume domain objects
     """
 
-    out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Cinder::Volume')
-    workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(
-            cinder_utils.get_volume_by_id, (cinder, resource.id))
-        workers.append((resource.id, worker))
-
-    for worker in workers:
-        resource_id = worker[0]
-        try:
-            server = worker[1].get()
-            if server:
-                out.append(server)
-        except NotFound:
-            logger.warn('Volume cannot be located with ID %s', resource_id)
-
-    return out
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Cinder::Volume', resource_index)
+    return cinder_utils.get_volumes_by_ids(cinder, resource_ids)
 
 
-def get_stack_volume_types(heat_cli, cinder, stack):
+def get_stack_volume_types(heat_cli, cinder, stack, resource_index=None):
     """
     Returns an instance of VolumeType domain objects created by this stack
     :param heat_cli: the OpenStack heat client object
     :param cinder: the OpenStack cinder client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of VolumeType domain objects
     """
 
     out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Cinder::VolumeType')
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Cinder::VolumeType', resource_index)
     workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(
-            cinder_utils.get_volume_type_by_id, (cinder, resource.id))
-        workers.append((resource.id, worker))
+    for resource_id in resource_ids:
+        worker = named_pool('cinder').apply_async(
+            cinder_utils.get_volume_type_by_id, (cinder, resource_id))
+        workers.append((resource_id, worker))
 
-    for worker in workers:
-        resource_id = worker[0]
+    for resource_id, worker in workers:
         try:
-            vol_type = worker[1].get()
+            vol_type = worker.get()
             if vol_type:
                 out.append(vol_type)
         except NotFound:
@@ -442,28 +614,29 @@ def get_stack_volume_types(heat_cli, cinder, stack):
     return out
 
 
-def get_stack_flavors(heat_cli, nova, stack):
+def get_stack_flavors(heat_cli, nova, stack, resource_index=None):
     """
     Returns an instance of Flavor SNAPS domain object for each flavor created
     by this stack
     :param heat_cli: the OpenStack heat client object
     :param nova: the OpenStack cinder client object
     :param stack: the SNAPS-OO Stack domain object
+    :param resource_index: the stack's get_resource_index() value (optional)
     :return: a list of Volume domain objects
     """
 
     out = list()
-    resources = get_resources(heat_cli, stack.id, 'OS::Nova::Flavor')
+    resource_ids = __get_resource_ids(
+        heat_cli, stack, 'OS::Nova::Flavor', resource_index)
     workers = []
-    for resource in resources:
-        worker = worker_pool().apply_async(
-            nova_utils.get_flavor_by_id, (nova, resource.id))
-        workers.append((resource.id, worker))
+    for resource_id in resource_ids:
+        worker = named_pool('nova').apply_async(
+            nova_utils.get_flavor_by_id, (nova, resource_id))
+        workers.append((resource_id, worker))
 
-    for worker in workers:
-        resource_id = worker[0]
+    for resource_id, worker in workers:
         try:
-            flavor = worker[1].get()
+            flavor = worker.get()
             if flavor:
                 out.append(flavor)
         except NotFound:
@@ -12,14 +12,19 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import logging
+import threading
+import time
+import weakref
 
 import keystoneauth1
 from keystoneclient.client import Client
 from keystoneauth1.identity import v3, v2
 from keystoneauth1 import session
 import requests
-from keystoneclient.exceptions import NotFound
+from keystoneclient.exceptions import NotFound, Forbidden
+from requests.adapters import HTTPAdapter
 
 from snaps.domain.project import Project, Domain
 from snaps.domain.role import Role
@@ -31,6 +36,22 @@ V2_VERSION_NUM = 2.0
 V3_VERSION_NUM = 3
 V2_VERSION_STR = 'v' + str(V2_VERSION_NUM)
 
+# The maximum number of keep-alive connections held per host by a shared
+# session
+SHARED_SESSION_POOL_SIZE = 20
+
+_shared_sessions = dict()
+_shared_session_lock = threading.Lock()
+
+# The number of seconds a project ID/name mapping remains in the cache
+PROJECT_CACHE_TTL = 300
+
+# Project caches of shared sessions keyed by their credentials and those of
+# other sessions (or clients without one) keyed by the object itself
+_project_caches = dict()
+_session_project_caches = weakref.WeakKeyDictionary()
+_project_cache_lock = threading.Lock()
+
 
 def get_session_auth(os_creds):
     """
@@ -55,10 +76,12 @@ def get_session_auth(os_creds):
     return auth
 
 
-def keystone_session(os_creds):
+def keystone_session(os_creds, pool_size=None):
     """
     Creates a keystone session used for authenticating OpenStack clients
     :param os_creds: The connection credentials to the OpenStack API
+    :param pool_size: the maximum number of keep-alive connections to hold
+                      per host (optional - requests default when None)
     :return: the client object
     """
     logger.debug('Retrieving Keystone Session')
@@ -66,8 +89,10 @@ def keystone_session(os_creds):
     auth = get_session_auth(os_creds)
 
     req_session = None
-    if os_creds.proxy_settings:
+    if os_creds.proxy_settings or pool_size:
         req_session = requests.Session()
+
+    if os_creds.proxy_settings:
         req_session.proxies = {
             'http':
                 os_creds.proxy_settings.host + ':' +
@@ -76,10 +101,81 @@ def keystone_session(os_creds):
                 os_creds.proxy_settings.https_host + ':' +
                 os_creds.proxy_settings.https_port
         }
+
+    if pool_size:
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        req_session.mount('http://', adapter)
+        req_session.mount('https://', adapter)
+
     return session.Session(auth=auth, session=req_session,
                            verify=os_creds.cacert)
 
 
+def acquire_session(os_creds):
+    """
+    Returns a keystone session that is shared by all callers using the same
+    credentials so the authentication token and the HTTP keep-alive
+    connections are reused. Each call must be paired with a call to
+    release_session() which closes the session once no longer referenced
+    :param os_creds: The connection credentials to the OpenStack API
+    :return: a keystoneauth1 session.Session object
+    """
+    key = __session_key(os_creds)
+    with _shared_session_lock:
+        shared = _shared_sessions.get(key)
+        if not shared:
+            logger.debug('Creating shared Keystone Session')
+            shared = SharedSession(keystone_session(
+                os_creds, pool_size=SHARED_SESSION_POOL_SIZE))
+            _shared_sessions[key] = shared
+        shared.ref_count += 1
+        return shared.session
+
+
+def release_session(os_session):
+    """
+    Releases a session obtained from acquire_session() and closes it when the
+    last reference has been released. Sessions not obtained from
+    acquire_session() are simply closed
+    :param os_session: a session.Session object
+    """
+    with _shared_session_lock:
+        for key, shared in _shared_sessions.items():
+            if shared.session is os_session:
+                shared.ref_count -= 1
+                if shared.ref_count > 0:
+                    return
+                logger.debug('Closing shared Keystone Session')
+                del _shared_sessions[key]
+                break
+
+    close_session(os_session)
+
+
+def __session_key(os_creds):
+    """
+    Returns the key used for storing shared sessions for a set of credentials
+    :param os_creds: the OpenStack credentials (OSCreds) object
+    :return: a hex digest string
+    """
+    proxy_values = None
+    if os_creds.proxy_settings:
+        proxy_values = (
+            os_creds.proxy_settings.host, os_creds.proxy_settings.port,
+            os_creds.proxy_settings.https_host,
+            os_creds.proxy_settings.https_port)
+
+    key_values = (
+        os_creds.username, os_creds.password, os_creds.auth_url,
+        os_creds.project_name, float(os_creds.identity_api_version),
+        os_creds.user_domain_id, os_creds.user_domain_name,
+        os_creds.project_domain_id, os_creds.project_domain_name,
+        os_creds.interface, os_creds.region_name, os_creds.cacert,
+        proxy_values)
+    return hashlib.sha256(str(key_values).encode('utf-8')).hexdigest()
+
+
 def close_session(session):
     """
     Closes a keystone session
@@ -179,6 +275,132 @@ def get_project_by_id(keystone, proj_id):
             pass
 
 
+def get_project_name_by_id(keystone, proj_id):
+    """
+    Returns the name of the project with the given ID using the project cache
+    associated with the keystone client. On a cache miss the cache is warmed
+    with a single project listing when permitted, else the project is
+    retrieved individually
+    :param keystone: the Keystone client
+    :param proj_id: the project ID
+    :return: the project name or None if not found
+    """
+    if not proj_id:
+        return None
+
+    cache = get_project_cache(keystone)
+    name = cache.get_name(proj_id)
+    if name:
+        return name
+
+    if cache.warm(keystone):
+        name = cache.get_name(proj_id)
+        if name:
+            return name
+
+    project = get_project_by_id(keystone, proj_id)
+    if project:
+        cache.put(project.id, project.name)
+        return project.name
+
+
+def get_project_id_by_name(keystone, project_name, domain_name=None):
+    """
+    Returns the ID of the project with the given name using the project cache
+    associated with the keystone client
+    :param keystone: the Keystone client
+    :param project_name: the project name
+    :param domain_name: the name of the project's domain (optional and
+                        ignored with the v2 API)
+    :return: the project ID or None if not found
+    """
+    if not project_name:
+        return None
+
+    domain_id = None
+    if domain_name and keystone.version != V2_VERSION_STR:
+        os_domain = __get_os_domain_by_name(keystone, domain_name)
+        if not os_domain:
+            return None
+        domain_id = os_domain.id
+
+    cache = get_project_cache(keystone)
+    proj_id = cache.get_id(project_name, domain_id)
+    if proj_id:
+        return proj_id
+
+    if keystone.version == V2_VERSION_STR:
+        projects = keystone.tenants.list()
+    else:
+        projects = keystone.projects.list(name=project_name, domain=domain_id)
+
+    for project in projects:
+        project_domain_id = getattr(project, 'domain_id', None)
+        if project.name == project_name and (
+                not domain_id or project_domain_id == domain_id):
+            cache.put(project.id, project.name, project_domain_id)
+            return project.id
+
+
+def get_project_cache(keystone):
+    """
+    Returns the ProjectCache object associated with the credentials of the
+    keystone client's session so different users or projects never share
+    their mappings
+    :param keystone: the Keystone client
+    :return: a ProjectCache object
+    """
+    os_session = getattr(keystone, 'session', None)
+    key = __shared_session_key(os_session)
+    if key:
+        caches = _project_caches
+    else:
+        # only the same session (or client) is known to hold the same
+        # credentials
+        caches = _session_project_caches
+        key = os_session if os_session is not None else keystone
+
+    with _project_cache_lock:
+        cache = caches.get(key)
+        if not cache:
+            cache = ProjectCache()
+            caches[key] = cache
+        return cache
+
+
+def warm_project_cache(keystone):
+    """
+    Loads all visible projects into the project cache with a single listing
+    :param keystone: the Keystone client
+    :return: True when the cache has been populated
+    """
+    return get_project_cache(keystone).warm(keystone, force=True)
+
+
+def clear_project_caches():
+    """
+    Removes all entries from all project caches
+    """
+    with _project_cache_lock:
+        _project_caches.clear()
+        _session_project_caches.clear()
+
+
+def __shared_session_key(os_session):
+    """
+    Returns the key of the credentials of a session obtained from
+    acquire_session()
+    :param os_session: a session.Session object or None
+    :return: the key or None when the session is not shared
+    """
+    if os_session is None:
+        return None
+    with _shared_session_lock:
+        for key, shared in _shared_sessions.items():
+            if shared.session is os_session:
+                return key
+
+
 def create_project(keystone, project_settings):
     """
     Creates a project
@@ -204,6 +426,8 @@ def create_project(keystone, project_settings):
         domain_id = os_project.domain_id
 
     logger.info('Created project with name - %s', project_settings.name)
+    get_project_cache(keystone).put(
+        os_project.id, os_project.name, domain_id)
     return Project(
         name=os_project.name, project_id=os_project.id, domain_id=domain_id)
 
@@ -219,6 +443,7 @@ def delete_project(keystone, project):
         keystone.tenants.delete(project.id)
     else:
         keystone.projects.delete(project.id)
+    get_project_cache(keystone).remove(project.id)
 
 
 def __get_os_user(keystone, user):
@@ -427,6 +652,141 @@ def __get_os_domain_by_name(keystone, domain_name):
             return domain
 
 
+class SharedSession:
+    """
+    Holds a keystone session shared between creators along with the number
+    of outstanding references
+    """
+
+    def __init__(self, os_session):
+        """
+        Constructor
+        :param os_session: the keystoneauth1 session.Session object
+        """
+        self.session = os_session
+        self.ref_count = 0
+
+
+class ProjectCache:
+    """
+    Thread-safe bidirectional cache of project IDs and names where each entry
+    expires after a configurable number of seconds
+    """
+
+    def __init__(self, ttl=PROJECT_CACHE_TTL):
+        """
+        Constructor
+        :param ttl: the number of seconds an entry remains valid
+        """
+        self.ttl = ttl
+        self.__lock = threading.Lock()
+        self.__names_by_id = dict()
+        # name -> dict of domain ID -> (project ID, expiry)
+        self.__ids_by_name = dict()
+        self.__warm_expiry = 0
+        self.__listing_denied = False
+
+    def put(self, proj_id, name, domain_id=None):
+        """
+        Adds or refreshes a project mapping
+        :param proj_id: the project ID
+        :param name: the project name
+        :param domain_id: the ID of the project's domain (optional)
+        """
+        expiry = time.time() + self.ttl
+        with self.__lock:
+            self.__names_by_id[proj_id] = (name, expiry, domain_id)
+            self.__ids_by_name.setdefault(name, dict())[domain_id] = (
+                proj_id, expiry)
+
+    def remove(self, proj_id):
+        """
+        Removes a project mapping
+        :param proj_id: the project ID
+        """
+        with self.__lock:
+            entry = self.__names_by_id.pop(proj_id, None)
+            if entry:
+                domains = self.__ids_by_name.get(entry[0], dict())
+                domains.pop(entry[2], None)
+                if not domains:
+                    self.__ids_by_name.pop(entry[0], None)
+
+    def get_name(self, proj_id):
+        """
+        Returns the cached name of a project
+        :param proj_id: the project ID
+        :return: the name or None when not cached or expired
+        """
+        with self.__lock:
+            return self.__get_valid(self.__names_by_id, proj_id)
+
+    def get_id(self, name, domain_id=None):
+        """
+        Returns the cached ID of a project
+        :param name: the project name
+        :param domain_id: the ID of the project's domain. When None, the ID
+                          is only returned when a single domain holds a
+                          project with the name
+        :return: the ID or None when not cached, expired or ambiguous
+        """
+        with self.__lock:
+            domains = self.__ids_by_name.get(name, dict())
+            if domain_id:
+                return self.__get_valid(domains, domain_id)
+            proj_ids = set(self.__get_valid(domains, key)
+                           for key in list(domains.keys()))
+            proj_ids.discard(None)
+            if len(proj_ids) == 1:
+                return proj_ids.pop()
+
+    def warm(self, keystone, force=False):
+        """
+        Populates the cache with a single listing of all visible projects.
+        The listing is skipped when the cache has been warmed within the TTL
+        or the credentials are not permitted to list projects
+        :param keystone: the Keystone client
+        :param force: when True, the listing is performed even when the cache
+                      has been recently warmed
+        :return: True when a listing has been performed
+        """
+        with self.__lock:
+            if self.__listing_denied:
+                return False
+            if not force and self.__warm_expiry > time.time():
+                return False
+            self.__warm_expiry = time.time() + self.ttl
+
+        try:
+            if keystone.version == V2_VERSION_STR:
+                projects = keystone.tenants.list()
+            else:
+                projects = keystone.projects.list()
+        except Forbidden as e:
+            logger.debug('Unable to list projects for the cache - %s', e)
+            with self.__lock:
+                self.__listing_denied = True
+            return False
+
+        for project in projects:
+            self.put(project.id, project.name,
+                     getattr(project, 'domain_id', None))
+        return True
+
+    def __get_valid(self, entries, key):
+        """
+        Returns the value of an unexpired entry and evicts it when expired
+        :param entries: the dict holding the entries
+        :param key: the entry key
+        :return: the value or None
+        """
+        entry = entries.get(key)
+        if entry:
+            if entry[1] > time.time():
+                return entry[0]
+            del entries[key]
+
+
 class KeystoneException(Exception):
     """
     Exception when calls to the Keystone client cannot be served properly
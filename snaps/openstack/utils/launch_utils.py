@@ -24,7 +24,7 @@ import os
 import time
 from keystoneauth1.exceptions import Unauthorized
 
-from snaps import file_utils
+from snaps import file_utils, thread_utils
 from snaps.config.flavor import FlavorConfig
 from snaps.config.image import ImageConfig
 from snaps.config.keypair import KeypairConfig
@@ -39,6 +39,7 @@ from snaps.config.volume import VolumeConfig
 from snaps.config.volume_type import VolumeTypeConfig
 from snaps.openstack.create_flavor import OpenStackFlavor
 from snaps.openstack.create_image import OpenStackImage
+from snaps.openstack.create_instance import OpenStackVmInstanceGroup
 from snaps.openstack.create_keypairs import OpenStackKeypair
 from snaps.openstack.create_network import OpenStackNetwork
 from snaps.openstack.create_project import OpenStackProject
@@ -49,7 +50,8 @@ from snaps.openstack.create_user import OpenStackUser
 from snaps.openstack.create_volume import OpenStackVolume
 from snaps.openstack.create_volume_type import OpenStackVolumeType
 from snaps.openstack.os_credentials import OSCreds, ProxySettings
-from snaps.openstack.utils import deploy_utils, neutron_utils, keystone_utils
+from snaps.openstack.utils import (
+    deploy_utils, neutron_utils, keystone_utils, readiness_utils)
 from snaps.openstack.utils.nova_utils import RebootType
 from snaps.provisioning import ansible_utils
 
@@ -59,9 +61,36 @@ warn('This utility will be removed in a subsequent release',
 
 logger = logging.getLogger('lanuch_utils')
 DEFAULT_CREDS_KEY = 'admin'
-
-
-def launch_config(config, tmplt_file, deploy, clean, clean_image):
+DEFAULT_LAUNCH_WORKERS = 10
+DEFAULT_ANSIBLE_WORKERS = 5
+
+# Tuples of (section, config_key, creator_class, config_class) for the
+# identity objects that must exist prior to launching any other object
+IDENTITY_SECTIONS = [
+    ('projects', 'project', OpenStackProject, ProjectConfig),
+    ('users', 'user', OpenStackUser, UserConfig),
+]
+
+# Tuples of (section, config_key, creator_class, config_class) for all other
+# objects where VM instances have no creator/config classes as these are
+# launched via deploy_utils
+RESOURCE_SECTIONS = [
+    ('flavors', 'flavor', OpenStackFlavor, FlavorConfig),
+    ('qos_specs', 'qos_spec', OpenStackQoS, QoSConfig),
+    ('volume_types', 'volume_type', OpenStackVolumeType, VolumeTypeConfig),
+    ('volumes', 'volume', OpenStackVolume, VolumeConfig),
+    ('images', 'image', OpenStackImage, ImageConfig),
+    ('networks', 'network', OpenStackNetwork, NetworkConfig),
+    ('routers', 'router', OpenStackRouter, RouterConfig),
+    ('keypairs', 'keypair', OpenStackKeypair, KeypairConfig),
+    ('security_groups', 'security_group', OpenStackSecurityGroup,
+     SecurityGroupConfig),
+    ('instances', 'instance', None, None),
+]
+
+
+def launch_config(config, tmplt_file, deploy, clean, clean_image,
+                  max_workers=DEFAULT_LAUNCH_WORKERS):
     """
     Launches all objects and applies any configured ansible playbooks
     :param config: the environment configuration dict object
@@ -69,10 +98,12 @@ def launch_config(config, tmplt_file, deploy, clean, clean_image):
     :param deploy: when True deploy
     :param clean: when True clean
     :param clean_image: when True clean the image when clean is True
+    :param max_workers: the maximum number of OpenStack objects to create or
+                        clean at once
     """
     os_config = config.get('openstack')
 
-    creators = list()
+    creator_graphs = list()
     vm_dict = dict()
     images_dict = dict()
     flavors_dict = dict()
@@ -83,17 +114,13 @@ def launch_config(config, tmplt_file, deploy, clean, clean_image):
     if os_config:
         os_creds_dict = __get_creds_dict(os_config)
 
-        # Create projects
-        projects_dict = __create_instances(
-            os_creds_dict, OpenStackProject, ProjectConfig,
-            os_config.get('projects'), 'project', clean)
-        creators.append(projects_dict)
-
-        # Create users
-        users_dict = __create_instances(
-            os_creds_dict, OpenStackUser, UserConfig,
-            os_config.get('users'), 'user', clean)
-        creators.append(users_dict)
+        # Create projects and users
+        identity_graph = __launch_graph(
+            os_creds_dict, os_config, IDENTITY_SECTIONS, dict(), clean,
+            max_workers)
+        creator_graphs.append(identity_graph)
+        projects_dict = identity_graph.creators['project']
+        users_dict = identity_graph.creators['user']
 
         # Associate new users to projects
         if not clean:
@@ -105,84 +132,93 @@ def launch_config(config, tmplt_file, deploy, clean, clean_image):
                         project_creator.assoc_user(
                             user_creator.get_user())
 
-        # Create flavors
-        flavors_dict = __create_instances(
-            os_creds_dict, OpenStackFlavor, FlavorConfig,
-            os_config.get('flavors'), 'flavor', clean, users_dict)
-        creators.append(flavors_dict)
-
-        # Create QoS specs
-        qos_dict = __create_instances(
-            os_creds_dict, OpenStackQoS, QoSConfig,
-            os_config.get('qos_specs'), 'qos_spec', clean, users_dict)
-        creators.append(qos_dict)
-
-        # Create volume types
-        vol_type_dict = __create_instances(
-            os_creds_dict, OpenStackVolumeType, VolumeTypeConfig,
-            os_config.get('volume_types'), 'volume_type', clean,
-            users_dict)
-        creators.append(vol_type_dict)
-
-        # Create volumes
-        vol_dict = __create_instances(
-            os_creds_dict, OpenStackVolume, VolumeConfig,
-            os_config.get('volumes'), 'volume', clean, users_dict)
-        creators.append(vol_dict)
-
-        # Create images
-        images_dict = __create_instances(
-            os_creds_dict, OpenStackImage, ImageConfig,
-            os_config.get('images'), 'image', clean, users_dict)
-        creators.append(images_dict)
-
-        # Create networks
-        networks_dict = __create_instances(
-            os_creds_dict, OpenStackNetwork, NetworkConfig,
-            os_config.get('networks'), 'network', clean, users_dict)
-        creators.append(networks_dict)
-
-        # Create routers
-        routers_dict = __create_instances(
-            os_creds_dict, OpenStackRouter, RouterConfig,
-            os_config.get('routers'), 'router', clean, users_dict)
-        creators.append(routers_dict)
-
-        # Create keypairs
-        keypairs_dict = __create_instances(
-            os_creds_dict, OpenStackKeypair, KeypairConfig,
-            os_config.get('keypairs'), 'keypair', clean, users_dict)
-        creators.append(keypairs_dict)
-
-        # Create security groups
-        creators.append(__create_instances(
-            os_creds_dict, OpenStackSecurityGroup,
-            SecurityGroupConfig,
-            os_config.get('security_groups'), 'security_group', clean,
-            users_dict))
-
-        # Create instance
-        vm_dict = __create_vm_instances(
-            os_creds_dict, users_dict, os_config.get('instances'),
-            images_dict, keypairs_dict, clean)
-        creators.append(vm_dict)
+        # Create all other objects as their dependencies become available
+        resource_graph = __launch_graph(
+            os_creds_dict, os_config, RESOURCE_SECTIONS, users_dict, clean,
+            max_workers)
+        creator_graphs.append(resource_graph)
+        flavors_dict = resource_graph.creators['flavor']
+        images_dict = resource_graph.creators['image']
+        networks_dict = resource_graph.creators['network']
+        routers_dict = resource_graph.creators['router']
+        vm_dict = resource_graph.creators['instance']
         logger.info(
             'Completed creating/retrieving all configured instances')
 
     # Must enter either block
     if clean:
         # Cleanup Environment
-        __cleanup(creators, clean_image)
+        __cleanup(creator_graphs, clean_image, max_workers)
     elif deploy:
         # Provision VMs
         ansible_config = config.get('ansible')
         if ansible_config and vm_dict:
             if not __apply_ansible_playbooks(
                     ansible_config, os_creds_dict, vm_dict, images_dict,
-                    flavors_dict, networks_dict, routers_dict, tmplt_file):
+                    flavors_dict, networks_dict, routers_dict, tmplt_file,
+                    config.get('ansible_executor')):
                 logger.error("Problem applying ansible playbooks")
 
 
+def __launch_graph(os_creds_dict, os_config, sections, os_users_dict,
+                   cleanup, max_workers):
+    """
+    Creates or initializes the creators for the configured objects of the
+    given sections where independent objects are processed concurrently
+    :param os_creds_dict: Dictionary of OSCreds objects where the key is the
+                          name
+    :param os_config: the 'openstack' configuration dict
+    :param sections: list of tuples (section, config_key, creator_class,
+                     config_class) to process
+    :param os_users_dict: Dictionary of OpenStackUser objects where the key is
+                          the username
+    :param cleanup: Denotes whether or not this is being called for cleanup
+    :param max_workers: the maximum number of objects to process at once
+    :return: a CreatorGraph object
+    """
+    graph = CreatorGraph()
+    for section, config_key, creator_class, config_class in sections:
+        graph.creators[config_key] = dict()
+        for config_dict in os_config.get(section) or list():
+            inst_config = config_dict.get(config_key)
+            if not inst_config:
+                if config_key == 'instance':
+                    raise Exception('Instance configuration is None. Cannot '
+                                    'instantiate')
+                continue
+            graph.add_node(config_key, inst_config, creator_class,
+                           config_class)
+
+    def launch_node(node):
+        config_key, name = node
+        inst_config, creator_class, config_class = graph.node_configs[node]
+        if config_key == 'instance':
+            creator = __create_vm_instance(
+                os_creds_dict, os_users_dict, inst_config,
+                graph.creators['image'], graph.creators['keypair'], cleanup)
+        else:
+            creator = __create_instance(
+                os_creds_dict, creator_class, config_class, inst_config,
+                cleanup, os_users_dict)
+        if isinstance(creator, OpenStackVmInstanceGroup):
+            graph.groups[node] = creator
+            for member in creator.creators:
+                graph.creators[config_key][
+                    member.instance_settings.name] = member
+        elif creator:
+            graph.creators[config_key][name] = creator
+
+    thread_utils.execute_graph(
+        __get_graph_dependencies(graph), launch_node,
+        max_workers=max_workers)
+
+    for section, config_key, creator_class, config_class in sections:
+        if os_config.get(section):
+            logger.info('Initialized configured %ss', config_key)
+
+    return graph
+
+
 def __get_creds_dict(os_conn_config):
     """
     Returns a dict of OSCreds where the key is the creds name.
@@ -278,113 +314,93 @@ def __parse_ports_config(config):
     return out
 
 
-def __create_instances(os_creds_dict, creator_class, config_class, config,
-                       config_key, cleanup=False, os_users_dict=None):
+def __create_instance(os_creds_dict, creator_class, config_class,
+                      inst_config, cleanup=False, os_users_dict=None):
     """
-    Returns a dictionary of SNAPS creator objects where the key is the name
+    Returns a SNAPS creator object for a single configuration
     :param os_creds_dict: Dictionary of OSCreds objects where the key is the
                           name
-    :param config: The list of configurations for the same type
-    :param config_key: The list of configurations for the same type
+    :param creator_class: the creator class to instantiate
+    :param config_class: the configuration class to instantiate
+    :param inst_config: the configuration dict of the object
     :param cleanup: Denotes whether or not this is being called for cleanup
-    :return: dictionary
+    :param os_users_dict: Dictionary of OpenStackUser objects where the key is
+                          the username
+    :return: the creator or None when no credentials are available
     """
-    out = {}
-
-    if config:
-        for config_dict in config:
-            inst_config = config_dict.get(config_key)
-            if inst_config:
-                creds = __get_creds(os_creds_dict, os_users_dict, inst_config)
-                if creds:
-                    creator = creator_class(
-                        creds,
-                        config_class(**inst_config))
-
-                    if creator:
-                        if cleanup:
-                            try:
-                                creator.initialize()
-                            except Unauthorized as e:
-                                logger.warn(
-                                    'Unable to initialize creator [%s] - %s',
-                                    creator, e)
-                        else:
-                            creator.create()
-
-                        out[inst_config['name']] = creator
-                    else:
-                        raise Exception('Unable to instantiate creator')
-
-        logger.info('Initialized configured %ss', config_key)
-
-    return out
+    creds = __get_creds(os_creds_dict, os_users_dict, inst_config)
+    if creds:
+        creator = creator_class(creds, config_class(**inst_config))
+
+        if creator:
+            if cleanup:
+                try:
+                    creator.initialize()
+                except Unauthorized as e:
+                    logger.warn(
+                        'Unable to initialize creator [%s] - %s', creator, e)
+            else:
+                creator.create()
+            return creator
+        else:
+            raise Exception('Unable to instantiate creator')
 
 
-def __create_vm_instances(os_creds_dict, os_users_dict, instances_config,
-                          image_dict, keypairs_dict, cleanup=False):
+def __create_vm_instance(os_creds_dict, os_users_dict, conf, image_dict,
+                         keypairs_dict, cleanup=False):
     """
-    Returns a dictionary of OpenStackVmInstance objects where the key is the
-    instance name
+    Returns an OpenStackVmInstance object for a single VM configuration or an
+    OpenStackVmInstanceGroup object when its count is greater than one
     :param os_creds_dict: Dictionary of OSCreds objects where the key is the
                           name
     :param os_users_dict: Dictionary of OpenStackUser objects where the key is
                           the username
-    :param instances_config: The list of VM instance configurations
+    :param conf: The VM instance configuration dict
     :param image_dict: A dictionary of images that will probably be used to
                        instantiate the VM instance
     :param keypairs_dict: A dictionary of keypairs that will probably be used
                           to instantiate the VM instance
     :param cleanup: Denotes whether or not this is being called for cleanup
-    :return: dictionary
-    """
-    vm_dict = {}
-
-    if instances_config:
-        for instance_config in instances_config:
-            conf = instance_config.get('instance')
-            if conf:
-                if image_dict:
-                    image_creator = image_dict.get(conf.get('imageName'))
-                    if image_creator:
-                        instance_settings = VmInstanceConfig(
-                            **instance_config['instance'])
-                        kp_creator = keypairs_dict.get(
-                            conf.get('keypair_name'))
-
-                        try:
-                            vm_dict[conf[
-                                'name']] = deploy_utils.create_vm_instance(
-                                __get_creds(
-                                    os_creds_dict, os_users_dict, conf),
-                                instance_settings,
-                                image_creator.image_settings,
-                                keypair_creator=kp_creator,
-                                init_only=cleanup)
-                        except Unauthorized as e:
-                            if not cleanup:
-                                logger.warn('Unable to initialize VM - %s', e)
-                                raise
-                    else:
-                        raise Exception('Image creator instance not found.'
-                                        ' Cannot instantiate')
-                else:
-                    if not cleanup:
-                        raise Exception('Image dictionary is None. Cannot '
-                                        'instantiate')
-            else:
-                raise Exception('Instance configuration is None. Cannot '
-                                'instantiate')
-        logger.info('Created configured instances')
+    :return: the creator or None
+    """
+    if image_dict:
+        image_creator = image_dict.get(conf.get('imageName'))
+        if image_creator:
+            instance_settings = VmInstanceConfig(**conf)
+            kp_creator = keypairs_dict.get(conf.get('keypair_name'))
+            create_function = deploy_utils.create_vm_instance
+            if instance_settings.count > 1:
+                create_function = deploy_utils.create_vm_instance_group
 
-    return vm_dict
+            try:
+                return create_function(
+                    __get_creds(os_creds_dict, os_users_dict, conf),
+                    instance_settings,
+                    image_creator.image_settings,
+                    keypair_creator=kp_creator,
+                    init_only=cleanup)
+            except Unauthorized as e:
+                if not cleanup:
+                    logger.warn('Unable to initialize VM - %s', e)
+                    raise
+        else:
+            raise Exception('Image creator instance not found.'
+                            ' Cannot instantiate')
+    else:
+        if not cleanup:
+            raise Exception('Image dictionary is None. Cannot '
+                            'instantiate')
 
 
 def __apply_ansible_playbooks(ansible_configs, os_creds_dict, vm_dict,
                               image_dict, flavor_dict, networks_dict,
-                              routers_dict, tmplt_file):
+                              routers_dict, tmplt_file, executor_config=None):
     """
-    Applies ansible playbooks to running VMs with floating IPs
+    Applies ansible playbooks to running VMs with floating IPs. Entries are
+    applied in the configured order to the VMs they share. When the executor
+    configuration's max_parallel is greater than 1, the readiness waits and
+    post processing of entries with no VMs in common overlap while their
+    playbooks are still applied one at a time
     :param ansible_configs: a list of Ansible configurations
     :param os_creds_dict: Dictionary of OSCreds objects where the key is the
                           name
@@ -401,41 +417,97 @@ def __apply_ansible_playbooks(ansible_configs, os_creds_dict, vm_dict,
     :param tmplt_file: the path of the SNAPS-OO template file for setting the
                        CWD so playbook location is relative to the deployment
                        file
+    :param executor_config: the 'ansible_executor' configuration dict
+                            (optional)
     :return: t/f - true if successful
     """
     logger.info("Applying Ansible Playbooks")
-    if ansible_configs:
-        # Set CWD so the deployment file's playbook location can leverage
-        # relative paths
-        orig_cwd = os.getcwd()
-        env_dir = os.path.dirname(tmplt_file)
-        os.chdir(env_dir)
-
-        # Apply playbooks
-        for ansible_config in ansible_configs:
-            # Ensure all hosts are accepting SSH session requests
-            for vm_name in ansible_config['hosts']:
-                vm_inst = vm_dict.get(vm_name)
-                if vm_inst:
-                    if not vm_inst.vm_ssh_active(block=True):
-                        logger.warning(
-                            'Timeout waiting for instance to respond to '
-                            'SSH requests')
-                        return False
-
-            __apply_ansible_playbook(
-                ansible_config, os_creds_dict, vm_dict, image_dict,
-                flavor_dict, networks_dict, routers_dict)
-
+    if not ansible_configs:
+        return True
+
+    if not executor_config:
+        executor_config = dict()
+    executor = ansible_utils.ProvisioningExecutor(
+        forks=executor_config.get('forks', ansible_utils.DEFAULT_FORKS),
+        strategy=executor_config.get('strategy'),
+        pipelining=executor_config.get('pipelining', False),
+        control_persist=executor_config.get('control_persist'),
+        timeout=executor_config.get(
+            'timeout', ansible_utils.DEFAULT_TIMEOUT))
+    max_parallel = executor_config.get(
+        'max_parallel', DEFAULT_ANSIBLE_WORKERS)
+    failed = list()
+
+    def apply_node(index):
+        if failed:
+            return False
+
+        ansible_config = ansible_configs[index]
+        # Ensure all hosts are accepting SSH session requests and have
+        # completed cloud-init, checking them concurrently
+        vm_insts = [vm_dict[vm_name] for vm_name in ansible_config['hosts']
+                    if vm_dict.get(vm_name)]
+        for result in readiness_utils.wait_for_vms(vm_insts):
+            if result.failed_stage == readiness_utils.STAGE_CLOUD_INIT:
+                raise Exception(
+                    'Cannot apply playbooks as cloud-init has not completed')
+            if not result.ready:
+                logger.warning(
+                    'Timeout waiting for instance %s to respond to SSH '
+                    'requests', result.name)
+                failed.append(index)
+                return False
+            logger.info('VM %s ready - %s', result.name, ', '.join(
+                '{} {:.1f}s'.format(stage, seconds)
+                for stage, seconds in result.timings.items()))
+
+        __apply_ansible_playbook(
+            ansible_config, os_creds_dict, vm_dict, image_dict, flavor_dict,
+            networks_dict, routers_dict, executor)
+        return True
+
+    # Set CWD so the deployment file's playbook location can leverage
+    # relative paths
+    orig_cwd = os.getcwd()
+    env_dir = os.path.dirname(tmplt_file)
+    os.chdir(env_dir)
+    try:
+        results = thread_utils.execute_graph(
+            get_ansible_dependencies(ansible_configs), apply_node,
+            max_workers=max_parallel)
+    finally:
         # Return to original directory
         os.chdir(orig_cwd)
+        executor.clean()
+
+    return all(results.values())
+
+
+def get_ansible_dependencies(ansible_configs):
+    """
+    Returns the dependency graph of the Ansible configurations where an entry
+    depends upon each prior entry provisioning or rebooting any of its VMs
+    :param ansible_configs: a list of Ansible configurations
+    :return: dict where the key is the entry's index and the value is the set
+             of indices on which it depends
+    """
+    vm_names = list()
+    for ansible_config in ansible_configs:
+        names = set(ansible_config.get('hosts') or list())
+        post_proc_config = ansible_config.get('post_processing') or dict()
+        names.update(post_proc_config.get('reboot') or list())
+        vm_names.append(names)
 
-    return True
+    dependencies = dict()
+    for index, names in enumerate(vm_names):
+        dependencies[index] = set(
+            prior for prior in range(index) if names & vm_names[prior])
+    return dependencies
 
 
 def __apply_ansible_playbook(ansible_config, os_creds_dict, vm_dict,
                              image_dict, flavor_dict, networks_dict,
-                             routers_dict):
+                             routers_dict, executor=None):
     """
     Applies an Ansible configuration setting
     :param ansible_config: the configuration settings
@@ -450,29 +522,28 @@ def __apply_ansible_playbook(ansible_config, os_creds_dict, vm_dict,
                           the name is the key
     :param routers_dict: the dictionary of newly instantiated routers where
                           the name is the key
+    :param executor: the ansible_utils.ProvisioningExecutor with which to
+                     apply the playbook (optional)
     """
     if ansible_config:
         (remote_user, floating_ips, private_key_filepath,
          proxy_settings) = __get_connection_info(
             ansible_config, vm_dict)
         if floating_ips:
-            for key, vm_creator in vm_dict.items():
-                fip = vm_creator.get_floating_ip()
-                if fip and fip.ip in floating_ips:
-                    if not vm_creator.cloud_init_complete(block=True):
-                        raise Exception(
-                            'Cannot apply playbooks as cloud-init has not '
-                            'completed')
-
             variables = __get_variables(
                 ansible_config.get('variables'), os_creds_dict, vm_dict,
                 image_dict, flavor_dict, networks_dict, routers_dict)
 
-            ansible_utils.apply_playbook(
-                ansible_config['playbook_location'], floating_ips, remote_user,
-                ssh_priv_key_file_path=private_key_filepath,
-                variables=variables,
-                proxy_setting=proxy_settings)
+            if executor:
+                executor.apply_playbook(
+                    ansible_config['playbook_location'], floating_ips,
+                    remote_user, ssh_priv_key_file_path=private_key_filepath,
+                    variables=variables, proxy_setting=proxy_settings)
+            else:
+                ansible_utils.apply_playbook(
+                    ansible_config['playbook_location'], floating_ips,
+                    remote_user, ssh_priv_key_file_path=private_key_filepath,
+                    variables=variables, proxy_setting=proxy_settings)
 
             if 'post_processing' in ansible_config:
                 post_proc_config = ansible_config['post_processing']
@@ -875,15 +946,178 @@ def __create_yaml(var_config_values, vm_dict):
         return out_file.name
 
 
-def __cleanup(creators, clean_image=False):
+def __cleanup(creator_graphs, clean_image=False,
+              max_workers=DEFAULT_LAUNCH_WORKERS):
     """
-    Cleans up environment
-    :param creators: the list of creators by type
+    Cleans up environment by cleaning each graph of creators in reverse where
+    objects without remaining dependents are cleaned concurrently
+    :param creator_graphs: the list of CreatorGraph objects
     :param clean_image: when true
+    :param max_workers: the maximum number of objects to clean at once
     :return:
     """
-    for creator_dict in reversed(creators):
-        for key, creator in creator_dict.items():
-            if ((isinstance(creator, OpenStackImage) and clean_image)
-                    or not isinstance(creator, OpenStackImage)):
+    for graph in reversed(creator_graphs):
+        def clean_node(node):
+            config_key, name = node
+            creator = (graph.groups.get(node) or
+                       graph.creators[config_key].get(name))
+            if creator and (clean_image or
+                            not isinstance(creator, OpenStackImage)):
                 creator.clean()
+
+        thread_utils.execute_graph(
+            __get_graph_dependencies(graph), clean_node,
+            max_workers=max_workers, reverse=True)
+
+
+class CreatorGraph:
+    """
+    Holds the configured objects of a launch as graph nodes keyed by the
+    tuple (config_key, name) along with the creators that have been launched.
+    The members of VM instance groups are held in creators under their own
+    names while groups holds each node's OpenStackVmInstanceGroup
+    """
+
+    def __init__(self):
+        self.node_configs = dict()
+        self.creators = dict()
+        self.groups = dict()
+
+    def add_node(self, config_key, inst_config, creator_class=None,
+                 config_class=None):
+        """
+        Adds a configured object to the graph
+        :param config_key: the configuration key (i.e. 'network')
+        :param inst_config: the object's configuration dict
+        :param creator_class: the creator class to instantiate
+        :param config_class: the configuration class to instantiate
+        """
+        self.node_configs[(config_key, inst_config['name'])] = (
+            inst_config, creator_class, config_class)
+
+
+def __get_graph_dependencies(graph):
+    """
+    Returns the dependencies between the configured objects of a graph
+    :param graph: the CreatorGraph object
+    :return: a dict where the key is the node and the value is the set of
+             nodes on which it depends
+    """
+    subnet_networks = dict()
+    for (config_key, name), node_config in graph.node_configs.items():
+        if config_key == 'network':
+            for subnet_config in __get_list(
+                    node_config[0], 'subnets', 'subnet_settings'):
+                if isinstance(subnet_config, dict):
+                    subnet_config = subnet_config.get('subnet', subnet_config)
+                    subnet_networks[subnet_config.get('name')] = name
+
+    out = dict()
+    for node, node_config in graph.node_configs.items():
+        out[node] = __get_config_dependencies(
+            node[0], node_config[0], subnet_networks)
+
+    # Routers may reserve fixed IPs on the networks to which they attach so
+    # VM ports must only be created on these networks after the routers
+    router_deps = [(node, deps) for node, deps in out.items()
+                   if node[0] == 'router']
+    for node, deps in out.items():
+        if node[0] == 'instance':
+            for router_node, net_deps in router_deps:
+                if deps & net_deps:
+                    deps.add(router_node)
+    return out
+
+
+def __get_config_dependencies(config_key, inst_config, subnet_networks):
+    """
+    Returns the objects an object's configuration depends upon
+    :param config_key: the configuration key (i.e. 'network')
+    :param inst_config: the object's configuration dict
+    :param subnet_networks: dict of network names where the key is the name of
+                            one of the network's subnets
+    :return: a set of tuples (config_key, name)
+    """
+    deps = set()
+    if config_key == 'user':
+        if inst_config.get('project_name'):
+            deps.add(('project', inst_config['project_name']))
+        for project_name in (inst_config.get('roles') or dict()).values():
+            deps.add(('project', project_name))
+    elif config_key == 'volume_type':
+        if inst_config.get('qos_spec_name'):
+            deps.add(('qos_spec', inst_config['qos_spec_name']))
+    elif config_key == 'volume':
+        if inst_config.get('type_name'):
+            deps.add(('volume_type', inst_config['type_name']))
+        if inst_config.get('image_name'):
+            deps.add(('image', inst_config['image_name']))
+    elif config_key == 'router':
+        if inst_config.get('external_gateway'):
+            deps.add(('network', inst_config['external_gateway']))
+        for subnet in inst_config.get('internal_subnets') or list():
+            if isinstance(subnet, dict):
+                network_name = subnet.get('subnet', subnet).get(
+                    'network_name')
+            else:
+                network_name = subnet_networks.get(subnet)
+            if network_name:
+                deps.add(('network', network_name))
+        for port in __get_list(inst_config, 'interfaces', 'port_settings'):
+            deps.update(__get_port_dependencies(port))
+    elif config_key == 'security_group':
+        for rule in __get_list(inst_config, 'rules', 'rule_settings'):
+            if isinstance(rule, dict) and rule.get('remote_group_id'):
+                deps.add(('security_group', rule['remote_group_id']))
+    elif config_key == 'instance':
+        if inst_config.get('imageName'):
+            deps.add(('image', inst_config['imageName']))
+        if inst_config.get('keypair_name'):
+            deps.add(('keypair', inst_config['keypair_name']))
+        if inst_config.get('flavor'):
+            deps.add(('flavor', inst_config['flavor']))
+        for port in __get_list(inst_config, 'ports', 'port_settings'):
+            deps.update(__get_port_dependencies(port))
+        sec_grp_names = inst_config.get('security_group_names') or list()
+        if isinstance(sec_grp_names, str):
+            sec_grp_names = [sec_grp_names]
+        for sec_grp_name in sec_grp_names:
+            deps.add(('security_group', sec_grp_name))
+        for fip in __get_list(inst_config, 'floating_ips',
+                              'floating_ip_settings'):
+            if isinstance(fip, dict):
+                fip = fip.get('floating_ip', fip)
+                if fip.get('router_name'):
+                    deps.add(('router', fip['router_name']))
+        for volume_name in inst_config.get('volume_names') or list():
+            deps.add(('volume', volume_name))
+    return deps
+
+
+def __get_port_dependencies(port):
+    """
+    Returns the objects a port configuration depends upon
+    :param port: the port configuration dict or PortConfig object
+    :return: a set of tuples (config_key, name)
+    """
+    deps = set()
+    if isinstance(port, dict):
+        port = port.get('port', port)
+        if port.get('network_name'):
+            deps.add(('network', port['network_name']))
+        for sec_grp_name in port.get('security_groups') or list():
+            deps.add(('security_group', sec_grp_name))
+    elif isinstance(port, PortConfig):
+        deps.add(('network', port.network_name))
+    return deps
+
+
+def __get_list(inst_config, key, alt_key):
+    """
+    Returns the list value of a configuration with an alternate key
+    :param inst_config: the configuration dict
+    :param key: the primary key
+    :param alt_key: the key to use when the primary is not set
+    :return: a list
+    """
+    return inst_config.get(key) or inst_config.get(alt_key) or list()
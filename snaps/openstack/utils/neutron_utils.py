@@ -22,12 +22,15 @@ from snaps.domain.network import (
     Network)
 from snaps.domain.project import NetworkQuotas
 from snaps.domain.vm_inst import FloatingIp
-from snaps.openstack.utils import keystone_utils
+from snaps.openstack.utils import keystone_utils, resource_cache
 
 __author__ = 'spisarski'
 
 logger = logging.getLogger('neutron_utils')
 
+# Maximum number of IDs in a single filtered query to bound the URL length
+ID_FILTER_CHUNK_SIZE = 100
+
 """
 Utilities for basic neutron API calls
 """
@@ -48,6 +51,7 @@ def neutron_client(os_creds, session=None):
                   region_name=os_creds.region_name)
 
 
+@resource_cache.invalidates('network', 'subnet')
 def create_network(neutron, os_creds, network_settings):
     """
     Creates a network for OpenStack
@@ -65,26 +69,63 @@ def create_network(neutron, os_creds, network_settings):
     if os_network:
         network = get_network_by_id(neutron, os_network['network']['id'])
 
-        subnets = list()
-        for subnet_settings in network_settings.subnet_settings:
-            try:
-                subnets.append(
-                    create_subnet(neutron, subnet_settings, os_creds, network))
-            except:
-                logger.error(
-                    'Unexpected error creating subnet [%s]  for network [%s]',
-                    subnet_settings.name, network.name)
-
-                for subnet in subnets:
-                    delete_subnet(neutron, subnet)
-
-                delete_network(neutron, network)
-
-                raise
+        try:
+            create_subnets_bulk(neutron, os_creds, [
+                (subnet_settings, network)
+                for subnet_settings in network_settings.subnet_settings])
+        except:
+            logger.error(
+                'Unexpected error creating subnets %s for network [%s]',
+                [subnet_settings.name for subnet_settings
+                 in network_settings.subnet_settings], network.name)
+            delete_network(neutron, network)
+            raise
 
         return get_network_by_id(neutron, network.id)
 
 
+@resource_cache.invalidates('network', 'subnet')
+def create_networks_bulk(neutron, os_creds, network_settings_list):
+    """
+    Creates a collection of networks along with their subnets using one
+    request for all of the networks and another for all of the subnets. The
+    networks are removed when their subnets cannot be created
+    :param neutron: the client
+    :param os_creds: the OpenStack credentials
+    :param network_settings_list: a list of NetworkConfig objects
+    :return: a list of SNAPS-OO Network domain objects in the same order
+    """
+    if not network_settings_list:
+        return list()
+
+    logger.info('Creating networks with names %s', [
+        network_settings.name for network_settings in network_settings_list])
+    json_body = {'networks': [
+        network_settings.dict_for_neutron(os_creds)['network']
+        for network_settings in network_settings_list]}
+    os_networks = neutron.create_network(body=json_body)['networks']
+    networks = [Network(**os_network) for os_network in os_networks]
+
+    try:
+        subnets = create_subnets_bulk(neutron, os_creds, [
+            (subnet_settings, network)
+            for network_settings, network in zip(
+                network_settings_list, networks)
+            for subnet_settings in network_settings.subnet_settings])
+    except:
+        logger.error('Unexpected error creating subnets for networks %s',
+                     [network.name for network in networks])
+        for network in networks:
+            delete_network(neutron, network)
+        raise
+
+    for network in networks:
+        network.subnets = [subnet for subnet in subnets
+                           if subnet.network_id == network.id]
+    return networks
+
+
+@resource_cache.invalidates('network', 'subnet')
 def delete_network(neutron, network):
     """
     Deletes a network for OpenStack
@@ -104,6 +145,10 @@ def delete_network(neutron, network):
         neutron.delete_network(network.id)
 
 
+@resource_cache.cached('network', lambda keystone, network_settings=None,
+                       network_name=None, project_name=None: (
+                           network_settings.name if network_settings
+                           else network_name, project_name))
 def get_network(neutron, keystone, network_settings=None, network_name=None,
                 project_name=None):
     """
@@ -128,18 +173,27 @@ def get_network(neutron, keystone, network_settings=None, network_name=None,
     for network, netInsts in networks.items():
         for inst in netInsts:
             if project_name:
-                if 'project_id' in inst.keys():
-                    project = keystone_utils.get_project_by_id(
-                        keystone, inst['project_id'])
-                else:
-                    project = keystone_utils.get_project_by_id(
-                        keystone, inst['tenant_id'])
-                if project and project.name == project_name:
+                if __get_project_name(keystone, inst) == project_name:
                     return __map_network(neutron, inst)
             else:
                 return __map_network(neutron, inst)
 
 
+def __get_project_name(keystone, os_obj):
+    """
+    Returns the name of the project that owns an OpenStack Neutron object
+    from the shared project cache
+    :param keystone: the Keystone client
+    :param os_obj: the OpenStack Neutron object dict
+    :return: the project name or None
+    """
+    if 'project_id' in os_obj.keys():
+        proj_id = os_obj['project_id']
+    else:
+        proj_id = os_obj.get('tenant_id')
+    return keystone_utils.get_project_name_by_id(keystone, proj_id)
+
+
 def __get_os_network_by_id(neutron, network_id):
     """
     Returns the OpenStack network object (dictionary) with the given ID else
@@ -154,6 +208,7 @@ def __get_os_network_by_id(neutron, network_id):
             return network
 
 
+@resource_cache.cached('network', lambda network_id: network_id)
 def get_network_by_id(neutron, network_id):
     """
     Returns the SNAPS Network domain object for the given ID else None
@@ -166,6 +221,48 @@ def get_network_by_id(neutron, network_id):
         return __map_network(neutron, os_network)
 
 
+def get_network_names_by_ids(neutron, network_ids):
+    """
+    Returns the names of the networks with the given IDs with one query per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the client
+    :param network_ids: the network IDs
+    :return: a dict where the key is the ID and the value is the name for
+             each network found
+    """
+    out = dict()
+    for chunk in __chunks(list(set(network_ids))):
+        os_networks = neutron.list_networks(
+            id=chunk, fields=['id', 'name'])['networks']
+        for os_network in os_networks:
+            out[os_network['id']] = os_network['name']
+    return out
+
+
+def get_networks_by_ids(neutron, network_ids):
+    """
+    Returns the networks with the given IDs along with their subnets using
+    one query for the networks and another for the subnets per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the client
+    :param network_ids: the IDs of the networks to retrieve
+    :return: a list of SNAPS-OO Network domain objects for the networks found
+             in the order of network_ids
+    """
+    network_ids = [network_id for network_id in network_ids if network_id]
+    os_network_dict = dict()
+    for chunk in __chunks(list(set(network_ids))):
+        for os_network in neutron.list_networks(id=chunk)['networks']:
+            os_network['subnets'] = list()
+            os_network_dict[os_network['id']] = os_network
+        for os_subnet in neutron.list_subnets(network_id=chunk)['subnets']:
+            os_network = os_network_dict.get(os_subnet['network_id'])
+            if os_network:
+                os_network['subnets'].append(Subnet(**os_subnet))
+    return [Network(**os_network_dict[network_id])
+            for network_id in network_ids if network_id in os_network_dict]
+
+
 def __map_network(neutron, os_network):
     """
     Returns the network object (dictionary) with the given ID else None
@@ -178,6 +275,7 @@ def __map_network(neutron, os_network):
     return Network(**os_network)
 
 
+@resource_cache.invalidates('network', 'subnet')
 def create_subnet(neutron, subnet_settings, os_creds, network):
     """
     Creates a network subnet for OpenStack
@@ -199,6 +297,32 @@ def create_subnet(neutron, subnet_settings, os_creds, network):
         raise NeutronException('Failed to create subnet')
 
 
+@resource_cache.invalidates('network', 'subnet')
+def create_subnets_bulk(neutron, os_creds, subnet_settings_list):
+    """
+    Creates a collection of subnets with a single request. Neutron creates
+    them all or none
+    :param neutron: the client
+    :param os_creds: the OpenStack credentials
+    :param subnet_settings_list: a list of tuples where the first member is
+                                 the SubnetConfig object and the second is the
+                                 Network domain object on which it is created
+    :return: a list of SNAPS-OO Subnet domain objects in the same order
+    """
+    if not subnet_settings_list:
+        return list()
+
+    json_body = {'subnets': [
+        subnet_settings.dict_for_neutron(os_creds, network=network)
+        for subnet_settings, network in subnet_settings_list]}
+    logger.info('Creating subnets with names %s', [
+        subnet_settings.name for subnet_settings, network
+        in subnet_settings_list])
+    os_subnets = neutron.create_subnet(body=json_body)['subnets']
+    return [Subnet(**os_subnet) for os_subnet in os_subnets]
+
+
+@resource_cache.invalidates('network', 'subnet')
 def delete_subnet(neutron, subnet):
     """
     Deletes a network subnet for OpenStack
@@ -267,14 +391,14 @@ def get_subnet_by_name(neutron, keystone, subnet_name, project_name=None):
     for subnet in subnets['subnets']:
         subnet = Subnet(**subnet)
         if project_name:
-            project = keystone_utils.get_project_by_id(
-                keystone, subnet.project_id)
-            if project and project.name == project_name:
+            if keystone_utils.get_project_name_by_id(
+                    keystone, subnet.project_id) == project_name:
                 return subnet
         else:
             return subnet
 
 
+@resource_cache.cached('subnet', lambda subnet_id: subnet_id)
 def get_subnet_by_id(neutron, subnet_id):
     """
     Returns a SNAPS-OO Subnet domain object for a given ID
@@ -287,6 +411,22 @@ def get_subnet_by_id(neutron, subnet_id):
         return Subnet(**os_subnet['subnet'])
 
 
+def get_subnets_by_ids(neutron, subnet_ids):
+    """
+    Returns the subnets with the given IDs with one query per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the OpenStack neutron client
+    :param subnet_ids: the subnet IDs
+    :return: a dict where the key is the ID and the value is the SNAPS-OO
+             Subnet domain object for each subnet found
+    """
+    out = dict()
+    for chunk in __chunks(list(set(subnet_ids))):
+        for os_subnet in neutron.list_subnets(id=chunk)['subnets']:
+            out[os_subnet['id']] = Subnet(**os_subnet)
+    return out
+
+
 def get_subnets_by_network(neutron, network):
     """
     Returns a list of SNAPS-OO Subnet domain objects
@@ -357,6 +497,51 @@ def get_router_by_id(neutron, router_id):
         return __map_router(neutron, router['router'])
 
 
+def get_router_names_by_ids(neutron, router_ids):
+    """
+    Returns the names of the routers with the given IDs with one query per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the client
+    :param router_ids: the router IDs
+    :return: a dict where the key is the ID and the value is the name for
+             each router found
+    """
+    out = dict()
+    for chunk in __chunks(list(set(router_ids))):
+        for os_router in neutron.list_routers(
+                id=chunk, fields=['id', 'name'])['routers']:
+            out[os_router['id']] = os_router['name']
+    return out
+
+
+def get_routers_by_ids(neutron, router_ids):
+    """
+    Returns the routers with the given IDs along with their interfaces using
+    one query each for the routers, their ports and the ports' subnets per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the client
+    :param router_ids: the IDs of the routers to retrieve
+    :return: a list of SNAPS-OO Router domain objects for the routers found
+             in the order of router_ids
+    """
+    router_ids = [router_id for router_id in router_ids if router_id]
+    os_router_dict = dict()
+    router_ports = dict()
+    for chunk in __chunks(list(set(router_ids))):
+        for os_router in neutron.list_routers(id=chunk)['routers']:
+            os_router_dict[os_router['id']] = os_router
+            router_ports[os_router['id']] = list()
+        for port in neutron.list_ports(device_id=chunk)['ports']:
+            if port['device_id'] in router_ports:
+                router_ports[port['device_id']].append(port)
+
+    subnets = get_subnets_by_ids(neutron, __port_subnet_ids(
+        [port for ports in router_ports.values() for port in ports]))
+    return [__map_router_ports(os_router_dict[router_id],
+                               router_ports[router_id], subnets)
+            for router_id in router_ids if router_id in os_router_dict]
+
+
 def get_router(neutron, keystone, router_settings=None, router_name=None,
                project_name=None):
     """
@@ -383,13 +568,7 @@ def get_router(neutron, keystone, router_settings=None, router_name=None,
     os_routers = neutron.list_routers(**router_filter)
     for os_router in os_routers['routers']:
         if project_name:
-            if 'project_id' in os_router.keys():
-                project = keystone_utils.get_project_by_id(
-                    keystone, os_router['project_id'])
-            else:
-                project = keystone_utils.get_project_by_id(
-                    keystone, os_router['tenant_id'])
-            if project and project.name == project_name:
+            if __get_project_name(keystone, os_router) == project_name:
                 return __map_router(neutron, os_router)
 
 
@@ -403,6 +582,28 @@ def __map_router(neutron, os_router):
     """
     device_ports = neutron.list_ports(
         **{'device_id': os_router['id']})['ports']
+    subnets = get_subnets_by_ids(neutron, __port_subnet_ids(device_ports))
+    return __map_router_ports(os_router, device_ports, subnets)
+
+
+def __port_subnet_ids(ports):
+    """
+    Returns the IDs of the subnets referenced by the ports' fixed IPs
+    """
+    return [fixed_ip['subnet_id'] for port in ports
+            for fixed_ip in port['fixed_ips']]
+
+
+def __map_router_ports(os_router, device_ports, subnets):
+    """
+    Maps an OpenStack router and the ports of which it is the device to a
+    SNAPS Router domain object
+    :param os_router: the OpenStack Router object
+    :param device_ports: the OpenStack Port objects of the router
+    :param subnets: dict of SNAPS-OO Subnet domain objects where the key is
+                    the ID
+    :return: a SNAPS-OO Router domain object
+    """
     port_subnets = list()
 
     # Order by create date
@@ -410,12 +611,12 @@ def __map_router(neutron, os_router):
         device_ports, key=lambda dev_port: dev_port['created_at'])
 
     for port in sorted_ports:
-        subnets = list()
+        port_subnet_list = list()
         for fixed_ip in port['fixed_ips']:
-            subnet = get_subnet_by_id(neutron, fixed_ip['subnet_id'])
+            subnet = subnets.get(fixed_ip['subnet_id'])
             if subnet and subnet.network_id == port['network_id']:
-                subnets.append(subnet)
-        port_subnets.append((Port(**port), subnets))
+                port_subnet_list.append(subnet)
+        port_subnets.append((Port(**port), port_subnet_list))
 
     os_router['port_subnets'] = port_subnets
     return Router(**os_router)
@@ -507,6 +708,26 @@ def create_port(neutron, os_creds, port_settings):
     return Port(**os_port)
 
 
+def create_ports_bulk(neutron, os_creds, port_settings_list):
+    """
+    Creates a collection of ports with a single request. Neutron creates them
+    all or none
+    :param neutron: the client
+    :param os_creds: the OpenStack credentials
+    :param port_settings_list: a list of PortConfig objects
+    :return: a list of SNAPS-OO Port domain objects in the same order
+    """
+    if not port_settings_list:
+        return list()
+
+    json_body = {'ports': [
+        port_settings.dict_for_neutron(neutron, os_creds)['port']
+        for port_settings in port_settings_list]}
+    logger.info('Creating %s ports', len(port_settings_list))
+    os_ports = neutron.create_port(body=json_body)['ports']
+    return [Port(**os_port) for os_port in os_ports]
+
+
 def delete_port(neutron, port):
     """
     Removes an OpenStack port
@@ -557,13 +778,7 @@ def get_port(neutron, keystone, port_settings=None, port_name=None,
     ports = neutron.list_ports(**port_filter)
     for port in ports['ports']:
         if project_name:
-            if 'project_id' in port.keys():
-                project = keystone_utils.get_project_by_id(
-                    keystone, port['project_id'])
-            else:
-                project = keystone_utils.get_project_by_id(
-                    keystone, port['tenant_id'])
-            if project and project.name == project_name:
+            if __get_project_name(keystone, port) == project_name:
                 return Port(**port)
         else:
             return Port(**port)
@@ -607,6 +822,18 @@ def get_ports(neutron, network, ips=None):
     return out
 
 
+def get_ports_by_device_id(neutron, device_id):
+    """
+    Returns the ports attached to a device (i.e. a server) with one query
+    :param neutron: the client
+    :param device_id: the ID of the device
+    :return: a list of SNAPS-OO Port domain objects
+    """
+    ports = neutron.list_ports(device_id=device_id)
+    return [Port(**port) for port in ports['ports']
+            if port['device_id'] == device_id]
+
+
 def create_security_group(neutron, keystone, sec_grp_settings):
     """
     Creates a security group object in OpenStack
@@ -665,13 +892,7 @@ def get_security_group(neutron, keystone, sec_grp_settings=None,
     groups = neutron.list_security_groups(**sec_grp_filter)
     for group in groups['security_groups']:
         if project_name:
-            if 'project_id' in group.keys():
-                project = keystone_utils.get_project_by_id(
-                    keystone, group['project_id'])
-            else:
-                project = keystone_utils.get_project_by_id(
-                    keystone, group['tenant_id'])
-            if project and project_name == project.name:
+            if __get_project_name(keystone, group) == project_name:
                 return __map_os_security_group(neutron, group)
         else:
             return __map_os_security_group(neutron, group)
@@ -690,6 +911,29 @@ def __map_os_security_group(neutron, os_sec_grp):
     return SecurityGroup(**os_sec_grp)
 
 
+def __map_os_security_groups(neutron, os_sec_grps, all_rules=False):
+    """
+    Creates SecurityGroup SNAPS domain objects from a list of OpenStack
+    Security Group dicts where the rules of every group are retrieved together
+    rather than with a query per group
+    :param neutron: the neutron client for performing rule lookups
+    :param os_sec_grps: the OpenStack Security Group dict objects
+    :param all_rules: when True, all visible rules are retrieved with a single
+                      query instead of filtering on the groups' IDs
+    :return: a list of SecurityGroup objects
+    """
+    sec_grp_ids = None
+    if not all_rules:
+        sec_grp_ids = [os_sec_grp['id'] for os_sec_grp in os_sec_grps]
+    rules_dict = get_rules_by_security_group_ids(neutron, sec_grp_ids)
+
+    out = list()
+    for os_sec_grp in os_sec_grps:
+        os_sec_grp['rules'] = rules_dict.get(os_sec_grp['id'], list())
+        out.append(SecurityGroup(**os_sec_grp))
+    return out
+
+
 def get_security_group_by_id(neutron, sec_grp_id):
     """
     Returns the first security group object of the given name else None
@@ -706,38 +950,93 @@ def get_security_group_by_id(neutron, sec_grp_id):
     return None
 
 
+def get_security_groups_by_ids(neutron, sec_grp_ids):
+    """
+    Returns the security groups with the given IDs along with their rules
+    using one query for the groups and another for the rules per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the client
+    :param sec_grp_ids: the IDs of the security groups to retrieve
+    :return: a list of SNAPS-OO SecurityGroup domain objects for the groups
+             found in the order of sec_grp_ids
+    """
+    sec_grp_ids = [sec_grp_id for sec_grp_id in sec_grp_ids if sec_grp_id]
+    os_sec_grp_dict = dict()
+    for chunk in __chunks(sec_grp_ids):
+        groups = neutron.list_security_groups(id=chunk)
+        for group in groups['security_groups']:
+            if group['id'] in chunk:
+                os_sec_grp_dict[group['id']] = group
+    return __map_os_security_groups(neutron, [
+        os_sec_grp_dict[sec_grp_id] for sec_grp_id in sec_grp_ids
+        if sec_grp_id in os_sec_grp_dict])
+
+
 def list_security_groups(neutron):
 
     """
-    Lists the available security groups
+    Lists the available security groups where all of their rules are
+    retrieved with a single query
     :param neutron: the neutron client
     """
     logger.info('Listing the available security groups')
-    sec_groups = []
     response = neutron.list_security_groups()
-    for sg in response['security_groups']:
-        sec_groups.append(__map_os_security_group(neutron, sg))
-
-    return sec_groups
+    return __map_os_security_groups(
+        neutron, response['security_groups'], all_rules=True)
 
 
 def create_security_group_rule(neutron, keystone, sec_grp_rule_settings,
-                               proj_name):
+                               proj_name, sec_grp_ids=None):
     """
     Creates a security group rule in OpenStack
     :param neutron: the neutron client
     :param keystone: the keystone client
     :param sec_grp_rule_settings: the security group rule settings
     :param proj_name: the default project name
+    :param sec_grp_ids: optional dict of security group names to IDs used to
+                        avoid looking up the rule's group
     :return: a SNAPS-OO SecurityGroupRule domain object
     """
     logger.info('Creating security group to security group - %s',
                 sec_grp_rule_settings.sec_grp_name)
     os_rule = neutron.create_security_group_rule(
-        sec_grp_rule_settings.dict_for_neutron(neutron, keystone, proj_name))
+        sec_grp_rule_settings.dict_for_neutron(
+            neutron, keystone, proj_name, sec_grp_ids))
     return SecurityGroupRule(**os_rule['security_group_rule'])
 
 
+def create_security_group_rules(neutron, keystone, sec_grp_rule_settings_list,
+                                proj_name, sec_grp_ids=None):
+    """
+    Creates a collection of security group rules with a single request.
+    Neutron creates them all or none and raises Conflict when any of them
+    already exists
+    :param neutron: the neutron client
+    :param keystone: the keystone client
+    :param sec_grp_rule_settings_list: a list of SecurityGroupRuleConfig
+                                       objects
+    :param proj_name: the default project name
+    :param sec_grp_ids: optional dict of security group names to IDs where
+                        each group is looked up at most once and added
+    :return: a list of SNAPS-OO SecurityGroupRule domain objects in the same
+             order
+    """
+    if not sec_grp_rule_settings_list:
+        return list()
+    if sec_grp_ids is None:
+        sec_grp_ids = dict()
+
+    json_body = {'security_group_rules': [
+        rule_settings.dict_for_neutron(
+            neutron, keystone, proj_name, sec_grp_ids)['security_group_rule']
+        for rule_settings in sec_grp_rule_settings_list]}
+    logger.info('Creating %s security group rules',
+                len(sec_grp_rule_settings_list))
+    os_rules = neutron.create_security_group_rule(json_body)
+    return [SecurityGroupRule(**os_rule)
+            for os_rule in os_rules['security_group_rules']]
+
+
 def delete_security_group_rule(neutron, sec_grp_rule):
     """
     Deletes a security group rule object from OpenStack
@@ -775,6 +1074,41 @@ def get_rules_by_security_group_id(neutron, sec_grp_id):
     return out
 
 
+def get_rules_by_security_group_ids(neutron, sec_grp_ids=None):
+    """
+    Retrieves the rules of many security groups with one query per
+    ID_FILTER_CHUNK_SIZE IDs
+    :param neutron: the client
+    :param sec_grp_ids: the IDs of the security groups or None to retrieve
+                        all visible rules with a single query
+    :return: a dict where the key is the security group ID and the value is
+             the list of its SNAPS-OO SecurityGroupRule domain objects
+    """
+    out = dict()
+    if sec_grp_ids is None:
+        queries = [dict()]
+    else:
+        queries = [{'security_group_id': chunk}
+                   for chunk in __chunks(list(sec_grp_ids))]
+
+    for query in queries:
+        rules = neutron.list_security_group_rules(**query)
+        for rule in rules['security_group_rules']:
+            if sec_grp_ids is None or rule['security_group_id'] in query[
+                    'security_group_id']:
+                out.setdefault(rule['security_group_id'], list()).append(
+                    SecurityGroupRule(**rule))
+    return out
+
+
+def __chunks(items):
+    """
+    Splits a list into lists of at most ID_FILTER_CHUNK_SIZE items
+    """
+    return [items[i:i + ID_FILTER_CHUNK_SIZE]
+            for i in range(0, len(items), ID_FILTER_CHUNK_SIZE)]
+
+
 def get_rule_by_id(neutron, sec_grp, rule_id):
     """
     Returns a SecurityGroupRule object from OpenStack
@@ -791,6 +1125,7 @@ def get_rule_by_id(neutron, sec_grp, rule_id):
     return None
 
 
+@resource_cache.cached('network', lambda: None)
 def get_external_networks(neutron):
     """
     Returns a list of external OpenStack network object/dict for all external
@@ -816,13 +1151,16 @@ def get_port_floating_ips(neutron, ports):
     :return: a list of tuple 2 (port_id, SNAPS FloatingIp) objects when ports
              is not None else a list of FloatingIp objects
     """
+    port_dict = dict((port.id, port) for port_name, port in ports if port)
+    if not port_dict:
+        return list()
+
     out = list()
-    fips = neutron.list_floatingips()
-    for fip in fips['floatingips']:
-        for port_name, port in ports:
-            if port and port.id == fip['port_id']:
-                out.append((port.id, FloatingIp(**fip)))
-                break
+    for chunk in __chunks(list(port_dict.keys())):
+        fips = neutron.list_floatingips(port_id=chunk)
+        for fip in fips['floatingips']:
+            if fip['port_id'] in port_dict:
+                out.append((fip['port_id'], FloatingIp(**fip)))
     return out
 
 
@@ -18,6 +18,7 @@ import logging
 import enum
 import os
 import time
+from datetime import datetime
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
@@ -29,7 +30,8 @@ from snaps.domain.flavor import Flavor
 from snaps.domain.keypair import Keypair
 from snaps.domain.project import ComputeQuotas
 from snaps.domain.vm_inst import VmInst
-from snaps.openstack.utils import keystone_utils, glance_utils, neutron_utils
+from snaps.openstack.utils import (
+    keystone_utils, glance_utils, neutron_utils, resource_cache)
 
 __author__ = 'spisarski'
 
@@ -37,6 +39,9 @@ logger = logging.getLogger('nova_utils')
 
 POLL_INTERVAL = 3
 
+# Seconds subtracted from the changes-since value to absorb clock skew
+CHANGES_SINCE_MARGIN = 60
+
 """
 Utilities for basic OpenStack Nova API calls
 """
@@ -91,6 +96,147 @@ def create_server(nova, keystone, neutron, glance, instance_config,
         nics.append(kv)
 
     logger.info('Creating VM with name - ' + instance_config.name)
+    args = __server_create_args(
+        nova, glance, instance_config, image_config, keypair_config)
+    args['nics'] = nics
+    server = nova.servers.create(**args)
+
+    return __map_os_server_obj_to_vm_inst(
+        neutron, server, project_name)
+
+
+def is_batchable_port(port_config):
+    """
+    Returns True when a port configuration only requires a network such that
+    nova can create the port itself when booting a batch of servers
+    :param port_config: the PortConfig object
+    :return: T/F
+    """
+    return (port_config.admin_state_up and
+            port_config.port_security_enabled is None and
+            not port_config.project_name and
+            not port_config.mac_address and
+            not port_config.ip_addrs and
+            not port_config.security_groups and
+            not port_config.allowed_address_pairs and
+            not port_config.opt_value and
+            not port_config.opt_name and
+            not port_config.device_owner and
+            not port_config.device_id and
+            not port_config.extra_dhcp_opts)
+
+
+def create_servers(nova, keystone, neutron, glance, name, instance_configs,
+                   image_config, project_name, keypair_config=None,
+                   timeout=None, poll_interval=POLL_INTERVAL):
+    """
+    Creates a batch of identical VM instances with a single request where nova
+    creates each server's ports on the configured networks. The servers and
+    their ports are then renamed to the names in each VmInstanceConfig. All
+    port configurations must satisfy is_batchable_port()
+    :param nova: the nova client (required)
+    :param keystone: the keystone client for retrieving projects (required)
+    :param neutron: the neutron client for retrieving ports (required)
+    :param glance: the glance client (required)
+    :param name: the name with which the servers are requested (required)
+    :param instance_configs: the VmInstanceConfig object of each server where
+                             the first supplies the attributes common to all
+                             (required)
+    :param image_config: the VM's ImageConfig object (required)
+    :param project_name: the associated project name (required)
+    :param keypair_config: the VM's KeypairConfig object (optional)
+    :param timeout: the seconds to wait for nova to create the servers' ports
+                    (defaults to the first config's vm_boot_timeout)
+    :param poll_interval: the seconds between port queries
+    :return: a list of snaps.domain.VmInst objects in the same order as
+             instance_configs
+    """
+    base_config = instance_configs[0]
+    nics = list()
+    for port_setting in base_config.port_settings:
+        network = neutron_utils.get_network(
+            neutron, keystone, network_name=port_setting.network_name,
+            project_name=project_name)
+        if not network:
+            raise NovaException(
+                'Cannot find network named - ' + port_setting.network_name)
+        nics.append({'net-id': network.id})
+
+    count = len(instance_configs)
+    logger.info('Creating %s VMs with name - %s', count, name)
+    args = __server_create_args(
+        nova, glance, base_config, image_config, keypair_config)
+    args.update(name=name, nics=nics, min_count=count, max_count=count,
+                return_reservation_id=True)
+    reservation = nova.servers.create(**args)
+    reservation_id = getattr(reservation, 'reservation_id', reservation)
+
+    servers = nova.servers.list(
+        search_opts={'reservation_id': reservation_id})
+    if len(servers) != count:
+        for server in servers:
+            nova.servers.delete(server)
+        raise NovaException(
+            'Expected {} servers with reservation {} found {}'.format(
+                count, reservation_id, len(servers)))
+
+    # nova appends the launch index to each name
+    servers.sort(key=lambda srv: (len(srv.name), srv.name))
+    for server, instance_config in zip(servers, instance_configs):
+        if server.name != instance_config.name:
+            nova.servers.update(server, name=instance_config.name)
+
+    __rename_server_ports(
+        neutron, servers, instance_configs, [nic['net-id'] for nic in nics],
+        timeout or base_config.vm_boot_timeout, poll_interval)
+
+    return [get_server_object_by_id(nova, neutron, keystone, server.id,
+                                    project_name)
+            for server in servers]
+
+
+def __rename_server_ports(neutron, servers, instance_configs, network_ids,
+                          timeout, poll_interval):
+    """
+    Waits for nova to create the ports of a batch of servers and renames them
+    after each server's port configurations. A single port query retrieves
+    the ports of all servers on each attempt
+    :param network_ids: the network ID of each port configuration
+    :raise: NovaException when the ports are not created within the timeout
+    """
+    server_ids = [server.id for server in servers]
+    expected = len(network_ids) * len(servers)
+    start = time.time()
+    while True:
+        os_ports = neutron.list_ports(device_id=server_ids)['ports']
+        if len(os_ports) >= expected:
+            break
+        if time.time() - start > timeout:
+            raise NovaException(
+                'Timeout waiting for the ports of servers {}'.format(
+                    server_ids))
+        time.sleep(poll_interval)
+
+    for server, instance_config in zip(servers, instance_configs):
+        server_ports = [os_port for os_port in os_ports
+                        if os_port['device_id'] == server.id]
+        for port_setting, network_id in zip(
+                instance_config.port_settings, network_ids):
+            for os_port in server_ports:
+                if os_port['network_id'] == network_id:
+                    server_ports.remove(os_port)
+                    if os_port['name'] != port_setting.name:
+                        neutron.update_port(os_port['id'], body={
+                            'port': {'name': port_setting.name}})
+                    break
+
+
+def __server_create_args(nova, glance, instance_config, image_config,
+                         keypair_config):
+    """
+    Returns the nova servers.create() arguments other than the NICs
+    :raise: NovaException when the flavor or image cannot be found
+    """
     keypair_name = None
     if keypair_config:
         keypair_name = keypair_config.name
@@ -101,40 +247,35 @@ def create_server(nova, keystone, neutron, glance, instance_config,
             'Flavor not found with name - %s', instance_config.flavor)
 
     image = glance_utils.get_image(glance, image_settings=image_config)
-    if image:
-        userdata = None
-        if instance_config.userdata:
-            if isinstance(instance_config.userdata, str):
-                userdata = instance_config.userdata + '\n'
-            elif (isinstance(instance_config.userdata, dict) and
-                  'script_file' in instance_config.userdata):
-                try:
-                    userdata = file_utils.read_file(
-                        instance_config.userdata['script_file'])
-                except Exception as e:
-                    logger.warn('error reading userdata file %s - %s',
-                                instance_config.userdata, e)
-        args = {'name': instance_config.name,
-                'flavor': flavor,
-                'image': image,
-                'nics': nics,
-                'key_name': keypair_name,
-                'security_groups':
-                    instance_config.security_group_names,
-                'userdata': userdata}
-
-        if instance_config.availability_zone:
-            args['availability_zone'] = instance_config.availability_zone
-
-        server = nova.servers.create(**args)
-
-        return __map_os_server_obj_to_vm_inst(
-            neutron, keystone, server, project_name)
-    else:
+    if not image:
         raise NovaException(
             'Cannot create instance, image cannot be located with name %s',
             image_config.name)
 
+    userdata = None
+    if instance_config.userdata:
+        if isinstance(instance_config.userdata, str):
+            userdata = instance_config.userdata + '\n'
+        elif (isinstance(instance_config.userdata, dict) and
+              'script_file' in instance_config.userdata):
+            try:
+                userdata = file_utils.read_file(
+                    instance_config.userdata['script_file'])
+            except Exception as e:
+                logger.warn('error reading userdata file %s - %s',
+                            instance_config.userdata, e)
+    args = {'name': instance_config.name,
+            'flavor': flavor,
+            'image': image,
+            'key_name': keypair_name,
+            'security_groups':
+                instance_config.security_group_names,
+            'userdata': userdata}
+
+    if instance_config.availability_zone:
+        args['availability_zone'] = instance_config.availability_zone
+    return args
+
 
 def get_server(nova, neutron, keystone, vm_inst_settings=None,
                server_name=None, project_id=None):
@@ -142,7 +283,8 @@ def get_server(nova, neutron, keystone, vm_inst_settings=None,
     Returns a VmInst object for the first server instance found.
     :param nova: the Nova client
     :param neutron: the Neutron client
-    :param keystone: the Keystone client
+    :param keystone: the Keystone client (unused, retained for
+                     compatibility)
     :param vm_inst_settings: the VmInstanceConfig object from which to build
                              the query if not None
     :param server_name: the server with this name to return if vm_inst_settings
@@ -159,7 +301,7 @@ def get_server(nova, neutron, keystone, vm_inst_settings=None,
     servers = nova.servers.list(search_opts=search_opts)
     for server in servers:
         return __map_os_server_obj_to_vm_inst(
-            neutron, keystone, server, project_id)
+            neutron, server, project_id)
 
 
 def get_server_connection(nova, vm_inst_settings=None, server_name=None):
@@ -183,15 +325,15 @@ def get_server_connection(nova, vm_inst_settings=None, server_name=None):
         return server.links[0]
 
 
-def __map_os_server_obj_to_vm_inst(neutron, keystone, os_server,
-                                   project_name=None):
+def __map_os_server_obj_to_vm_inst(neutron, os_server, project_name=None):
     """
     Returns a VmInst object for an OpenStack Server object
     :param neutron: the Neutron client
-    :param keystone: the Keystone client
     :param os_server: the OpenStack server object
     :param project_name: the associated project name
     :return: an equivalent SNAPS-OO VmInst domain object
+    :raise NovaException when none of the server's ports are on one of the
+           networks reported by nova
     """
     sec_grp_names = list()
     # VM must be active for 'security_groups' attr to be initialized
@@ -200,20 +342,27 @@ def __map_os_server_obj_to_vm_inst(neutron, keystone, os_server,
             if sec_group.get('name'):
                 sec_grp_names.append(sec_group.get('name'))
 
+    # A single query retrieves the server's ports and another the names of
+    # their networks by which they are ordered as reported by nova
     out_ports = list()
     if len(os_server.networks) > 0:
-        for net_name, ips in os_server.networks.items():
-            network = neutron_utils.get_network(
-                neutron, keystone, network_name=net_name,
-                project_name=project_name)
-            if network:
-                ports = neutron_utils.get_ports(neutron, network, ips)
-                for port in ports:
-                    out_ports.append(port)
-            else:
+        net_names = list(os_server.networks.keys())
+        ports = neutron_utils.get_ports_by_device_id(neutron, os_server.id)
+        network_names = neutron_utils.get_network_names_by_ids(
+            neutron, [port.network_id for port in ports])
+        net_indices = dict()
+        for port in ports:
+            net_name = network_names.get(port.network_id)
+            net_indices[port.id] = (net_names.index(net_name)
+                                    if net_name in net_names
+                                    else len(net_names))
+        found = set(net_indices.values())
+        for index, net_name in enumerate(net_names):
+            if index not in found:
                 raise NovaException(
                     'Unable to locate network in project {} with '
                     'name {}'.format(project_name, net_name))
+        out_ports = sorted(ports, key=lambda prt: net_indices[prt.id])
 
     volumes = None
     if hasattr(os_server, 'os-extended-volumes:volumes_attached'):
@@ -261,6 +410,36 @@ def get_server_status(nova, server):
     return None
 
 
+def get_server_statuses(nova, server_ids, since=None):
+    """
+    Returns the statuses of a collection of VM instances with a single query
+    :param nova: the Nova client
+    :param server_ids: the IDs of the servers
+    :param since: when not None, only the servers changed since this epoch
+                  time are returned including those deleted
+    :return: dict where the key is the server ID and the value its status
+             for each server found
+    """
+    if not since and len(server_ids) == 1:
+        try:
+            server = __get_latest_server_os_object_by_id(nova, server_ids[0])
+            return {server.id: server.status}
+        except NotFound:
+            return dict()
+
+    search_opts = dict()
+    if since:
+        search_opts['changes-since'] = datetime.utcfromtimestamp(
+            since - CHANGES_SINCE_MARGIN).isoformat()
+
+    server_ids = set(server_ids)
+    out = dict()
+    for server in nova.servers.list(search_opts=search_opts):
+        if server.id in server_ids:
+            out[server.id] = server.status
+    return out
+
+
 def get_server_console_output(nova, server):
     """
     Returns the console object for parsing VM activity
@@ -279,14 +458,15 @@ def get_latest_server_object(nova, neutron, keystone, server, project_name):
     Returns a server with a given id
     :param nova: the Nova client
     :param neutron: the Neutron client
-    :param keystone: the Keystone client
+    :param keystone: the Keystone client (unused, retained for
+                     compatibility)
     :param server: the old server object
     :param project_name: the associated project name
     :return: the list of servers or None if not found
     """
     server = __get_latest_server_os_object(nova, server)
     return __map_os_server_obj_to_vm_inst(
-        neutron, keystone, server, project_name)
+        neutron, server, project_name)
 
 
 def get_server_object_by_id(nova, neutron, keystone, server_id,
@@ -295,14 +475,15 @@ def get_server_object_by_id(nova, neutron, keystone, server_id,
     Returns a server with a given id
     :param nova: the Nova client
     :param neutron: the Neutron client
-    :param keystone: the Keystone client
+    :param keystone: the Keystone client (unused, retained for
+                     compatibility)
     :param server_id: the server's id
     :param project_name: the associated project name
     :return: an SNAPS-OO VmInst object or None if not found
     """
     server = __get_latest_server_os_object_by_id(nova, server_id)
     return __map_os_server_obj_to_vm_inst(
-        neutron, keystone, server, project_name)
+        neutron, server, project_name)
 
 
 def get_server_security_group_names(nova, server):
@@ -583,6 +764,7 @@ def get_flavor(nova, flavor):
         return None
 
 
+@resource_cache.cached('flavor', lambda flavor_id: flavor_id)
 def get_flavor_by_id(nova, flavor_id):
     """
     Returns to OpenStack flavor object by name
@@ -612,6 +794,7 @@ def __get_os_flavor_by_name(nova, name):
         return None
 
 
+@resource_cache.cached('flavor', lambda name: name)
 def get_flavor_by_name(nova, name):
     """
     Returns a flavor by name
@@ -628,6 +811,7 @@ def get_flavor_by_name(nova, name):
             rxtx_factor=os_flavor.rxtx_factor, is_public=os_flavor.is_public)
 
 
+@resource_cache.invalidates('flavor')
 def create_flavor(nova, flavor_settings):
     """
     Creates and returns and OpenStack flavor object
@@ -648,6 +832,7 @@ def create_flavor(nova, flavor_settings):
         rxtx_factor=os_flavor.rxtx_factor, is_public=os_flavor.is_public)
 
 
+@resource_cache.invalidates('flavor')
 def delete_flavor(nova, flavor):
     """
     Deletes a flavor
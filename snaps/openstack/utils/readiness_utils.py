@@ -0,0 +1,277 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import heapq
+import logging
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from snaps import thread_utils
+from snaps.provisioning import ssh_pool
+
+__author__ = 'spisarski'
+
+"""
+Moves a set of OpenStackVmInstance objects through the ACTIVE, SSH port,
+SSH and cloud-init readiness stages concurrently so the total wait is that of
+the slowest VM rather than the sum of all of them
+"""
+
+logger = logging.getLogger('readiness_utils')
+
+STAGE_ACTIVE = 'active'
+STAGE_PORT = 'port'
+STAGE_SSH = 'ssh'
+STAGE_CLOUD_INIT = 'cloud-init'
+STAGES = (STAGE_ACTIVE, STAGE_PORT, STAGE_SSH, STAGE_CLOUD_INIT)
+
+SSH_POOL = 'ssh'
+DEFAULT_WORKERS = 10
+POLL_INTERVAL = 3
+
+
+def wait_for_vms(vm_insts, stages=STAGES, callback=None,
+                 max_workers=DEFAULT_WORKERS, poll_interval=POLL_INTERVAL,
+                 user_override=None, password=None):
+    """
+    Blocks until every VM has passed through the readiness stages or failed
+    :param vm_insts: the OpenStackVmInstance objects
+    :param stages: the stages to pass in order (a subset of STAGES)
+    :param callback: function called with each VM's ReadinessResult as soon
+                     as it is known
+    :param max_workers: the number of threads of the 'ssh' named pool
+                        executing the checks when it is first created
+    :param poll_interval: the number of seconds between a VM's checks
+    :param user_override: the SSH user to use instead of the image's
+    :param password: the SSH password to use instead of the private key
+    :return: a list of ReadinessResult objects in the order of vm_insts
+    """
+    scheduler = ReadinessScheduler(
+        vm_insts, stages=stages, max_workers=max_workers,
+        poll_interval=poll_interval, user_override=user_override,
+        password=password)
+    results = dict()
+    for result in scheduler.run():
+        results[id(result.vm_inst)] = result
+        if callback:
+            callback(result)
+    return [results[id(vm_inst)] for vm_inst in vm_insts]
+
+
+class ReadinessResult:
+    """
+    The outcome of a VM's readiness stages
+    """
+
+    def __init__(self, vm_inst):
+        """
+        Constructor
+        :param vm_inst: the OpenStackVmInstance object
+        """
+        self.vm_inst = vm_inst
+        self.name = vm_inst.instance_settings.name
+        self.ready = False
+        self.failed_stage = None
+        self.error = None
+        self.timings = dict()
+
+
+class ReadinessScheduler:
+    """
+    Drives the readiness checks of many VMs from a single thread. ACTIVE
+    waits share the batched nova status queries of status_utils, the SSH
+    ports of all VMs due for a check are probed together with non-blocking
+    TCP connections and the SSH and cloud-init checks are executed on the
+    'ssh' named pool of thread_utils
+    """
+
+    def __init__(self, vm_insts, stages=STAGES, max_workers=DEFAULT_WORKERS,
+                 poll_interval=POLL_INTERVAL, user_override=None,
+                 password=None):
+        """
+        Constructor
+        :param vm_insts: the OpenStackVmInstance objects
+        :param stages: the stages to pass in order (a subset of STAGES)
+        :param max_workers: the number of threads of the 'ssh' named pool
+                            when it is first created
+        :param poll_interval: the number of seconds between a VM's checks
+        :param user_override: the SSH user to use instead of the image's
+        :param password: the SSH password to use instead of the private key
+        """
+        self.vm_insts = list(vm_insts)
+        self.stages = [stage for stage in STAGES if stage in stages]
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.user_override = user_override
+        self.password = password
+        self.__probes = dict()
+
+    def run(self):
+        """
+        Generator yielding each VM's ReadinessResult once it has passed all
+        of the stages or failed one of them
+        """
+        if not self.vm_insts or not self.stages:
+            for vm_inst in self.vm_insts:
+                result = ReadinessResult(vm_inst)
+                result.ready = True
+                yield result
+            return
+
+        events = queue.Queue()
+        states = dict()
+        timers = list()
+        pool = thread_utils.named_pool(SSH_POOL, self.max_workers)
+        for key, vm_inst in enumerate(self.vm_insts):
+            states[key] = ReadinessState(vm_inst)
+            self.__start_stage(key, states[key], events, pool)
+
+        while states:
+            while timers and timers[0][0] <= time.time():
+                key = heapq.heappop(timers)[1]
+                self.__submit_check(key, states[key], events, pool)
+            if self.__probes:
+                self.__submit_probes(events, pool)
+
+            timeout = None
+            if timers:
+                timeout = max(0, timers[0][0] - time.time())
+            try:
+                key, success, error = events.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+            state = states[key]
+            stage = self.stages[state.stage]
+            now = time.time()
+            if success:
+                state.result.timings[stage] = now - state.stage_start
+                logger.debug('VM %s passed stage %s in %.1fs',
+                             state.result.name, stage,
+                             state.result.timings[stage])
+                state.stage += 1
+                if state.stage == len(self.stages):
+                    state.result.ready = True
+                    del states[key]
+                    yield state.result
+                else:
+                    self.__start_stage(key, state, events, pool)
+            elif (error or stage == STAGE_ACTIVE or
+                    now + self.poll_interval > state.deadline):
+                state.result.failed_stage = stage
+                state.result.error = error
+                state.result.timings[stage] = now - state.stage_start
+                logger.warning('VM %s failed readiness stage %s - %s',
+                               state.result.name, stage, error or 'timeout')
+                del states[key]
+                yield state.result
+            else:
+                heapq.heappush(timers, (now + self.poll_interval, key))
+
+    def __start_stage(self, key, state, events, pool):
+        """
+        Starts the VM's current stage
+        """
+        stage = self.stages[state.stage]
+        state.stage_start = time.time()
+        settings = state.result.vm_inst.instance_settings
+        if stage == STAGE_ACTIVE:
+            try:
+                future = state.result.vm_inst.vm_status_future()
+            except Exception as e:
+                events.put((key, False, e))
+                return
+            future.add_done_callback(
+                lambda done: self.__on_active(key, done, events))
+            return
+
+        if stage in (STAGE_PORT, STAGE_SSH):
+            timeout = settings.ssh_connect_timeout
+        else:
+            timeout = settings.cloud_init_timeout
+        state.deadline = state.stage_start + timeout
+        self.__submit_check(key, state, events, pool)
+
+    @staticmethod
+    def __on_active(key, future, events):
+        """
+        Reports the outcome of the VM's batched ACTIVE status wait
+        """
+        try:
+            events.put((key, bool(future.result()), None))
+        except Exception as e:
+            events.put((key, False, e))
+
+    def __submit_check(self, key, state, events, pool):
+        stage = self.stages[state.stage]
+        vm_inst = state.result.vm_inst
+        if stage == STAGE_PORT:
+            try:
+                address = vm_inst.ssh_probe_address()
+            except Exception as e:
+                events.put((key, False, e))
+                return
+            if address:
+                self.__probes[key] = address
+            else:
+                events.put((key, True, None))
+            return
+
+        user_override = self.user_override
+        password = self.password
+
+        def run_check():
+            try:
+                if stage == STAGE_SSH:
+                    success = vm_inst.check_ssh_active(
+                        user_override=user_override, password=password)
+                else:
+                    success = vm_inst.check_cloud_init_complete()
+                events.put((key, bool(success), None))
+            except Exception as e:
+                events.put((key, False, e))
+        pool.apply_async(run_check)
+
+    def __submit_probes(self, events, pool):
+        """
+        Probes the SSH ports of every VM due for a check at once
+        """
+        probes = self.__probes
+        self.__probes = dict()
+
+        def run_probes():
+            try:
+                open_ips = ssh_pool.probe_ports(set(probes.values()))
+                for key, address in probes.items():
+                    events.put((key, address in open_ips, None))
+            except Exception as e:
+                for key in probes:
+                    events.put((key, False, e))
+        pool.apply_async(run_probes)
+
+
+class ReadinessState:
+    """
+    The progress of a VM through the stages
+    """
+
+    def __init__(self, vm_inst):
+        self.result = ReadinessResult(vm_inst)
+        self.stage = 0
+        self.stage_start = None
+        self.deadline = None
@@ -0,0 +1,246 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+import logging
+import threading
+import time
+import uuid
+import weakref
+
+from collections import OrderedDict
+
+__author__ = 'spisarski'
+
+"""
+Opt-in read-through cache of the SNAPS-OO domain objects returned by the
+*_utils getters. Entries are held per resource type with their own TTL and
+size bound, and every type is invalidated whenever a function creating or
+deleting resources of that type is called
+"""
+
+logger = logging.getLogger('resource_cache')
+
+CACHE_ENABLED = False
+DEFAULT_TTL = 60
+MAX_SIZE = 256
+
+# Seconds entries are retained per resource type, others use DEFAULT_TTL
+TTLS = {
+    'flavor': 600,
+    'image': 60,
+    'network': 120,
+    'subnet': 120,
+    'volume_type': 600,
+    'qos': 600,
+}
+
+_caches = dict()
+_caches_lock = threading.Lock()
+_session_tokens = weakref.WeakKeyDictionary()
+_local = threading.local()
+
+
+def cached(resource_type, key_function):
+    """
+    Decorator caching the result of a getter whose first argument is the
+    OpenStack client. Results of None are not cached
+    :param resource_type: the type of resource returned (i.e. 'flavor')
+    :param key_function: function receiving the getter's remaining arguments
+                         and returning a hashable value identifying the query
+    :return: the decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(client, *args, **kwargs):
+            if not CACHE_ENABLED or getattr(_local, 'depth', 0):
+                return function(client, *args, **kwargs)
+
+            cache = get_cache(resource_type)
+            key = (__client_key(client), function.__name__,
+                   key_function(*args, **kwargs))
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            value = function(client, *args, **kwargs)
+            if value is not None:
+                cache.put(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidates(*resource_types):
+    """
+    Decorator invalidating the cached resource types once the function
+    returns. Lookups made while the function runs bypass the cache so they
+    cannot retain objects in an intermediate state
+    :param resource_types: the affected resource types
+    :return: the decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            _local.depth = getattr(_local, 'depth', 0) + 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _local.depth -= 1
+                for resource_type in resource_types:
+                    invalidate(resource_type)
+        return wrapper
+    return decorator
+
+
+def get_cache(resource_type):
+    """
+    Returns the ResourceCache of a resource type
+    :param resource_type: the type of resource
+    :return: the ResourceCache object
+    """
+    with _caches_lock:
+        cache = _caches.get(resource_type)
+        if not cache:
+            cache = ResourceCache(
+                TTLS.get(resource_type, DEFAULT_TTL), MAX_SIZE)
+            _caches[resource_type] = cache
+        return cache
+
+
+def invalidate(resource_type):
+    """
+    Removes all cached entries of a resource type
+    :param resource_type: the type of resource
+    """
+    with _caches_lock:
+        cache = _caches.get(resource_type)
+    if cache:
+        cache.clear()
+
+
+def clear():
+    """
+    Removes all caches along with their counters
+    """
+    with _caches_lock:
+        _caches.clear()
+
+
+def stats():
+    """
+    Returns the counters of each resource type's cache
+    :return: a dict where the key is the resource type and the value is a
+             dict with the keys 'hits', 'misses', 'evictions' and 'size'
+    """
+    with _caches_lock:
+        caches = dict(_caches)
+    return dict((resource_type, cache.stats())
+                for resource_type, cache in caches.items())
+
+
+def __client_key(client):
+    """
+    Returns a value identifying the keystone session of a client such that
+    clients sharing a session share cached entries. Clients without an
+    accessible session are keyed by their identity
+    """
+    for holder in (client, getattr(client, 'client', None),
+                   getattr(client, 'httpclient', None),
+                   getattr(client, 'http_client', None)):
+        session = getattr(holder, 'session', None)
+        if session is not None:
+            try:
+                with _caches_lock:
+                    token = _session_tokens.get(session)
+                    if not token:
+                        token = str(uuid.uuid4())
+                        _session_tokens[session] = token
+                    return token
+            except TypeError:
+                break
+    return id(client)
+
+
+class ResourceCache:
+    """
+    Thread safe LRU cache whose entries expire after a TTL
+    """
+
+    def __init__(self, ttl, max_size):
+        """
+        Constructor
+        :param ttl: the number of seconds entries are retained
+        :param max_size: the maximum number of entries
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value of a key
+        :param key: the key
+        :return: a tuple where the first member is True when the key was
+                 found and the second is the value
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry and entry[1] > time.time():
+                # move to the most recently used position
+                del self.__entries[key]
+                self.__entries[key] = entry
+                self.hits += 1
+                return True, entry[0]
+
+            if entry:
+                del self.__entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """
+        Caches a value removing the least recently used entries when the cache
+        is full
+        :param key: the key
+        :param value: the value
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__entries[key] = (value, time.time() + self.ttl)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self):
+        """
+        Returns the counters and number of entries
+        :return: a dict
+        """
+        with self.__lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self.__entries)}
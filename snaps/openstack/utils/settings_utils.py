@@ -236,60 +236,96 @@ def create_vm_inst_config(nova, keystone, neutron, server, project_name):
     :param project_name: the associated project name
     :return:
     """
+    return create_vm_inst_configs(nova, neutron, [server])[0]
 
-    flavor_name = nova_utils.get_flavor_by_id(nova, server.flavor_id)
 
-    kwargs = dict()
-    kwargs['name'] = server.name
-    kwargs['flavor'] = flavor_name
-
-    kwargs['port_settings'] = __create_port_configs(neutron, server.ports)
-    kwargs['security_group_names'] = server.sec_grp_names
-    kwargs['floating_ip_settings'] = __create_floatingip_config(
-        neutron, keystone, kwargs['port_settings'], project_name)
+def create_vm_inst_configs(nova, neutron, servers):
+    """
+    Returns a VmInstanceConfig object for each server. The flavors, subnets,
+    networks, floating IPs and routers referenced by all of the servers are
+    retrieved up front with a single filtered query per resource type (and
+    per neutron_utils.ID_FILTER_CHUNK_SIZE IDs) rather than per port
+    note: if a server instance is not active, the PortSettings objects will
+    not be generated resulting in an invalid configuration
+    :param nova: the nova client
+    :param neutron: the neutron client
+    :param servers: a list of SNAPS-OO VmInst domain objects
+    :return: a list of VmInstanceConfig objects in the order of servers
+    """
+    server_ports = dict()
+    for server in servers:
+        server_ports[server.id] = [
+            port for port in server.ports
+            if port.device_owner != 'network:dhcp']
+    ports = [port for server in servers for port in server_ports[server.id]]
+
+    flavor_names = dict()
+    for flavor_id in set(server.flavor_id for server in servers):
+        flavor_names[flavor_id] = nova_utils.get_flavor_by_id(nova, flavor_id)
+
+    subnets = neutron_utils.get_subnets_by_ids(neutron, [
+        ip_dict['subnet_id'] for port in ports for ip_dict in port.ips])
+    network_names = neutron_utils.get_network_names_by_ids(
+        neutron, [port.network_id for port in ports])
+    floating_ips = neutron_utils.get_port_floating_ips(
+        neutron, [(port.name, port) for port in ports])
+    router_names = neutron_utils.get_router_names_by_ids(
+        neutron, [floating_ip.router_id for port_id, floating_ip
+                  in floating_ips if floating_ip.router_id])
 
-    return VmInstanceConfig(**kwargs)
+    out = list()
+    for server in servers:
+        kwargs = dict()
+        kwargs['name'] = server.name
+        kwargs['flavor'] = flavor_names[server.flavor_id]
+        kwargs['port_settings'] = __create_port_configs(
+            server_ports[server.id], subnets, network_names)
+        kwargs['security_group_names'] = server.sec_grp_names
+        kwargs['floating_ip_settings'] = __create_floatingip_config(
+            server_ports[server.id], floating_ips, subnets, router_names)
+        out.append(VmInstanceConfig(**kwargs))
+    return out
 
 
-def __create_port_configs(neutron, ports):
+def __create_port_configs(ports, subnets, network_names):
     """
     Returns a list of PortConfig objects based on the networks parameter
-    :param neutron: the neutron client
     :param ports: a list of SNAPS-OO Port domain objects
+    :param subnets: dict of SNAPS-OO Subnet domain objects by ID
+    :param network_names: dict of network names by ID
     :return:
     """
     out = list()
 
     for port in ports:
-        if port.device_owner != 'network:dhcp':
-            ip_addrs = list()
-            for ip_dict in port.ips:
-                subnet = neutron_utils.get_subnet_by_id(
-                    neutron, ip_dict['subnet_id'])
-                ip_addrs.append({'subnet_name': subnet.name,
-                                 'ip': ip_dict['ip_address']})
-
-            network = neutron_utils.get_network_by_id(neutron, port.network_id)
-            kwargs = dict()
-            if port.name:
-                kwargs['name'] = port.name
-            kwargs['network_name'] = network.name
-            kwargs['mac_address'] = port.mac_address
-            kwargs['allowed_address_pairs'] = port.allowed_address_pairs
-            kwargs['admin_state_up'] = port.admin_state_up
-            kwargs['ip_addrs'] = ip_addrs
-            out.append(PortConfig(**kwargs))
+        ip_addrs = list()
+        for ip_dict in port.ips:
+            subnet = subnets.get(ip_dict['subnet_id'])
+            ip_addrs.append({'subnet_name': subnet.name if subnet else None,
+                             'ip': ip_dict['ip_address']})
+
+        kwargs = dict()
+        if port.name:
+            kwargs['name'] = port.name
+        kwargs['network_name'] = network_names.get(port.network_id)
+        kwargs['mac_address'] = port.mac_address
+        kwargs['allowed_address_pairs'] = port.allowed_address_pairs
+        kwargs['admin_state_up'] = port.admin_state_up
+        kwargs['ip_addrs'] = ip_addrs
+        out.append(PortConfig(**kwargs))
 
     return out
 
 
-def __create_floatingip_config(neutron, keystone, port_settings, project_name):
+def __create_floatingip_config(ports, floating_ips, subnets, router_names):
     """
     Returns a list of FloatingIpConfig objects as they pertain to an
     existing deployed server instance
-    :param neutron: the neutron client
-    :param keystone: the keystone client
-    :param port_settings: list of SNAPS-OO PortConfig objects
+    :param ports: the server's SNAPS-OO Port domain objects
+    :param floating_ips: list of tuple 2 (port_id, SNAPS-OO FloatingIp) as
+                         returned by neutron_utils.get_port_floating_ips()
+    :param subnets: dict of SNAPS-OO Subnet domain objects by ID
+    :param router_names: dict of router names by ID
     :return: a list of FloatingIpConfig objects or an empty list if no
              floating IPs have been created
     """
@@ -297,41 +333,25 @@ def __create_floatingip_config(neutron, keystone, port_settings, project_name):
     fip_ctr = 1
     out = list()
 
-    fip_ports = list()
-    for port_setting in port_settings:
-        setting_port = neutron_utils.get_port(
-            neutron, keystone, port_setting, project_name=project_name)
-        if setting_port:
-            network = neutron_utils.get_network(
-                neutron, keystone, network_name=port_setting.network_name)
-            network_ports = neutron_utils.get_ports(neutron, network)
-            if network_ports:
-                for setting_port in network_ports:
-                    if port_setting.mac_address == setting_port.mac_address:
-                        fip_ports.append((port_setting.name, setting_port))
-                        break
-
-    floating_ips = neutron_utils.get_port_floating_ips(neutron, fip_ports)
-
+    port_dict = dict((port.id, port) for port in ports)
     for port_id, floating_ip in floating_ips:
-        router = neutron_utils.get_router_by_id(neutron, floating_ip.router_id)
-        setting_port = neutron_utils.get_port_by_id(
-            neutron, floating_ip.port_id)
+        setting_port = port_dict.get(port_id)
+        if not setting_port:
+            continue
+
         kwargs = dict()
         kwargs['name'] = base_fip_name + str(fip_ctr)
         kwargs['port_name'] = setting_port.name
         kwargs['port_id'] = setting_port.id
-        kwargs['router_name'] = router.name
-
-        if setting_port:
-            for ip_dict in setting_port.ips:
-                if ('ip_address' in ip_dict and
-                        'subnet_id' in ip_dict and
-                        ip_dict['ip_address'] == floating_ip.fixed_ip_address):
-                    subnet = neutron_utils.get_subnet_by_id(
-                        neutron, ip_dict['subnet_id'])
-                    if subnet:
-                        kwargs['subnet_name'] = subnet.name
+        kwargs['router_name'] = router_names.get(floating_ip.router_id)
+
+        for ip_dict in setting_port.ips:
+            if ('ip_address' in ip_dict and
+                    'subnet_id' in ip_dict and
+                    ip_dict['ip_address'] == floating_ip.fixed_ip_address):
+                subnet = subnets.get(ip_dict['subnet_id'])
+                if subnet:
+                    kwargs['subnet_name'] = subnet.name
 
         out.append(FloatingIpConfig(**kwargs))
 
@@ -350,10 +370,11 @@ def determine_image_config(glance, server, image_settings):
     :return: ImageConfig or None
     """
     if image_settings:
-        for image_setting in image_settings:
-            image = glance_utils.get_image_by_id(glance, server.image_id)
-            if image and image.name == image_setting.name:
-                return image_setting
+        image = glance_utils.get_image_by_id(glance, server.image_id)
+        if image:
+            for image_setting in image_settings:
+                if image.name == image_setting.name:
+                    return image_setting
 
 
 def determine_keypair_config(heat_cli, stack, server, keypair_settings=None,
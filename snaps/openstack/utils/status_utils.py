@@ -0,0 +1,325 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import random
+import threading
+import time
+
+from concurrent.futures import Future
+
+__author__ = 'spisarski'
+
+logger = logging.getLogger('status_utils')
+
+MIN_POLL_INTERVAL = 1
+BACKOFF_FACTOR = 1.5
+JITTER = 0.2
+
+# Status value reported for resources no longer returned by a full query
+STATUS_NOT_FOUND = None
+
+_pollers = dict()
+_pollers_lock = threading.Lock()
+
+
+def wait_for_status(client, fetch_statuses, resource_id, expected_status,
+                    fail_statuses=None, not_found_ok=False, timeout=300,
+                    poll_interval=3, batch_key=None, incremental=False):
+    """
+    Registers a wait for a resource to reach an expected status and returns
+    a Future. The statuses of all resources registered with the same
+    fetch_statuses function and batch_key are retrieved together with a single
+    call per polling tick
+    :param client: the OpenStack client passed to fetch_statuses
+    :param fetch_statuses: function(client, resource_ids, since) returning a
+                           dict of resource ID to status for the resources
+                           found. When since is not None, only the resources
+                           changed since that time need to be returned
+    :param resource_id: the ID of the resource to wait upon
+    :param expected_status: the status being awaited (case insensitive)
+    :param fail_statuses: statuses causing the wait to fail immediately with a
+                          StatusError (case insensitive)
+    :param not_found_ok: when True, the wait completes successfully when the
+                         resource can no longer be found (i.e. deletion)
+    :param timeout: the number of seconds to wait
+    :param poll_interval: the maximum number of seconds between queries
+    :param batch_key: waits sharing a key are batched together (i.e. the
+                      keystone session), defaults to the client itself
+    :param incremental: True when fetch_statuses honors the since argument
+    :return: a Future whose result is True once the status is reached or
+             False upon timeout
+    """
+    return wait_for_statuses(
+        client, fetch_statuses, [resource_id], expected_status,
+        fail_statuses=fail_statuses, not_found_ok=not_found_ok,
+        timeout=timeout, poll_interval=poll_interval, batch_key=batch_key,
+        incremental=incremental)[resource_id]
+
+
+def wait_for_statuses(client, fetch_statuses, resource_ids, expected_status,
+                      fail_statuses=None, not_found_ok=False, timeout=300,
+                      poll_interval=3, batch_key=None, incremental=False):
+    """
+    Registers waits for a collection of resources and returns their Futures.
+    See wait_for_status() for a description of the parameters
+    :return: a dict where the key is the resource ID and the value is the
+             Future
+    """
+    poller = __get_poller(
+        fetch_statuses, batch_key if batch_key is not None else client,
+        incremental)
+    deadline = time.time() + timeout
+    futures = dict()
+    for resource_id in resource_ids:
+        futures[resource_id] = poller.add(StatusWait(
+            client, resource_id, expected_status, fail_statuses,
+            not_found_ok, deadline, poll_interval))
+    return futures
+
+
+def wait_for_futures(futures, timeout=None):
+    """
+    Blocks until each Future has completed and returns their results
+    :param futures: a dict of Future objects
+    :param timeout: the maximum number of seconds to wait for each
+    :return: a dict with the same keys holding each result
+    :raise: the first exception raised by a Future
+    """
+    return dict((key, future.result(timeout))
+                for key, future in futures.items())
+
+
+def __get_poller(fetch_statuses, batch_key, incremental):
+    """
+    Returns the StatusPoller responsible for the function and batch key
+    """
+    key = (fetch_statuses, id(batch_key))
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if not poller:
+            poller = StatusPoller(fetch_statuses, incremental)
+            _pollers[key] = poller
+        return poller
+
+
+class StatusWait:
+    """
+    Holds the state of a single resource status wait
+    """
+
+    def __init__(self, client, resource_id, expected_status, fail_statuses,
+                 not_found_ok, deadline, poll_interval):
+        """
+        Constructor
+        :param client: the OpenStack client used to retrieve the status
+        :param resource_id: the resource's ID
+        :param expected_status: the status being awaited
+        :param fail_statuses: the statuses resulting in a failure
+        :param not_found_ok: when True, a missing resource completes the wait
+        :param deadline: the time at which the wait times out
+        :param poll_interval: the maximum number of seconds between queries
+        """
+        self.client = client
+        self.resource_id = resource_id
+        self.expected_status = expected_status.lower()
+        self.fail_statuses = [status.lower() for status in fail_statuses or []]
+        self.not_found_ok = not_found_ok
+        self.deadline = deadline
+        self.poll_interval = poll_interval
+        self.future = Future()
+
+
+class StatusPoller:
+    """
+    Polls the statuses of all registered resources with one call to the fetch
+    function per tick on a background thread that exits once there is
+    nothing left to wait upon. The interval between ticks starts at
+    MIN_POLL_INTERVAL, grows by BACKOFF_FACTOR while no status changes and is
+    randomized by JITTER to avoid polling in lock step
+    """
+
+    def __init__(self, fetch_statuses, incremental=False):
+        """
+        Constructor
+        :param fetch_statuses: the function retrieving the statuses
+        :param incremental: True when fetch_statuses honors its since argument
+        """
+        self.fetch_statuses = fetch_statuses
+        self.incremental = incremental
+        self.__waits = dict()
+        self.__statuses = dict()
+        self.__last_fetch = None
+        self.__full_query = True
+        self.__interval = MIN_POLL_INTERVAL
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__thread = None
+
+    def add(self, wait):
+        """
+        Adds a StatusWait to be polled
+        :param wait: the StatusWait object
+        :return: the wait's Future
+        """
+        with self.__lock:
+            self.__waits.setdefault(wait.resource_id, list()).append(wait)
+            # new resources require a full query to learn their status
+            self.__full_query = True
+            self.__interval = MIN_POLL_INTERVAL
+            if not self.__thread:
+                self.__thread = threading.Thread(
+                    target=self.__run, name='status-poller')
+                self.__thread.daemon = True
+                self.__thread.start()
+            else:
+                self.__wakeup.set()
+        return wait.future
+
+    def __run(self):
+        """
+        Polling loop executed by the background thread
+        """
+        while True:
+            with self.__lock:
+                if not self.__waits:
+                    self.__thread = None
+                    return
+                self.__wakeup.clear()
+                waits = dict((res_id, list(res_waits)) for res_id, res_waits
+                             in self.__waits.items())
+                since = None
+                if self.incremental and not self.__full_query:
+                    since = self.__last_fetch
+                self.__full_query = False
+
+            changed = self.__poll(waits, since)
+
+            with self.__lock:
+                if changed:
+                    self.__interval = MIN_POLL_INTERVAL
+                else:
+                    self.__interval = self.__interval * BACKOFF_FACTOR
+                max_interval = min(
+                    [wait.poll_interval for res_waits in self.__waits.values()
+                     for wait in res_waits] or [MIN_POLL_INTERVAL])
+                interval = min(self.__interval, max(
+                    max_interval, MIN_POLL_INTERVAL))
+
+            self.__wakeup.wait(
+                interval * random.uniform(1 - JITTER, 1 + JITTER))
+
+    def __poll(self, waits, since):
+        """
+        Retrieves the statuses of all waited resources and completes the waits
+        that are done
+        :param waits: dict of resource ID to list of StatusWait objects
+        :param since: the time of the last query or None for a full query
+        :return: True when any status has changed
+        """
+        client = next(iter(waits.values()))[0].client
+        started = time.time()
+        try:
+            statuses = self.fetch_statuses(client, list(waits.keys()), since)
+        except Exception as e:
+            logger.warning('Unable to retrieve resource statuses - %s', e)
+            self.__expire(waits)
+            return False
+
+        changed = False
+        for res_id in waits:
+            if res_id in statuses:
+                status = statuses[res_id]
+            elif since is None:
+                status = STATUS_NOT_FOUND
+            else:
+                status = self.__statuses.get(res_id, STATUS_NOT_FOUND)
+            if self.__statuses.get(res_id, '') != status:
+                changed = True
+            self.__statuses[res_id] = status
+
+        with self.__lock:
+            self.__last_fetch = started
+            for res_id, res_waits in waits.items():
+                status = self.__statuses[res_id]
+                logger.debug('Status of resource %s is - %s', res_id, status)
+                for wait in res_waits:
+                    if self.__complete(wait, status):
+                        self.__remove(wait)
+            for res_id in list(self.__statuses.keys()):
+                if res_id not in self.__waits:
+                    del self.__statuses[res_id]
+
+        self.__expire(waits)
+        return changed
+
+    @staticmethod
+    def __complete(wait, status):
+        """
+        Completes the wait's future when the status is final
+        :return: True when the future has been completed
+        """
+        if status is STATUS_NOT_FOUND:
+            if wait.not_found_ok:
+                wait.future.set_result(True)
+                return True
+            return False
+
+        status = status.lower()
+        if status == wait.expected_status:
+            wait.future.set_result(True)
+            return True
+        if status in wait.fail_statuses:
+            wait.future.set_exception(StatusError(
+                wait.resource_id, status))
+            return True
+        return False
+
+    def __expire(self, waits):
+        """
+        Completes the waits whose deadlines have passed with a False result
+        """
+        now = time.time()
+        with self.__lock:
+            for res_waits in waits.values():
+                for wait in res_waits:
+                    if not wait.future.done() and now >= wait.deadline:
+                        logger.warning(
+                            'Timeout waiting for resource %s status %s',
+                            wait.resource_id, wait.expected_status)
+                        wait.future.set_result(False)
+                        self.__remove(wait)
+
+    def __remove(self, wait):
+        """
+        Removes a completed wait
+        """
+        res_waits = self.__waits.get(wait.resource_id)
+        if res_waits and wait in res_waits:
+            res_waits.remove(wait)
+            if not res_waits:
+                del self.__waits[wait.resource_id]
+
+
+class StatusError(Exception):
+    """
+    Exception raised by a wait's Future when the resource reaches one of the
+    failure statuses
+    """
+
+    def __init__(self, resource_id, status):
+        Exception.__init__(
+            self, 'Resource {} has status {}'.format(resource_id, status))
+        self.resource_id = resource_id
+        self.status = status
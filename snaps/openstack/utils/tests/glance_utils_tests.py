@@ -12,17 +12,21 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import io
 import logging
 import os
 import shutil
+import unittest
 import uuid
 
-from snaps import file_utils
+from snaps import file_utils, image_cache
+from snaps.config.image import ImageConfig
 from snaps.openstack.tests import openstack_tests
 
 from snaps.openstack.tests import validation_utils
 from snaps.openstack.tests.os_source_file_test import OSComponentTestCase
 from snaps.openstack.utils import glance_utils
+from snaps.tests.file_utils_tests import RangeHttpServer
 
 __author__ = 'spisarski'
 
@@ -140,3 +144,181 @@ class GlanceUtilsTests(OSComponentTestCase):
             self.glance, image_settings=file_image_settings)
         self.assertIsNotNone(image)
         validation_utils.objects_equivalent(self.image, image)
+
+
+class UploadStreamUnitTests(unittest.TestCase):
+    """
+    Tests the glance_utils.UploadStream class
+    """
+
+    def test_chunked_reads(self):
+        """
+        Tests that reads return chunk_size blocks until the file is consumed
+        """
+        content = os.urandom(2500)
+        stream = glance_utils.UploadStream(
+            io.BytesIO(content), len(content), chunk_size=1000)
+
+        chunks = list()
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        self.assertEqual([1000, 1000, 500], [len(c) for c in chunks])
+        self.assertEqual(content, b''.join(chunks))
+        self.assertEqual(len(content), stream.sent)
+        self.assertGreaterEqual(stream.throughput(), 0)
+
+    def test_sized_reads(self):
+        """
+        Tests that reads return no more than the requested number of bytes
+        """
+        content = os.urandom(2500)
+        stream = glance_utils.UploadStream(
+            io.BytesIO(content), len(content), chunk_size=1000)
+
+        self.assertEqual(b'', stream.read(0))
+        self.assertEqual(content[:300], stream.read(300))
+        self.assertEqual(content[300:1300], stream.read())
+        self.assertEqual(content[1300:2300], stream.read(None))
+        self.assertEqual(content[2300:], stream.read(5000))
+        self.assertEqual(b'', stream.read(5000))
+        self.assertEqual(len(content), stream.sent)
+
+
+class FakeImages:
+    """
+    Stands in for the glanceclient v2 images controller whose web-download
+    import fails once started
+    """
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.images = dict()
+        self.uploads = dict()
+        self.deleted = list()
+
+    def get_import_info(self):
+        return {'import-methods': {'value': ['glance-direct',
+                                             'web-download']}}
+
+    def create(self, **kwargs):
+        image = dict(kwargs, id=str(uuid.uuid4()), size=None,
+                     status='queued')
+        self.images[image['id']] = image
+        return image
+
+    def image_import(self, image_id, method, uri):
+        pass
+
+    def list(self, filters):
+        return [image for image in self.images.values()
+                if image.get('name') == filters.get('name')]
+
+    def get(self, image_id):
+        image = self.images[image_id]
+        if self.statuses and image_id not in self.uploads:
+            image.update(self.statuses.pop(0))
+        return image
+
+    def upload(self, image_id, stream):
+        data = b''
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            data += chunk
+        self.uploads[image_id] = data
+        self.images[image_id].update(status='active', size=len(data))
+
+    def delete(self, image_id):
+        self.deleted.append(image_id)
+
+
+class FakeGlance:
+    version = glance_utils.VERSION_2
+
+    def __init__(self, statuses):
+        self.images = FakeImages(statuses)
+
+
+class GlanceImportUnitTests(unittest.TestCase):
+    """
+    Tests the fallback of failed web-download imports
+    """
+
+    def setUp(self):
+        self.orig = (glance_utils.WEB_DOWNLOAD_IMPORT,
+                     glance_utils.IMPORT_POLL_INTERVAL,
+                     image_cache.CACHE_ENABLED)
+        glance_utils.WEB_DOWNLOAD_IMPORT = True
+        glance_utils.IMPORT_POLL_INTERVAL = 0
+        image_cache.CACHE_ENABLED = False
+        self.content = os.urandom(5000)
+
+    def tearDown(self):
+        (glance_utils.WEB_DOWNLOAD_IMPORT,
+         glance_utils.IMPORT_POLL_INTERVAL,
+         image_cache.CACHE_ENABLED) = self.orig
+
+    def test_failed_import_uploaded(self):
+        """
+        Tests that an image whose import fails after starting is deleted and
+        uploaded instead
+        """
+        glance = FakeGlance([
+            {'status': 'importing'},
+            {'status': 'queued', 'os_glance_failed_import': 'file1'}])
+        with RangeHttpServer(self.content) as server:
+            image = glance_utils.create_image(glance, ImageConfig(
+                name='foo', image_user='user', img_format='qcow2',
+                url=server.url))
+
+        self.assertEqual(1, len(glance.images.deleted))
+        self.assertEqual(self.content, glance.images.uploads[image.id])
+        self.assertNotIn(image.id, glance.images.deleted)
+
+    def test_import(self):
+        """
+        Tests that an image imported by Glance is not uploaded
+        """
+        glance = FakeGlance([{'status': 'importing'}, {'status': 'active'}])
+        image = glance_utils.create_image(glance, ImageConfig(
+            name='foo', image_user='user', img_format='qcow2',
+            url='http://localhost/foo.img'))
+
+        self.assertEqual('foo', image.name)
+        self.assertEqual(dict(), glance.images.uploads)
+        self.assertEqual([], glance.images.deleted)
+
+
+class GlanceImageAliasUnitTests(unittest.TestCase):
+    """
+    Tests the lookups of image names resolved to existing images
+    """
+
+    def test_get_image_alias(self):
+        """
+        Tests that get_image() returns the image standing in for a name only
+        while the alias is held
+        """
+        glance = FakeGlance([])
+        existing = glance.images.create(name='existing', size=5)
+        self.assertIsNone(glance_utils.get_image(glance, image_name='foo'))
+
+        glance_utils.add_image_alias('foo', existing['id'])
+        try:
+            image = glance_utils.get_image(glance, image_name='foo')
+            self.assertEqual(existing['id'], image.id)
+            self.assertEqual('existing', image.name)
+
+            glance_utils.remove_image_alias('foo', 'other-id')
+            self.assertEqual(existing['id'],
+                             glance_utils.get_image_alias('foo'))
+        finally:
+            glance_utils.remove_image_alias('foo', existing['id'])
+
+        self.assertIsNone(glance_utils.get_image_alias('foo'))
+        self.assertIsNone(glance_utils.get_image(glance, image_name='foo'))
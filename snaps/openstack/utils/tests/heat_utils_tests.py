@@ -19,6 +19,7 @@ import pkg_resources
 import uuid
 
 import time
+import unittest
 
 import snaps.config.stack as stack_config
 from snaps.config.flavor import FlavorConfig
@@ -31,7 +32,7 @@ from snaps.openstack.tests import openstack_tests
 from snaps.openstack.tests.os_source_file_test import OSComponentTestCase
 from snaps.openstack.utils import (
     heat_utils, neutron_utils, nova_utils, settings_utils, glance_utils,
-    cinder_utils, keystone_utils)
+    cinder_utils, keystone_utils, status_utils)
 
 __author__ = 'spisarski'
 
@@ -171,6 +172,11 @@ class HeatUtilsCreateSimpleStackTests(OSComponentTestCase):
         self.assertIsNotNone(resources)
         self.assertEqual(4, len(resources))
 
+        resource_index = heat_utils.get_resource_index(
+            self.heat_client, self.stack1.id)
+        self.assertEqual(1, len(resource_index['OS::Nova::Server']))
+        self.assertEqual(1, len(resource_index['OS::Neutron::Net']))
+
         outputs = heat_utils.get_outputs(self.heat_client, self.stack1)
         self.assertIsNotNone(outputs)
         self.assertEqual(0, len(outputs))
@@ -193,7 +199,7 @@ class HeatUtilsCreateSimpleStackTests(OSComponentTestCase):
             self.os_creds, self.os_session)
         servers = heat_utils.get_stack_servers(
             self.heat_client, nova, neutron, keystone, self.stack1,
-            self.os_creds.project_name)
+            self.os_creds.project_name, resource_index=resource_index)
         self.assertIsNotNone(servers)
         self.assertEqual(1, len(servers))
         self.assertEqual(self.vm_inst_name, servers[0].name)
@@ -847,3 +853,107 @@ def stack_active(heat_cli, stack):
         time.sleep(3)
 
     return is_active
+
+
+class FakeEvents:
+    """
+    Stands in for the heat client's events manager returning one batch of
+    events per call
+    """
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.markers = list()
+
+    def list(self, stack_id, **kwargs):
+        self.markers.append(kwargs.get('marker'))
+        if self.batches:
+            return self.batches.pop(0)
+        return list()
+
+
+class FakeHeatClient:
+    def __init__(self, batches, stack_status):
+        self.events = FakeEvents(batches)
+        self.stacks = self
+        self.stack_status = stack_status
+
+    def get(self, stack_id):
+        return self
+
+
+class FakeEvent:
+    def __init__(self, event_id, name, resource_type, resource_id, status,
+                 event_time):
+        self.id = event_id
+        self.stack_name = 'stack'
+        self.resource_name = name
+        self.resource_type = resource_type
+        self.physical_resource_id = resource_id
+        self.resource_status = status
+        self.resource_status_reason = None
+        self.event_time = event_time
+
+
+class HeatUtilsEventUnitTests(unittest.TestCase):
+    """
+    Tests the StackEventWaiter in heat_utils.py
+    """
+
+    def test_wait_complete(self):
+        """
+        Tests that only new events are requested, the callback receives each
+        event and the timings are recorded by resource type
+        """
+        heat_cli = FakeHeatClient([
+            [FakeEvent('1', 'stack', 'OS::Heat::Stack', 'stack-id',
+                       'CREATE_IN_PROGRESS', '2017-01-01T00:00:00Z'),
+             FakeEvent('2', 'vm', 'OS::Nova::Server', None,
+                       'CREATE_IN_PROGRESS', '2017-01-01T00:00:01Z')],
+            [],
+            [FakeEvent('3', 'vm', 'OS::Nova::Server', 'vm-id',
+                       'CREATE_COMPLETE', '2017-01-01T00:00:31Z'),
+             FakeEvent('4', 'stack', 'OS::Heat::Stack', 'stack-id',
+                       'CREATE_COMPLETE', '2017-01-01T00:00:32Z')]],
+            'CREATE_COMPLETE')
+        received = list()
+        waiter = heat_utils.StackEventWaiter(
+            heat_cli, 'stack-id', callback=received.append)
+
+        self.assertTrue(waiter.wait('CREATE_COMPLETE', poll_interval=0))
+        self.assertEqual([None, '2', '2'], heat_cli.events.markers)
+        self.assertEqual(['1', '2', '3', '4'],
+                         [event.id for event in received])
+        self.assertEqual('4', waiter.marker)
+
+        timings = waiter.timings()
+        self.assertEqual({'count': 1, 'total': 30.0, 'max': 30.0},
+                         timings['OS::Nova::Server'])
+        self.assertEqual(32.0, timings['OS::Heat::Stack']['total'])
+
+    def test_wait_resource_failure(self):
+        """
+        Tests that the wait ends upon the first failed resource
+        """
+        heat_cli = FakeHeatClient([
+            [FakeEvent('1', 'vm', 'OS::Nova::Server', 'vm-id',
+                       'CREATE_FAILED', '2017-01-01T00:00:00Z')]],
+            'CREATE_IN_PROGRESS')
+        waiter = heat_utils.StackEventWaiter(heat_cli, 'stack-id')
+
+        with self.assertRaises(status_utils.StatusError):
+            waiter.wait('CREATE_COMPLETE', fail_statuses=['CREATE_FAILED'],
+                        poll_interval=0)
+
+    def test_wait_replayed_event(self):
+        """
+        Tests that a stack event not matching the stack's current status does
+        not complete the wait
+        """
+        heat_cli = FakeHeatClient([
+            [FakeEvent('1', 'stack', 'OS::Heat::Stack', 'stack-id',
+                       'UPDATE_COMPLETE', '2017-01-01T00:00:00Z')]],
+            'UPDATE_IN_PROGRESS')
+        waiter = heat_utils.StackEventWaiter(heat_cli, 'stack-id')
+        self.assertFalse(waiter.wait(
+            'UPDATE_COMPLETE', timeout=0.05, poll_interval=0.01))
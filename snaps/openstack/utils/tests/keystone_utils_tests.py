@@ -12,10 +12,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import unittest
 import uuid
 
+from keystoneclient.exceptions import Forbidden, NotFound
+
 from snaps.config.project import ProjectConfig
 from snaps.config.user import UserConfig
+from snaps.openstack.os_credentials import OSCreds
 from snaps.openstack.tests.os_source_file_test import OSComponentTestCase
 from snaps.openstack.utils import keystone_utils, neutron_utils
 
@@ -212,3 +216,258 @@ class KeystoneUtilsTests(OSComponentTestCase):
         self.assertIsNotNone(user_roles)
         self.assertEqual(1, len(user_roles))
         self.assertEqual(self.role.id, user_roles[0].id)
+
+
+class KeystoneSessionUnitTests(unittest.TestCase):
+    """
+    Tests the shared session functions in keystone_utils.py
+    """
+
+    def setUp(self):
+        self.os_creds = OSCreds(
+            username='user', password='pass', auth_url='http://foo:5000/v3',
+            project_name='project')
+        self.sessions = list()
+
+    def tearDown(self):
+        for session in self.sessions:
+            keystone_utils.release_session(session)
+
+    def __acquire(self, os_creds):
+        session = keystone_utils.acquire_session(os_creds)
+        self.sessions.append(session)
+        return session
+
+    def test_same_creds_share_session(self):
+        """
+        Tests that the same session is returned for equivalent credentials
+        """
+        session1 = self.__acquire(self.os_creds)
+        session2 = self.__acquire(OSCreds(**self.os_creds.to_dict()))
+        self.assertIs(session1, session2)
+
+    def test_different_creds_different_session(self):
+        """
+        Tests that different credentials do not share a session
+        """
+        other_creds = OSCreds(
+            username='user', password='pass', auth_url='http://foo:5000/v3',
+            project_name='other-project')
+        session1 = self.__acquire(self.os_creds)
+        session2 = self.__acquire(other_creds)
+        self.assertIsNot(session1, session2)
+
+    def test_release_last_reference(self):
+        """
+        Tests that a new session is created once all references to the
+        previous one have been released
+        """
+        session1 = keystone_utils.acquire_session(self.os_creds)
+        session2 = keystone_utils.acquire_session(self.os_creds)
+        self.assertIs(session1, session2)
+
+        keystone_utils.release_session(session1)
+        session3 = self.__acquire(self.os_creds)
+        self.assertIs(session1, session3)
+
+        keystone_utils.release_session(session2)
+        keystone_utils.release_session(session3)
+        self.sessions.remove(session3)
+
+        session4 = self.__acquire(self.os_creds)
+        self.assertIsNot(session1, session4)
+
+
+class ProjectCacheUnitTests(unittest.TestCase):
+    """
+    Tests the project cache functions in keystone_utils.py
+    """
+
+    def setUp(self):
+        keystone_utils.clear_project_caches()
+        self.keystone = FakeKeystone([
+            FakeProject('proj-id-1', 'proj-1'),
+            FakeProject('proj-id-2', 'proj-2')])
+
+    def tearDown(self):
+        keystone_utils.clear_project_caches()
+
+    def test_name_by_id_single_listing(self):
+        """
+        Tests that multiple lookups only list the projects once
+        """
+        self.assertEqual('proj-1', keystone_utils.get_project_name_by_id(
+            self.keystone, 'proj-id-1'))
+        self.assertEqual('proj-2', keystone_utils.get_project_name_by_id(
+            self.keystone, 'proj-id-2'))
+        self.assertEqual('proj-1', keystone_utils.get_project_name_by_id(
+            self.keystone, 'proj-id-1'))
+        self.assertEqual(1, self.keystone.projects.list_count)
+        self.assertEqual(0, self.keystone.projects.get_count)
+
+    def test_id_by_name(self):
+        """
+        Tests the name to ID mapping after warming the cache
+        """
+        self.assertTrue(keystone_utils.warm_project_cache(self.keystone))
+        self.assertEqual('proj-id-2', keystone_utils.get_project_id_by_name(
+            self.keystone, 'proj-2'))
+        self.assertEqual(1, self.keystone.projects.list_count)
+
+    def test_listing_denied(self):
+        """
+        Tests that single project retrievals are used when the credentials
+        cannot list projects
+        """
+        self.keystone.projects.list_denied = True
+        self.assertEqual('proj-1', keystone_utils.get_project_name_by_id(
+            self.keystone, 'proj-id-1'))
+        self.assertEqual('proj-1', keystone_utils.get_project_name_by_id(
+            self.keystone, 'proj-id-1'))
+        self.assertEqual(1, self.keystone.projects.list_count)
+        self.assertEqual(1, self.keystone.projects.get_count)
+
+    def test_expired_entries(self):
+        """
+        Tests that expired entries are not returned
+        """
+        cache = keystone_utils.ProjectCache(ttl=-1)
+        cache.put('proj-id-1', 'proj-1')
+        self.assertIsNone(cache.get_name('proj-id-1'))
+        self.assertIsNone(cache.get_id('proj-1'))
+
+    def test_remove(self):
+        """
+        Tests that removed projects are no longer mapped in either direction
+        """
+        cache = keystone_utils.ProjectCache()
+        cache.put('proj-id-1', 'proj-1')
+        cache.remove('proj-id-1')
+        self.assertIsNone(cache.get_name('proj-id-1'))
+        self.assertIsNone(cache.get_id('proj-1'))
+
+    def test_caches_per_session(self):
+        """
+        Tests that clients of different sessions neither share mappings nor
+        a denied listing
+        """
+        denied = FakeKeystone(self.keystone.projects.projects,
+                              session=FakeSession())
+        denied.projects.list_denied = True
+        permitted = FakeKeystone(self.keystone.projects.projects,
+                                 session=FakeSession())
+
+        self.assertEqual('proj-1', keystone_utils.get_project_name_by_id(
+            denied, 'proj-id-1'))
+        self.assertEqual('proj-2', keystone_utils.get_project_name_by_id(
+            permitted, 'proj-id-2'))
+        self.assertEqual(1, permitted.projects.list_count)
+        self.assertEqual(0, permitted.projects.get_count)
+        self.assertIsNot(keystone_utils.get_project_cache(denied),
+                         keystone_utils.get_project_cache(permitted))
+
+    def test_shared_session_cache(self):
+        """
+        Tests that the clients of a shared session share its cache while
+        those of other credentials do not
+        """
+        os_creds = OSCreds(
+            username='user', password='pass', auth_url='http://foo:5000/v3',
+            project_name='project')
+        other_creds = OSCreds(
+            username='other', password='pass', auth_url='http://foo:5000/v3',
+            project_name='project')
+        session = keystone_utils.acquire_session(os_creds)
+        other_session = keystone_utils.acquire_session(other_creds)
+        try:
+            keystone1 = FakeKeystone(self.keystone.projects.projects,
+                                     session=session)
+            keystone2 = FakeKeystone(self.keystone.projects.projects,
+                                     session=session)
+            other = FakeKeystone(self.keystone.projects.projects,
+                                 session=other_session)
+            self.assertIs(keystone_utils.get_project_cache(keystone1),
+                          keystone_utils.get_project_cache(keystone2))
+            self.assertIsNot(keystone_utils.get_project_cache(keystone1),
+                             keystone_utils.get_project_cache(other))
+        finally:
+            keystone_utils.release_session(session)
+            keystone_utils.release_session(other_session)
+
+    def test_id_by_name_domain(self):
+        """
+        Tests that the name to ID mapping respects the project's domain
+        """
+        keystone = FakeKeystone([
+            FakeProject('proj-id-1', 'proj', 'domain-id-1'),
+            FakeProject('proj-id-2', 'proj', 'domain-id-2')], domains=[
+            FakeProject('domain-id-1', 'domain-1'),
+            FakeProject('domain-id-2', 'domain-2')])
+        self.assertTrue(keystone_utils.warm_project_cache(keystone))
+
+        self.assertEqual('proj-id-2', keystone_utils.get_project_id_by_name(
+            keystone, 'proj', domain_name='domain-2'))
+        self.assertEqual('proj-id-1', keystone_utils.get_project_id_by_name(
+            keystone, 'proj', domain_name='domain-1'))
+        self.assertEqual(1, keystone.projects.list_count)
+        self.assertIsNone(keystone_utils.get_project_id_by_name(
+            keystone, 'proj', domain_name='unknown'))
+
+        cache = keystone_utils.get_project_cache(keystone)
+        self.assertIsNone(cache.get_id('proj'))
+        self.assertEqual('proj-id-2', cache.get_id('proj', 'domain-id-2'))
+
+
+class FakeProject:
+    """
+    Stand-in for an OpenStack project object
+    """
+
+    def __init__(self, proj_id, name, domain_id=None):
+        self.id = proj_id
+        self.name = name
+        self.domain_id = domain_id
+
+
+class FakeProjectManager:
+    """
+    Stand-in for the keystone client project manager that counts calls
+    """
+
+    def __init__(self, projects):
+        self.projects = projects
+        self.list_denied = False
+        self.list_count = 0
+        self.get_count = 0
+
+    def list(self, **kwargs):
+        self.list_count += 1
+        if self.list_denied:
+            raise Forbidden()
+        return self.projects
+
+    def get(self, proj_id):
+        self.get_count += 1
+        for project in self.projects:
+            if project.id == proj_id:
+                return project
+        raise NotFound()
+
+
+class FakeKeystone:
+    """
+    Stand-in for the keystone client
+    """
+
+    def __init__(self, projects, session=None, domains=None):
+        self.version = 'v3'
+        self.projects = FakeProjectManager(projects)
+        self.domains = FakeProjectManager(domains or list())
+        if session:
+            self.session = session
+
+
+class FakeSession:
+    """
+    Stand-in for a session not obtained from acquire_session()
+    """
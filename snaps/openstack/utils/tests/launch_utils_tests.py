@@ -0,0 +1,69 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+
+from snaps.openstack.utils import launch_utils
+
+__author__ = 'spisarski'
+
+
+class LaunchUtilsUnitTests(unittest.TestCase):
+    """
+    Tests the ordering of the ansible configuration entries
+    """
+
+    def test_independent_hosts(self):
+        """
+        Tests that entries without hosts in common do not depend on each
+        other
+        """
+        self.assertEqual({0: set(), 1: set(), 2: set()},
+                         launch_utils.get_ansible_dependencies([
+                             {'hosts': ['vm1', 'vm2']},
+                             {'hosts': ['vm3']},
+                             {'hosts': ['vm4']}]))
+
+    def test_host_overlap(self):
+        """
+        Tests that an entry depends on every prior entry sharing one of its
+        hosts but never on a subsequent one
+        """
+        self.assertEqual({0: set(), 1: set(), 2: {0, 1}, 3: {1, 2}},
+                         launch_utils.get_ansible_dependencies([
+                             {'hosts': ['vm1', 'vm2']},
+                             {'hosts': ['vm3']},
+                             {'hosts': ['vm2', 'vm3']},
+                             {'hosts': ['vm3']}]))
+
+    def test_reboot_dependency(self):
+        """
+        Tests that rebooting a VM orders the entry with those provisioning
+        the VM before and after it
+        """
+        self.assertEqual({0: set(), 1: {0}, 2: {0, 1}},
+                         launch_utils.get_ansible_dependencies([
+                             {'hosts': ['vm1']},
+                             {'hosts': ['vm2'],
+                              'post_processing': {'reboot': ['vm1']}},
+                             {'hosts': ['vm1']}]))
+
+    def test_no_hosts(self):
+        """
+        Tests that entries without hosts or post processing are independent
+        """
+        self.assertEqual({0: set(), 1: set()},
+                         launch_utils.get_ansible_dependencies([
+                             {'hosts': None, 'post_processing': None},
+                             {}]))
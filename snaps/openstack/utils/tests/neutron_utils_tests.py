@@ -93,6 +93,7 @@ class NeutronUtilsNetworkTests(OSComponentTestCase):
         self.keystone = keystone_utils.keystone_client(
             self.os_creds, self.os_session)
         self.network = None
+        self.networks = list()
         self.net_config = openstack_tests.get_pub_net_config(
             project_name=self.os_creds.project_name,
             net_name=guid + '-pub-net')
@@ -104,6 +105,9 @@ class NeutronUtilsNetworkTests(OSComponentTestCase):
         if self.network:
             neutron_utils.delete_network(self.neutron, self.network)
 
+        for network in self.networks:
+            neutron_utils.delete_network(self.neutron, network)
+
         super(self.__class__, self).__clean__()
 
     def test_create_network(self):
@@ -121,6 +125,49 @@ class NeutronUtilsNetworkTests(OSComponentTestCase):
         self.assertEqual(len(self.net_config.network_settings.subnet_settings),
                          len(self.network.subnets))
 
+    def test_create_networks_bulk(self):
+        """
+        Tests the neutron_utils.create_networks_bulk() function
+        """
+        network_settings = self.net_config.network_settings
+        net_configs = [network_settings, NetworkConfig(
+            name=network_settings.name + '-2', subnet_settings=[
+                SubnetConfig(name=network_settings.name + '-2-subnet',
+                             cidr='10.55.2.0/24')])]
+        self.networks = neutron_utils.create_networks_bulk(
+            self.neutron, self.os_creds, net_configs)
+
+        self.assertEqual(2, len(self.networks))
+        for net_config, network in zip(net_configs, self.networks):
+            self.assertEqual(net_config.name, network.name)
+            self.assertEqual(len(net_config.subnet_settings),
+                             len(network.subnets))
+            self.assertTrue(validate_network(
+                self.neutron, self.keystone, net_config.name, True,
+                self.os_creds.project_name))
+
+    def test_get_networks_by_ids(self):
+        """
+        Tests the neutron_utils.get_networks_by_ids() function retrieves the
+        same networks and subnets as get_network_by_id()
+        """
+        network_settings = self.net_config.network_settings
+        self.networks = neutron_utils.create_networks_bulk(
+            self.neutron, self.os_creds, [network_settings, NetworkConfig(
+                name=network_settings.name + '-2', subnet_settings=[
+                    SubnetConfig(name=network_settings.name + '-2-subnet',
+                                 cidr='10.55.2.0/24')])])
+
+        network_ids = [network.id for network in self.networks]
+        networks = neutron_utils.get_networks_by_ids(
+            self.neutron, reversed(network_ids + ['unknown-id']))
+        self.assertEqual(list(reversed(network_ids)),
+                         [network.id for network in networks])
+        for network in networks:
+            self.assertEqual(
+                neutron_utils.get_network_by_id(self.neutron, network.id),
+                network)
+
     def test_create_network_empty_name(self):
         """
         Tests the neutron_utils.create_network() function with an empty
@@ -524,6 +571,7 @@ class NeutronUtilsRouterTests(OSComponentTestCase):
             self.os_creds, self.os_session)
         self.network = None
         self.port = None
+        self.ports = list()
         self.router = None
         self.interface_router = None
         self.net_config = openstack_tests.get_pub_net_config(
@@ -554,6 +602,12 @@ class NeutronUtilsRouterTests(OSComponentTestCase):
             except:
                 pass
 
+        for port in self.ports:
+            try:
+                neutron_utils.delete_port(self.neutron, port)
+            except:
+                pass
+
         if self.network:
             neutron_utils.delete_network(self.neutron, self.network)
 
@@ -619,6 +673,26 @@ class NeutronUtilsRouterTests(OSComponentTestCase):
         validate_interface_router(self.interface_router, self.router,
                                   self.network.subnets[0])
 
+    def test_get_routers_by_ids(self):
+        """
+        Tests the neutron_utils.get_routers_by_ids() function retrieves the
+        same router and interfaces as get_router_by_id()
+        """
+        self.network = neutron_utils.create_network(
+            self.neutron, self.os_creds, self.net_config.network_settings)
+        self.router = neutron_utils.create_router(
+            self.neutron, self.os_creds, self.net_config.router_settings)
+        self.interface_router = neutron_utils.add_interface_router(
+            self.neutron, self.router, self.network.subnets[0])
+
+        routers = neutron_utils.get_routers_by_ids(
+            self.neutron, [self.router.id, 'unknown-id'])
+        self.assertEqual(1, len(routers))
+        self.assertEqual(
+            neutron_utils.get_router_by_id(self.neutron, self.router.id),
+            routers[0])
+        self.assertEqual(1, len(routers[0].port_subnets))
+
     def test_add_interface_router_null_router(self):
         """
         Tests the neutron_utils.add_interface_router() function for an
@@ -720,6 +794,30 @@ class NeutronUtilsRouterTests(OSComponentTestCase):
                 network_name=self.net_config.network_settings.name))
         validate_port(self.neutron, self.port, self.port_name)
 
+    def test_create_ports_bulk(self):
+        """
+        Tests the neutron_utils.create_ports_bulk() function
+        """
+        self.network = neutron_utils.create_network(
+            self.neutron, self.os_creds, self.net_config.network_settings)
+        subnet_setting = self.net_config.network_settings.subnet_settings[0]
+
+        port_configs = [
+            PortConfig(
+                name=self.port_name + '-1',
+                ip_addrs=[{'subnet_name': subnet_setting.name, 'ip': ip_1}],
+                network_name=self.net_config.network_settings.name),
+            PortConfig(
+                name=self.port_name + '-2',
+                network_name=self.net_config.network_settings.name)]
+        self.ports = neutron_utils.create_ports_bulk(
+            self.neutron, self.os_creds, port_configs)
+
+        self.assertEqual(2, len(self.ports))
+        for port_config, port in zip(port_configs, self.ports):
+            validate_port(self.neutron, port, port_config.name)
+        self.assertEqual(ip_1, self.ports[0].ips[0]['ip_address'])
+
     def test_create_port_empty_name(self):
         """
         Tests the neutron_utils.create_port() function
@@ -965,6 +1063,33 @@ class NeutronUtilsSecurityGroupTests(OSComponentTestCase):
         self.assertIsNotNone(sec_grp_get)
         self.assertEqual(self.security_groups[0], sec_grp_get)
 
+    def test_get_sec_grps_by_ids(self):
+        """
+        Tests the neutron_utils.get_security_groups_by_ids() and
+        list_security_groups() functions retrieve the same groups and rules
+        as get_security_group_by_id()
+        """
+        for index in range(3):
+            self.security_groups.append(neutron_utils.create_security_group(
+                self.neutron, self.keystone, SecurityGroupConfig(
+                    name=self.sec_grp_name + '-' + str(index))))
+
+        sec_grp_ids = [sec_grp.id for sec_grp in self.security_groups]
+        sec_grps = neutron_utils.get_security_groups_by_ids(
+            self.neutron, reversed(sec_grp_ids))
+        self.assertEqual(list(reversed(sec_grp_ids)),
+                         [sec_grp.id for sec_grp in sec_grps])
+
+        listed = dict((sec_grp.id, sec_grp) for sec_grp
+                      in neutron_utils.list_security_groups(self.neutron))
+        for sec_grp in sec_grps:
+            expected = neutron_utils.get_security_group_by_id(
+                self.neutron, sec_grp.id)
+            self.assertTrue(validation_utils.objects_equivalent(
+                expected.rules, sec_grp.rules))
+            self.assertTrue(validation_utils.objects_equivalent(
+                expected.rules, listed[sec_grp.id].rules))
+
     def test_create_sec_grp_one_rule(self):
         """
         Tests the neutron_utils.create_security_group() function
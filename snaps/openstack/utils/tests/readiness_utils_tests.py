@@ -0,0 +1,137 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import unittest
+
+from concurrent.futures import Future
+
+from snaps import thread_utils
+from snaps.openstack.utils import readiness_utils
+
+__author__ = 'spisarski'
+
+
+class FakeSettings:
+    def __init__(self, name, ssh_connect_timeout):
+        self.name = name
+        self.ssh_connect_timeout = ssh_connect_timeout
+        self.cloud_init_timeout = 5
+
+
+class FakeVmInstance:
+    """
+    Stands in for an OpenStackVmInstance whose SSH server responds after a
+    number of checks
+    """
+
+    def __init__(self, name, ssh_checks, ssh_connect_timeout=5):
+        self.instance_settings = FakeSettings(name, ssh_connect_timeout)
+        self.ssh_checks = ssh_checks
+        self.cloud_init_checks = 0
+
+    def vm_status_future(self):
+        future = Future()
+        future.set_result(True)
+        return future
+
+    def vm_active(self):
+        return True
+
+    def ssh_probe_address(self):
+        return None
+
+    def check_ssh_active(self, user_override=None, password=None):
+        time.sleep(0.05)
+        self.ssh_checks -= 1
+        return self.ssh_checks <= 0
+
+    def check_cloud_init_complete(self):
+        self.cloud_init_checks += 1
+        return True
+
+
+class BrokenVmInstance(FakeVmInstance):
+    """
+    Stands in for an OpenStackVmInstance that cannot start its ACTIVE wait
+    """
+
+    def vm_status_future(self):
+        raise AttributeError('no VM object')
+
+
+class ReadinessUtilsUnitTests(unittest.TestCase):
+    """
+    Tests the readiness scheduler in readiness_utils.py
+    """
+
+    def tearDown(self):
+        thread_utils.shutdown_pools()
+
+    def test_concurrent_stages(self):
+        """
+        Tests that VMs pass the stages concurrently and are reported as they
+        complete
+        """
+        vm_insts = [FakeVmInstance('vm-' + str(index), 3)
+                    for index in range(8)]
+        reported = list()
+        start = time.time()
+        results = readiness_utils.wait_for_vms(
+            vm_insts, callback=reported.append, max_workers=8,
+            poll_interval=0.05)
+
+        # serial checks would take at least 8 * 3 * 0.05 seconds
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(8, len(reported))
+        self.assertEqual(['vm-' + str(index) for index in range(8)],
+                         [result.name for result in results])
+        for result in results:
+            self.assertTrue(result.ready)
+            self.assertIsNone(result.failed_stage)
+            self.assertEqual(list(readiness_utils.STAGES),
+                             list(result.timings.keys()))
+            self.assertEqual(1, result.vm_inst.cloud_init_checks)
+
+    def test_stage_timeout(self):
+        """
+        Tests that a VM exceeding its SSH timeout fails without blocking the
+        others
+        """
+        slow_vm = FakeVmInstance('slow', 1000, ssh_connect_timeout=0.2)
+        fast_vm = FakeVmInstance('fast', 1)
+        results = readiness_utils.wait_for_vms(
+            [slow_vm, fast_vm], poll_interval=0.05)
+
+        self.assertFalse(results[0].ready)
+        self.assertEqual(readiness_utils.STAGE_SSH, results[0].failed_stage)
+        self.assertNotIn(readiness_utils.STAGE_CLOUD_INIT, results[0].timings)
+        self.assertEqual(0, slow_vm.cloud_init_checks)
+        self.assertTrue(results[1].ready)
+
+    def test_active_wait_error(self):
+        """
+        Tests that a VM failing to start its ACTIVE wait is reported as failed
+        without aborting the others
+        """
+        broken_vm = BrokenVmInstance('broken', 1)
+        good_vm = FakeVmInstance('good', 1)
+        results = readiness_utils.wait_for_vms(
+            [broken_vm, good_vm], poll_interval=0.05)
+
+        self.assertFalse(results[0].ready)
+        self.assertEqual(readiness_utils.STAGE_ACTIVE, results[0].failed_stage)
+        self.assertIsInstance(results[0].error, AttributeError)
+        self.assertEqual(0, broken_vm.cloud_init_checks)
+        self.assertTrue(results[1].ready)
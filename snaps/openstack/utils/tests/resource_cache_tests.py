@@ -0,0 +1,139 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import unittest
+
+from snaps.openstack.utils import resource_cache
+
+__author__ = 'spisarski'
+
+
+class FakeSession:
+    pass
+
+
+class FakeClient:
+    """
+    Client holding a session and the names of its objects
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.names = dict()
+        self.gets = 0
+
+
+@resource_cache.cached('thing', lambda thing_id: thing_id)
+def get_thing(client, thing_id):
+    client.gets += 1
+    return client.names.get(thing_id)
+
+
+@resource_cache.invalidates('thing')
+def rename_thing(client, thing_id, name):
+    client.names[thing_id] = name
+    return get_thing(client, thing_id)
+
+
+class ResourceCacheUnitTests(unittest.TestCase):
+    """
+    Tests the read-through cache in resource_cache.py
+    """
+
+    def setUp(self):
+        self.enabled = resource_cache.CACHE_ENABLED
+        self.ttls = dict(resource_cache.TTLS)
+        self.max_size = resource_cache.MAX_SIZE
+        resource_cache.CACHE_ENABLED = True
+        resource_cache.clear()
+        self.client = FakeClient(FakeSession())
+        self.client.names = {'1': 'one', '2': 'two', '3': 'three'}
+
+    def tearDown(self):
+        resource_cache.CACHE_ENABLED = self.enabled
+        resource_cache.TTLS.clear()
+        resource_cache.TTLS.update(self.ttls)
+        resource_cache.MAX_SIZE = self.max_size
+        resource_cache.clear()
+
+    def test_read_through(self):
+        """
+        Tests that lookups are served from the cache and counted
+        """
+        self.assertEqual('one', get_thing(self.client, '1'))
+        self.assertEqual('one', get_thing(self.client, '1'))
+        self.assertEqual(1, self.client.gets)
+
+        # clients sharing a session share entries
+        other = FakeClient(self.client.session)
+        self.assertEqual('one', get_thing(other, '1'))
+        self.assertEqual(0, other.gets)
+
+        # missing objects are not cached
+        self.assertIsNone(get_thing(self.client, '4'))
+        self.assertIsNone(get_thing(self.client, '4'))
+        self.assertEqual(3, self.client.gets)
+
+        stats = resource_cache.stats()['thing']
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(3, stats['misses'])
+        self.assertEqual(1, stats['size'])
+
+    def test_disabled(self):
+        """
+        Tests that every lookup reaches the client when disabled
+        """
+        resource_cache.CACHE_ENABLED = False
+        get_thing(self.client, '1')
+        get_thing(self.client, '1')
+        self.assertEqual(2, self.client.gets)
+
+    def test_ttl(self):
+        """
+        Tests that entries expire
+        """
+        resource_cache.TTLS['thing'] = 0.05
+        get_thing(self.client, '1')
+        time.sleep(0.1)
+        get_thing(self.client, '1')
+        self.assertEqual(2, self.client.gets)
+        self.assertEqual(1, resource_cache.stats()['thing']['evictions'])
+
+    def test_lru(self):
+        """
+        Tests that the least recently used entry is evicted once full
+        """
+        resource_cache.MAX_SIZE = 2
+        get_thing(self.client, '1')
+        get_thing(self.client, '2')
+        get_thing(self.client, '1')
+        get_thing(self.client, '3')
+        self.assertEqual(3, self.client.gets)
+
+        get_thing(self.client, '1')
+        self.assertEqual(3, self.client.gets)
+        get_thing(self.client, '2')
+        self.assertEqual(4, self.client.gets)
+
+    def test_invalidation(self):
+        """
+        Tests that modifications invalidate the cache and are not cached
+        while in progress
+        """
+        self.assertEqual('one', get_thing(self.client, '1'))
+        self.assertEqual('uno', rename_thing(self.client, '1', 'uno'))
+        self.assertEqual(0, resource_cache.stats()['thing']['size'])
+        self.assertEqual('uno', get_thing(self.client, '1'))
+        self.assertEqual(3, self.client.gets)
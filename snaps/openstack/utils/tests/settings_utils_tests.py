@@ -342,6 +342,16 @@ class SettingsUtilsVmInstTests(OSComponentTestCase):
         self.assertIsNotNone(derived_vm_settings.port_settings)
         self.assertIsNotNone(derived_vm_settings.floating_ip_settings)
 
+        batch_vm_settings = settings_utils.create_vm_inst_configs(
+            self.nova, self.neutron, [server, server])
+        self.assertEqual(2, len(batch_vm_settings))
+        self.assertEqual(derived_vm_settings.name, batch_vm_settings[1].name)
+        self.assertEqual(
+            [port.network_name for port in derived_vm_settings.port_settings],
+            [port.network_name for port in batch_vm_settings[1].port_settings])
+        self.assertEqual(len(derived_vm_settings.floating_ip_settings),
+                         len(batch_vm_settings[1].floating_ip_settings))
+
     def test_derive_image_settings(self):
         """
         Validates the utility function settings_utils#create_image_settings
@@ -0,0 +1,120 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import unittest
+
+from snaps.openstack.utils import status_utils
+
+__author__ = 'spisarski'
+
+
+class FakeCloud:
+    """
+    Holds resource statuses that change after a number of queries
+    """
+
+    def __init__(self, transitions):
+        """
+        :param transitions: dict of resource ID to the list of statuses
+                            returned by each subsequent query where None
+                            denotes a resource that cannot be found
+        """
+        self.transitions = transitions
+        self.queries = list()
+        self.lock = threading.Lock()
+
+    def fetch(self, client, resource_ids, since):
+        with self.lock:
+            self.queries.append((sorted(resource_ids), since))
+            out = dict()
+            for res_id in resource_ids:
+                statuses = self.transitions[res_id]
+                status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+                if status is not None:
+                    out[res_id] = status
+            return out
+
+
+class StatusUtilsUnitTests(unittest.TestCase):
+    """
+    Tests the batched status waiter in status_utils.py
+    """
+
+    def setUp(self):
+        self.min_interval = status_utils.MIN_POLL_INTERVAL
+        status_utils.MIN_POLL_INTERVAL = 0.01
+
+    def tearDown(self):
+        status_utils.MIN_POLL_INTERVAL = self.min_interval
+
+    def test_batched_waits(self):
+        """
+        Tests that the statuses of many resources are retrieved together
+        """
+        cloud = FakeCloud(dict(
+            ('vm-' + str(i), ['BUILD'] * (i + 1) + ['ACTIVE'])
+            for i in range(10)))
+        futures = status_utils.wait_for_statuses(
+            object(), cloud.fetch, sorted(cloud.transitions.keys()),
+            'active', timeout=10, poll_interval=0.05)
+
+        results = status_utils.wait_for_futures(futures)
+        self.assertEqual(10, len(results))
+        self.assertTrue(all(results.values()))
+        self.assertEqual(10, len(cloud.queries[0][0]))
+        self.assertLessEqual(len(cloud.queries), 12)
+
+    def test_fail_status(self):
+        """
+        Tests that a failure status raises a StatusError from the future
+        """
+        cloud = FakeCloud({'vm': ['BUILD', 'ERROR']})
+        future = status_utils.wait_for_status(
+            object(), cloud.fetch, 'vm', 'ACTIVE', fail_statuses=['ERROR'],
+            timeout=10, poll_interval=0.05)
+
+        with self.assertRaises(status_utils.StatusError) as ctx:
+            future.result()
+        self.assertEqual('vm', ctx.exception.resource_id)
+        self.assertEqual('error', ctx.exception.status)
+
+    def test_not_found(self):
+        """
+        Tests that a missing resource only completes deletion waits
+        """
+        client = object()
+        cloud = FakeCloud({'vm1': ['ACTIVE', None], 'vm2': [None]})
+        deleted = status_utils.wait_for_status(
+            client, cloud.fetch, 'vm1', 'DELETED', not_found_ok=True,
+            timeout=10, poll_interval=0.05)
+        active = status_utils.wait_for_status(
+            client, cloud.fetch, 'vm2', 'ACTIVE', timeout=0.2,
+            poll_interval=0.05)
+
+        self.assertTrue(deleted.result())
+        self.assertFalse(active.result())
+
+    def test_incremental(self):
+        """
+        Tests that incremental queries retain the last known statuses
+        """
+        cloud = FakeCloud({'vm': ['BUILD', None, None, 'ACTIVE']})
+        future = status_utils.wait_for_status(
+            object(), cloud.fetch, 'vm', 'ACTIVE', timeout=10,
+            poll_interval=0.05, incremental=True)
+
+        self.assertTrue(future.result())
+        self.assertIsNone(cloud.queries[0][1])
+        self.assertIsNotNone(cloud.queries[-1][1])
@@ -12,12 +12,16 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import logging
 
 from collections import namedtuple
 
 import os
 import paramiko
+import shutil
+import subprocess
+import tempfile
 
 try:
     from ansible.parsing.dataloader import DataLoader
@@ -35,6 +39,10 @@ warn('This utility will be removed in a subsequent release',
 
 logger = logging.getLogger('ansible_utils')
 
+DEFAULT_FORKS = 100
+DEFAULT_TIMEOUT = 30
+ANSIBLE_PLAYBOOK_CMD = ['ansible-playbook']
+
 
 def apply_playbook(playbook_path, hosts_inv=None, host_user=None,
                    ssh_priv_key_file_path=None, password=None, variables=None,
@@ -136,6 +144,158 @@ def apply_playbook(playbook_path, hosts_inv=None, host_user=None,
     return ret_val
 
 
+class ProvisioningExecutor:
+    """
+    Applies playbooks with the ansible-playbook command so playbooks applied
+    by different threads run concurrently in their own processes as the
+    Ansible library is not thread safe. The facts gathered by one playbook are
+    cached on disk and reused by the subsequent playbooks applied to the same
+    hosts
+    """
+
+    def __init__(self, forks=DEFAULT_FORKS, strategy=None, pipelining=False,
+                 control_persist=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Constructor
+        :param forks: the maximum number of hosts to which a task is applied
+                      in parallel
+        :param strategy: the strategy of the plays not declaring their own
+                         (i.e. 'linear' or 'free') (optional)
+        :param pipelining: when True, modules are executed over the existing
+                           SSH session rather than copied to the host first
+                           (requires the hosts' sudoers to not require a tty)
+        :param control_persist: the number of seconds an idle SSH master
+                                connection is retained for subsequent tasks
+                                and playbooks (optional)
+        :param timeout: the SSH connection timeout in seconds
+        """
+        self.forks = forks
+        self.strategy = strategy
+        self.pipelining = pipelining
+        self.control_persist = control_persist
+        self.timeout = timeout
+        self.fact_cache_dir = tempfile.mkdtemp(prefix='snaps-ansible-facts-')
+
+    def apply_playbook(self, playbook_path, hosts_inv=None, host_user=None,
+                       ssh_priv_key_file_path=None, password=None,
+                       variables=None, proxy_setting=None):
+        """
+        Executes an Ansible playbook to the given hosts
+        :param playbook_path: the (relative) path to the Ansible playbook
+        :param hosts_inv: a list of hostnames/ip addresses to which to apply
+                          the Ansible playbook (not required when PB is
+                          configured for localhost)
+        :param host_user: A user for the host instances (not required when PB
+                          is configured for localhost)
+        :param ssh_priv_key_file_path: the file location of the ssh key.
+                                       Required if password is None
+        :param password: the SSH password. Required if ssh_priv_key_file_path
+                         is None
+        :param variables: a dictionary containing any substitution variables
+                          needed by the Jinga 2 templates
+        :param proxy_setting: instance of os_credentials.ProxySettings class
+        :raises AnsibleException when the return code from ansible-playbook
+                is not 0
+        :return: the return code from ansible-playbook only when 0
+        """
+        if not os.path.isfile(playbook_path):
+            raise AnsibleException(
+                'Requested playbook not found - ' + playbook_path)
+
+        pk_file_path = None
+        if ssh_priv_key_file_path:
+            pk_file_path = os.path.expanduser(ssh_priv_key_file_path)
+            if not password:
+                if not os.path.isfile(pk_file_path):
+                    raise AnsibleException(
+                        'Requested private SSH key not found - ' +
+                        pk_file_path)
+
+        command = list(ANSIBLE_PLAYBOOK_CMD) + [
+            playbook_path, '--forks', str(self.forks),
+            '--timeout', str(self.timeout)]
+        if hosts_inv:
+            connection = 'ssh'
+            command.extend(['-i', ','.join(hosts_inv) + ','])
+            if host_user:
+                command.extend(['-u', host_user])
+            if pk_file_path:
+                command.extend(['--private-key', pk_file_path])
+        else:
+            connection = 'local'
+            command.extend(['-i', 'localhost,'])
+        command.extend(['-c', connection])
+
+        if self.control_persist:
+            command.append(
+                '--ssh-common-args=-o ControlMaster=auto '
+                '-o ControlPersist={}s'.format(self.control_persist))
+        if proxy_setting and proxy_setting.ssh_proxy_cmd:
+            command.append('--ssh-extra-args=-o ProxyCommand=\'{}\''.format(
+                proxy_setting.ssh_proxy_cmd))
+
+        extra_vars = dict()
+        if password:
+            extra_vars['ansible_password'] = password
+            extra_vars['ansible_become_password'] = password
+        if variables:
+            extra_vars.update(variables)
+
+        env = dict(os.environ)
+        env.update({
+            'ANSIBLE_HOST_KEY_CHECKING': 'False',
+            'ANSIBLE_RETRY_FILES_ENABLED': 'False',
+            'ANSIBLE_GATHERING': 'smart',
+            'ANSIBLE_CACHE_PLUGIN': 'jsonfile',
+            'ANSIBLE_CACHE_PLUGIN_CONNECTION': self.fact_cache_dir,
+        })
+        if self.strategy:
+            env['ANSIBLE_STRATEGY'] = self.strategy
+        if self.pipelining:
+            env['ANSIBLE_PIPELINING'] = 'True'
+
+        # the variables may hold the password so are not on the command line
+        vars_fd, vars_path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(vars_fd, 'w') as vars_file:
+                json.dump(extra_vars, vars_file)
+            command.extend(['-e', '@' + vars_path])
+
+            logger.debug('Executing Ansible Playbook - ' + playbook_path)
+            ret_val = self.__run(playbook_path, command, env)
+        finally:
+            os.remove(vars_path)
+
+        if ret_val != 0:
+            raise AnsibleException(
+                'Error applying playbook [{}] with value [{}] using the '
+                'connection type of [{}]'.format(
+                    playbook_path, ret_val, connection))
+
+        return ret_val
+
+    def clean(self):
+        """
+        Removes the cached facts
+        """
+        shutil.rmtree(self.fact_cache_dir, ignore_errors=True)
+
+    @staticmethod
+    def __run(playbook_path, command, env):
+        """
+        Runs ansible-playbook logging its output
+        :return: the return code
+        """
+        process = subprocess.Popen(
+            command, env=env, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT)
+        for line in iter(process.stdout.readline, b''):
+            logger.info('%s - %s', os.path.basename(playbook_path),
+                        line.decode('utf-8', 'replace').rstrip())
+        process.stdout.close()
+        return process.wait()
+
+
 def ssh_client(ip, user, private_key_filepath=None, password=None,
                proxy_settings=None):
     """
@@ -0,0 +1,292 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import errno
+import logging
+import os
+import select
+import socket
+import threading
+import time
+
+import paramiko
+
+__author__ = 'spisarski'
+
+"""
+Pool of authenticated SSH connections per host such that repeated checks
+(i.e. VM readiness or cloud-init completion) open channels on an existing
+transport rather than performing a new key exchange on each poll
+"""
+
+logger = logging.getLogger('ssh_pool')
+
+KEEPALIVE_INTERVAL = 30
+PROBE_TIMEOUT = 0.5
+CONNECT_TIMEOUT = 10
+
+_KEY_CLASSES = [
+    getattr(paramiko, name) for name in
+    ('RSAKey', 'ECDSAKey', 'Ed25519Key', 'DSSKey') if hasattr(paramiko, name)]
+
+_keys = dict()
+_keys_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def connection_pool():
+    """
+    Returns the process wide SSHConnectionPool
+    :return: the SSHConnectionPool object
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SSHConnectionPool()
+        return _pool
+
+
+def probe_ports(ips, port=22, timeout=PROBE_TIMEOUT):
+    """
+    Attempts non-blocking TCP connections to many hosts at once, which is far
+    cheaper than an SSH handshake against a port that is not listening yet
+    :param ips: the IPs of the hosts to probe
+    :param port: the TCP port
+    :param timeout: the number of seconds to wait for all of the connections
+    :return: the set of IPs accepting connections
+    """
+    out = set()
+    pending = dict()
+    try:
+        for ip in set(ips):
+            family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            result = sock.connect_ex((ip, port))
+            if result == 0:
+                out.add(ip)
+                sock.close()
+            elif result in (errno.EINPROGRESS, errno.EWOULDBLOCK,
+                            errno.EAGAIN):
+                pending[sock.fileno()] = (sock, ip)
+            else:
+                sock.close()
+
+        end_time = time.time() + timeout
+        while pending and time.time() < end_time:
+            for fileno in __wait_writable(
+                    list(pending), max(0, end_time - time.time())):
+                sock, ip = pending.pop(fileno)
+                if not sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                    out.add(ip)
+                sock.close()
+    finally:
+        for sock, ip in pending.values():
+            sock.close()
+    return out
+
+
+def __wait_writable(filenos, timeout):
+    """
+    Returns the file descriptors which have become writable (i.e. connected
+    or failed) within the timeout. poll() is preferred as select() cannot
+    watch descriptors above FD_SETSIZE
+    """
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        for fileno in filenos:
+            poller.register(fileno, select.POLLOUT)
+        try:
+            events = poller.poll(timeout * 1000)
+        except (select.error, IOError) as e:
+            if e.args[0] != errno.EINTR:
+                raise
+            return list()
+        return [fileno for fileno, event in events]
+
+    try:
+        writable = select.select([], filenos, [], timeout)[1]
+    except (select.error, IOError) as e:
+        if e.args[0] != errno.EINTR:
+            raise
+        return list()
+    return writable
+
+
+def load_private_key(private_key_filepath):
+    """
+    Returns the parsed private key of a file. Keys are retained until the
+    file is modified
+    :param private_key_filepath: the path to the private key file
+    :return: the paramiko PKey object
+    :raise: SSHPoolError when the file cannot be parsed
+    """
+    path = os.path.abspath(os.path.expanduser(private_key_filepath))
+    mtime = os.path.getmtime(path)
+    with _keys_lock:
+        cached = _keys.get(path)
+        if cached and cached[1] == mtime:
+            return cached[0]
+
+    for key_class in _KEY_CLASSES:
+        try:
+            key = key_class.from_private_key_file(path)
+            break
+        except paramiko.SSHException:
+            continue
+    else:
+        raise SSHPoolError('Unable to parse private key ' + path)
+
+    with _keys_lock:
+        _keys[path] = (key, mtime)
+    return key
+
+
+class SSHConnectionPool:
+    """
+    Thread safe pool holding one authenticated SSH connection per host, user
+    and credentials
+    """
+
+    def __init__(self):
+        self.__clients = dict()
+        self.__locks = dict()
+        self.__lock = threading.Lock()
+
+    def get_client(self, ip, user, private_key_filepath=None, password=None,
+                   proxy_settings=None):
+        """
+        Returns the pooled SSH client of a host connecting when there is none
+        or its transport is no longer active. The client must not be closed
+        by the caller, use close() instead
+        :param ip: the IP of the host to connect
+        :param user: the user with which to connect
+        :param private_key_filepath: when None, password is required
+        :param password: when None, private_key_filepath is required
+        :param proxy_settings: instance of os_credentials.ProxySettings class
+                               (optional)
+        :return: the paramiko SSHClient else None when unable to connect
+        """
+        key = (ip, user, private_key_filepath, password)
+        with self.__key_lock(key):
+            client = self.__clients.get(key)
+            if client and self.__is_active(client):
+                return client
+
+            if client:
+                logger.debug('Reconnecting stale SSH connection to %s', ip)
+                client.close()
+            client = self.__connect(
+                ip, user, private_key_filepath, password, proxy_settings)
+            with self.__lock:
+                if client:
+                    self.__clients[key] = client
+                else:
+                    self.__clients.pop(key, None)
+            return client
+
+    def exec_command(self, ip, user, command, private_key_filepath=None,
+                     password=None, proxy_settings=None,
+                     timeout=CONNECT_TIMEOUT):
+        """
+        Executes a command on a new channel of the host's pooled connection.
+        The connection is reestablished once should it have been dropped or
+        the channel not be opened within the timeout, as a transport can
+        still appear active long after its host has gone away (i.e. rebooted)
+        :param ip: the IP of the host
+        :param user: the user with which to connect
+        :param command: the command to execute
+        :param private_key_filepath: when None, password is required
+        :param password: when None, private_key_filepath is required
+        :param proxy_settings: instance of os_credentials.ProxySettings class
+                               (optional)
+        :param timeout: the number of seconds to wait on the channel
+        :return: tuple 2 (exit status, stdout contents) else None when unable
+                 to connect
+        """
+        for attempt in range(2):
+            client = self.get_client(
+                ip, user, private_key_filepath, password, proxy_settings)
+            if not client:
+                return None
+            try:
+                stdin, stdout, stderr = client.exec_command(
+                    command, timeout=timeout)
+                output = stdout.read()
+                return stdout.channel.recv_exit_status(), output
+            except (paramiko.SSHException, EOFError, socket.error) as e:
+                logger.debug('SSH command failed on %s - %s', ip, e)
+                client.close()
+        return None
+
+    def close(self, ip=None):
+        """
+        Closes the pooled connections of a host or all when ip is None
+        :param ip: the host's IP
+        """
+        with self.__lock:
+            keys = [key for key in self.__clients if not ip or key[0] == ip]
+            clients = [self.__clients.pop(key) for key in keys]
+        for client in clients:
+            client.close()
+
+    def __key_lock(self, key):
+        with self.__lock:
+            lock = self.__locks.get(key)
+            if not lock:
+                lock = threading.Lock()
+                self.__locks[key] = lock
+            return lock
+
+    @staticmethod
+    def __is_active(client):
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def __connect(ip, user, private_key_filepath, password, proxy_settings):
+        """
+        Returns a newly authenticated SSH client else None
+        """
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.MissingHostKeyPolicy())
+        try:
+            proxy_cmd = None
+            if proxy_settings and proxy_settings.ssh_proxy_cmd:
+                proxy_cmd_str = str(
+                    proxy_settings.ssh_proxy_cmd.replace('%h', ip))
+                proxy_cmd_str = proxy_cmd_str.replace('%p', '22')
+                proxy_cmd = paramiko.ProxyCommand(proxy_cmd_str)
+
+            pkey = None
+            if not password and private_key_filepath:
+                pkey = load_private_key(private_key_filepath)
+
+            ssh.connect(
+                ip, username=user, pkey=pkey, password=password,
+                sock=proxy_cmd, timeout=CONNECT_TIMEOUT)
+            ssh.get_transport().set_keepalive(KEEPALIVE_INTERVAL)
+            logger.info('Obtained pooled SSH connection to %s', ip)
+            return ssh
+        except Exception as e:
+            ssh.close()
+            logger.debug('Unable to connect via SSH with message - ' + str(e))
+
+
+class SSHPoolError(Exception):
+    """
+    Exception when a pooled SSH connection cannot be established
+    """
@@ -13,6 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
 import uuid
 
 import os
@@ -358,3 +364,149 @@ class AnsibleProvisioningTests(OSIntegrationTestCase):
         finally:
             if test_file:
                 test_file.close()
+
+
+FAKE_ANSIBLE_PLAYBOOK = """
+import json
+import os
+import sys
+import time
+
+start = time.time()
+time.sleep(0.3)
+extra_vars = dict()
+if '-e' in sys.argv:
+    with open(sys.argv[sys.argv.index('-e') + 1][1:]) as vars_file:
+        extra_vars = json.load(vars_file)
+env = dict((key, value) for key, value in os.environ.items()
+           if key.startswith('ANSIBLE_'))
+with open(os.path.join(os.environ['FAKE_RECORD_DIR'],
+                       str(os.getpid()) + '.json'), 'w') as record:
+    json.dump({'argv': sys.argv[1:], 'env': env, 'extra_vars': extra_vars,
+               'start': start, 'end': time.time()}, record)
+print('PLAY RECAP')
+sys.exit(2 if 'fail' in os.path.basename(sys.argv[1]) else 0)
+"""
+
+
+class AnsibleUtilsUnitTests(unittest.TestCase):
+    """
+    Tests the ProvisioningExecutor class with a fake ansible-playbook command
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.record_dir = os.path.join(self.tmp_dir, 'records')
+        os.mkdir(self.record_dir)
+        script_path = os.path.join(self.tmp_dir, 'ansible-playbook.py')
+        with open(script_path, 'w') as script:
+            script.write(FAKE_ANSIBLE_PLAYBOOK)
+        self.playbook_path = os.path.join(self.tmp_dir, 'playbook.yml')
+        open(self.playbook_path, 'w').close()
+
+        self.orig_cmd = ansible_utils.ANSIBLE_PLAYBOOK_CMD
+        ansible_utils.ANSIBLE_PLAYBOOK_CMD = [sys.executable, script_path]
+        os.environ['FAKE_RECORD_DIR'] = self.record_dir
+        self.executor = None
+
+    def tearDown(self):
+        ansible_utils.ANSIBLE_PLAYBOOK_CMD = self.orig_cmd
+        del os.environ['FAKE_RECORD_DIR']
+        if self.executor:
+            self.executor.clean()
+        shutil.rmtree(self.tmp_dir)
+
+    def __records(self):
+        records = list()
+        for name in os.listdir(self.record_dir):
+            with open(os.path.join(self.record_dir, name)) as record:
+                records.append(json.load(record))
+        return sorted(records, key=lambda record: record['start'])
+
+    def test_command_options(self):
+        """
+        Tests that the executor's settings are passed to ansible-playbook
+        """
+        self.executor = ansible_utils.ProvisioningExecutor(
+            forks=7, strategy='free', pipelining=True, control_persist=60)
+        self.executor.apply_playbook(
+            self.playbook_path, ['10.0.0.1', '10.0.0.2'], 'centos',
+            variables={'foo': 'bar'})
+
+        record = self.__records()[0]
+        argv = record['argv']
+        self.assertEqual(self.playbook_path, argv[0])
+        self.assertEqual('7', argv[argv.index('--forks') + 1])
+        self.assertEqual('10.0.0.1,10.0.0.2,', argv[argv.index('-i') + 1])
+        self.assertEqual('centos', argv[argv.index('-u') + 1])
+        self.assertEqual('ssh', argv[argv.index('-c') + 1])
+        self.assertIn('--ssh-common-args=-o ControlMaster=auto '
+                      '-o ControlPersist=60s', argv)
+        self.assertEqual('free', record['env']['ANSIBLE_STRATEGY'])
+        self.assertEqual('True', record['env']['ANSIBLE_PIPELINING'])
+        self.assertEqual('False', record['env']['ANSIBLE_HOST_KEY_CHECKING'])
+        self.assertEqual({'foo': 'bar'}, record['extra_vars'])
+        self.assertFalse(os.path.exists(argv[argv.index('-e') + 1][1:]))
+
+    def test_local_connection(self):
+        """
+        Tests that playbooks without hosts are applied to localhost
+        """
+        self.executor = ansible_utils.ProvisioningExecutor()
+        self.executor.apply_playbook(self.playbook_path)
+
+        record = self.__records()[0]
+        argv = record['argv']
+        self.assertEqual('localhost,', argv[argv.index('-i') + 1])
+        self.assertEqual('local', argv[argv.index('-c') + 1])
+        self.assertNotIn('ANSIBLE_STRATEGY', record['env'])
+        self.assertNotIn('ANSIBLE_PIPELINING', record['env'])
+
+    def test_concurrent_runs(self):
+        """
+        Tests that playbooks applied by different threads run at the same
+        time sharing the cached facts
+        """
+        self.executor = ansible_utils.ProvisioningExecutor()
+
+        def apply_playbook(index):
+            self.executor.apply_playbook(
+                self.playbook_path, ['10.0.0.' + str(index)])
+
+        threads = [threading.Thread(target=apply_playbook, args=(index,))
+                   for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        records = self.__records()
+        self.assertEqual(4, len(records))
+        self.assertTrue(any(
+            later['start'] < earlier['end']
+            for earlier, later in zip(records, records[1:])))
+        for record in records:
+            self.assertEqual(self.executor.fact_cache_dir,
+                             record['env']['ANSIBLE_CACHE_PLUGIN_CONNECTION'])
+            self.assertEqual('jsonfile', record['env']['ANSIBLE_CACHE_PLUGIN'])
+
+        self.executor.clean()
+        self.assertFalse(os.path.exists(self.executor.fact_cache_dir))
+
+    def test_playbook_failure(self):
+        """
+        Tests that a failed playbook raises an AnsibleException
+        """
+        fail_path = os.path.join(self.tmp_dir, 'fail.yml')
+        open(fail_path, 'w').close()
+        self.executor = ansible_utils.ProvisioningExecutor()
+        with self.assertRaises(ansible_utils.AnsibleException):
+            self.executor.apply_playbook(fail_path, ['10.0.0.1'])
+
+    def test_playbook_not_found(self):
+        """
+        Tests that a missing playbook raises an AnsibleException
+        """
+        self.executor = ansible_utils.ProvisioningExecutor()
+        with self.assertRaises(ansible_utils.AnsibleException):
+            self.executor.apply_playbook(self.playbook_path + '.missing')
@@ -0,0 +1,170 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+
+import paramiko
+
+from snaps.provisioning import ssh_pool
+
+__author__ = 'spisarski'
+
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+        self.responsive = True
+
+    def is_active(self):
+        return self.active
+
+    def set_keepalive(self, interval):
+        pass
+
+
+class FakeChannel:
+    def recv_exit_status(self):
+        return 0
+
+
+class FakeStdout:
+    channel = FakeChannel()
+
+    def read(self):
+        return b''
+
+
+class FakeSSHClient:
+    """
+    Stands in for paramiko.SSHClient recording the connections made
+    """
+    connects = list()
+
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.closed = False
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, ip, **kwargs):
+        FakeSSHClient.connects.append((ip, kwargs))
+
+    def exec_command(self, command, timeout=None):
+        if not self.transport.responsive:
+            raise socket.timeout('timed out')
+        return None, FakeStdout(), None
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+        self.transport.active = False
+
+
+class SSHPoolUnitTests(unittest.TestCase):
+    """
+    Tests the connection pool and key cache in ssh_pool.py
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.key_file = os.path.join(self.tmp_dir, 'id_rsa')
+        paramiko.RSAKey.generate(1024).write_private_key_file(self.key_file)
+
+        self.ssh_client = ssh_pool.paramiko.SSHClient
+        ssh_pool.paramiko.SSHClient = FakeSSHClient
+        FakeSSHClient.connects = list()
+        self.pool = ssh_pool.SSHConnectionPool()
+
+    def tearDown(self):
+        ssh_pool.paramiko.SSHClient = self.ssh_client
+        self.pool.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key_cached(self):
+        """
+        Tests that a key file is only parsed again once modified
+        """
+        key = ssh_pool.load_private_key(self.key_file)
+        self.assertIs(key, ssh_pool.load_private_key(self.key_file))
+
+        paramiko.RSAKey.generate(1024).write_private_key_file(self.key_file)
+        os.utime(self.key_file, (0, 0))
+        self.assertIsNot(key, ssh_pool.load_private_key(self.key_file))
+
+    def test_connection_reused(self):
+        """
+        Tests that a host's connection is reused while active and
+        reestablished once stale
+        """
+        client = self.pool.get_client('10.0.0.1', 'user', self.key_file)
+        self.assertIs(client,
+                      self.pool.get_client('10.0.0.1', 'user', self.key_file))
+        self.assertEqual(1, len(FakeSSHClient.connects))
+        self.assertIsInstance(FakeSSHClient.connects[0][1]['pkey'],
+                              paramiko.RSAKey)
+
+        client.transport.active = False
+        new_client = self.pool.get_client('10.0.0.1', 'user', self.key_file)
+        self.assertIsNot(client, new_client)
+        self.assertTrue(client.closed)
+        self.assertEqual(2, len(FakeSSHClient.connects))
+
+        self.pool.close('10.0.0.1')
+        self.assertTrue(new_client.closed)
+
+    def test_exec_command_reconnects(self):
+        """
+        Tests that a command is executed on a new connection when the pooled
+        transport appears active but no longer responds
+        """
+        client = self.pool.get_client('10.0.0.1', 'user', self.key_file)
+        client.transport.responsive = False
+
+        self.assertEqual((0, b''), self.pool.exec_command(
+            '10.0.0.1', 'user', 'true', self.key_file))
+        self.assertTrue(client.closed)
+        self.assertEqual(2, len(FakeSSHClient.connects))
+
+    def test_probe_ports(self):
+        """
+        Tests that only listening ports are reported without waiting for the
+        probe timeout
+        """
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        open_port = listener.getsockname()[1]
+
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        try:
+            self.assertEqual({'127.0.0.1'}, ssh_pool.probe_ports(
+                ['127.0.0.1'], port=open_port, timeout=5))
+            start = time.time()
+            self.assertEqual(set(), ssh_pool.probe_ports(
+                ['127.0.0.1'], port=closed_port, timeout=5))
+            self.assertLess(time.time() - start, 1)
+        finally:
+            listener.close()
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import logging
+import sys
 import unittest
 
 from snaps.config.tests.cluster_template_tests import (
@@ -48,7 +49,8 @@ from snaps.domain.test.project_tests import (
     ComputeQuotasDomainObjectTests, NetworkQuotasDomainObjectTests)
 from snaps.domain.test.role_tests import RoleDomainObjectTests
 from snaps.domain.test.stack_tests import (
-    StackDomainObjectTests, ResourceDomainObjectTests)
+    StackDomainObjectTests, ResourceDomainObjectTests,
+    EventDomainObjectTests)
 from snaps.domain.test.user_tests import UserDomainObjectTests
 from snaps.domain.test.vm_inst_tests import (
     VmInstDomainObjectTests, FloatingIpDomainObjectTests)
@@ -112,13 +114,16 @@ from snaps.openstack.utils.tests.cinder_utils_tests import (
     CinderUtilsAddEncryptionTests, CinderUtilsVolumeTypeCompleteTests,
     CinderUtilsVolumeTests)
 from snaps.openstack.utils.tests.glance_utils_tests import (
-    GlanceSmokeTests, GlanceUtilsTests)
+    GlanceImageAliasUnitTests, GlanceImportUnitTests, GlanceSmokeTests,
+    GlanceUtilsTests, UploadStreamUnitTests)
 from snaps.openstack.utils.tests.heat_utils_tests import (
     HeatSmokeTests, HeatUtilsCreateSimpleStackTests,
     HeatUtilsCreateComplexStackTests, HeatUtilsFlavorTests,
-    HeatUtilsKeypairTests, HeatUtilsVolumeTests, HeatUtilsSecurityGroupTests)
+    HeatUtilsKeypairTests, HeatUtilsVolumeTests, HeatUtilsSecurityGroupTests,
+    HeatUtilsEventUnitTests)
 from snaps.openstack.utils.tests.keystone_utils_tests import (
-    KeystoneSmokeTests, KeystoneUtilsTests)
+    KeystoneSmokeTests, KeystoneUtilsTests, KeystoneSessionUnitTests,
+    ProjectCacheUnitTests)
 from snaps.openstack.utils.tests.neutron_utils_tests import (
     NeutronSmokeTests, NeutronUtilsNetworkTests, NeutronUtilsSubnetTests,
     NeutronUtilsRouterTests, NeutronUtilsSecurityGroupTests,
@@ -128,11 +133,25 @@ from snaps.openstack.utils.tests.nova_utils_tests import (
     NovaUtilsInstanceTests, NovaUtilsInstanceVolumeTests)
 from snaps.openstack.utils.tests.settings_utils_tests import (
     SettingsUtilsUnitTests)
+from snaps.openstack.utils.tests.status_utils_tests import (
+    StatusUtilsUnitTests)
+from snaps.openstack.utils.tests.resource_cache_tests import (
+    ResourceCacheUnitTests)
+from snaps.openstack.utils.tests.readiness_utils_tests import (
+    ReadinessUtilsUnitTests)
+from snaps.openstack.utils.tests.launch_utils_tests import (
+    LaunchUtilsUnitTests)
 from snaps.openstack.utils.tests.magnum_utils_tests import (
     MagnumSmokeTests, MagnumUtilsClusterTypeTests)
 from snaps.provisioning.tests.ansible_utils_tests import (
-    AnsibleProvisioningTests)
+    AnsibleProvisioningTests, AnsibleUtilsUnitTests)
+from snaps.provisioning.tests.ssh_pool_tests import SSHPoolUnitTests
 from snaps.tests.file_utils_tests import FileUtilsTests
+from snaps.tests.image_cache_tests import ImageCacheTests
+from snaps.tests.thread_utils_tests import ThreadUtilsTests
+
+if sys.version_info >= (3, 5):
+    from snaps.openstack.tests.aio_tests import AsyncOpenStackUnitTests
 
 __author__ = 'spisarski'
 
@@ -144,6 +163,10 @@ def add_unit_tests(suite):
     :return: None as the tests will be adding to the 'suite' parameter object
     """
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(FileUtilsTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        ThreadUtilsTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        ImageCacheTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
         ProxySettingsUnitTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
@@ -236,6 +259,8 @@ def add_unit_tests(suite):
         StackDomainObjectTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
         ResourceDomainObjectTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        EventDomainObjectTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
         StackConfigUnitTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
@@ -270,6 +295,33 @@ def add_unit_tests(suite):
         ClusterTemplateUnitTests))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
         SettingsUtilsUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        KeystoneSessionUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        ProjectCacheUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        StatusUtilsUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        ResourceCacheUnitTests))
+    if sys.version_info >= (3, 5):
+        suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+            AsyncOpenStackUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        HeatUtilsEventUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        SSHPoolUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        ReadinessUtilsUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        AnsibleUtilsUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        LaunchUtilsUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        UploadStreamUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        GlanceImportUnitTests))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+        GlanceImageAliasUnitTests))
 
 
 def add_openstack_client_tests(suite, os_creds, ext_net_name,
@@ -12,12 +12,19 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import os
 import pkg_resources
+import threading
 import unittest
 import shutil
 import uuid
 
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
 from snaps import file_utils
 from snaps.openstack.tests import openstack_tests
 
@@ -38,6 +45,7 @@ class FileUtilsTests(unittest.TestCase):
 
         self.tmpFile = self.test_dir + '/bar.txt'
         self.tmp_file_opened = None
+        self.content = os.urandom(10000)
 
     def tearDown(self):
         if self.tmp_file_opened:
@@ -104,6 +112,70 @@ class FileUtilsTests(unittest.TestCase):
             image_file.name.endswith("cirros-0.3.4-x86_64-disk.img"))
         self.assertTrue(image_file.name.startswith(self.test_dir))
 
+    def testStreamingDownload(self):
+        """
+        Tests the file_utils.fetch() method streams the contents in chunks
+        while hashing them and reporting progress
+        """
+        with RangeHttpServer(self.content) as server:
+            progress = list()
+            result = file_utils.fetch(
+                server.url, self.tmpFile, chunk_size=1000,
+                hash_algorithms=['md5', 'sha256'],
+                progress_callback=lambda done, total: progress.append(
+                    (done, total)))
+
+        self.assertEqual(self.tmpFile, result.name)
+        self.assertEqual(len(self.content), result.size)
+        self.assertEqual(hashlib.md5(self.content).hexdigest(),
+                         result.digests['md5'])
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(),
+                         result.digests['sha256'])
+        self.assertEqual(10, len(progress))
+        self.assertEqual((len(self.content), len(self.content)), progress[-1])
+        self.assertFalse(os.path.exists(
+            self.tmpFile + file_utils.PARTIAL_SUFFIX))
+        with open(self.tmpFile, 'rb') as the_file:
+            self.assertEqual(self.content, the_file.read())
+
+    def testSegmentedDownload(self):
+        """
+        Tests the file_utils.fetch() method with concurrent Range requests
+        """
+        min_segment_size = file_utils.MIN_SEGMENT_SIZE
+        file_utils.MIN_SEGMENT_SIZE = 1000
+        try:
+            with RangeHttpServer(self.content) as server:
+                result = file_utils.fetch(
+                    server.url, self.tmpFile, chunk_size=512, segments=4,
+                    hash_algorithms=['sha256'])
+                self.assertEqual(5, len(server.requests))
+        finally:
+            file_utils.MIN_SEGMENT_SIZE = min_segment_size
+
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(),
+                         result.digests['sha256'])
+        with open(self.tmpFile, 'rb') as the_file:
+            self.assertEqual(self.content, the_file.read())
+
+    def testResumeDownload(self):
+        """
+        Tests the file_utils.fetch() method continues a partial download
+        """
+        with open(self.tmpFile + file_utils.PARTIAL_SUFFIX, 'wb') as part:
+            part.write(self.content[:4000])
+
+        with RangeHttpServer(self.content) as server:
+            result = file_utils.fetch(
+                server.url, self.tmpFile, resume=True,
+                hash_algorithms=['sha256'])
+            self.assertEqual('bytes=4000-', server.requests[0])
+
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(),
+                         result.digests['sha256'])
+        with open(self.tmpFile, 'rb') as the_file:
+            self.assertEqual(self.content, the_file.read())
+
     def testReadOSEnvFile(self):
         """
         Tests that the OS Environment file is correctly parsed
@@ -133,3 +205,60 @@ class FileUtilsTests(unittest.TestCase):
 
         file_contents = file_utils.read_file(self.tmpFile)
         self.assertEqual(test_val, file_contents)
+
+
+class RangeHttpServer:
+    """
+    Local HTTP server returning the same content for every GET request that
+    honors single Range headers and records the Range header of each request
+    (or 'HEAD' for HEAD requests)
+    """
+
+    def __init__(self, content, etag=None):
+        self.content = content
+        self.etag = etag
+        self.requests = list()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                server.requests.append('HEAD')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(server.content)))
+                if server.etag:
+                    self.send_header('ETag', server.etag)
+                self.end_headers()
+
+            def do_GET(self):
+                range_header = self.headers.get('Range')
+                server.requests.append(range_header)
+                body = server.content
+                if range_header:
+                    start, end = range_header.split('=')[1].split('-')
+                    end = int(end) if end else len(body) - 1
+                    body = body[int(start):end + 1]
+                    self.send_response(206)
+                else:
+                    self.send_response(200)
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/file.img'.format(
+            self.httpd.server_address[1])
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
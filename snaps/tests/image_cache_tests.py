@@ -0,0 +1,168 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import os
+import shutil
+import socket
+import unittest
+import uuid
+
+from snaps import file_utils
+from snaps.image_cache import ImageCache
+from snaps.tests.file_utils_tests import RangeHttpServer
+
+__author__ = 'spisarski'
+
+
+class ImageCacheTests(unittest.TestCase):
+    """
+    Tests the ImageCache class in image_cache.py
+    """
+
+    def setUp(self):
+        self.cache_dir = 'tmp/' + self.__class__.__name__ + '-' + str(
+            uuid.uuid4())
+        self.cache = ImageCache(self.cache_dir, 25000)
+        self.content = os.urandom(10000)
+
+    def tearDown(self):
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+    def test_cache_hit(self):
+        """
+        Tests that a cached URL is only revalidated and not downloaded again
+        """
+        with RangeHttpServer(self.content, etag='"v1"') as server:
+            with self.cache.get(server.url) as cached:
+                self.assertEqual(len(self.content), cached.size)
+                self.assertEqual(hashlib.sha256(self.content).hexdigest(),
+                                 cached.sha256)
+                self.assertEqual(hashlib.md5(self.content).hexdigest(),
+                                 cached.md5)
+            with self.cache.get(server.url) as cached:
+                with open(cached.name, 'rb') as the_file:
+                    self.assertEqual(self.content, the_file.read())
+
+        self.assertEqual(['HEAD', None, 'HEAD'], server.requests)
+
+    def test_stale_etag(self):
+        """
+        Tests that a changed ETag causes the contents to be downloaded again
+        """
+        with RangeHttpServer(self.content, etag='"v1"') as server:
+            self.cache.get(server.url).close()
+            server.content = os.urandom(10000)
+            server.etag = '"v2"'
+            with self.cache.get(server.url) as cached:
+                self.assertEqual(
+                    hashlib.sha256(server.content).hexdigest(), cached.sha256)
+
+        self.assertEqual(['HEAD', None, 'HEAD', None], server.requests)
+
+    def test_corrupted_file(self):
+        """
+        Tests that a cached file failing the integrity check is replaced
+        """
+        with RangeHttpServer(self.content, etag='"v1"') as server:
+            with self.cache.get(server.url) as cached:
+                path = cached.name
+            with open(path, 'r+b') as the_file:
+                the_file.write(b'corrupt')
+            with self.cache.get(server.url) as cached:
+                with open(cached.name, 'rb') as the_file:
+                    self.assertEqual(self.content, the_file.read())
+
+        self.assertEqual(['HEAD', None, 'HEAD', None], server.requests)
+
+    def test_lru_eviction(self):
+        """
+        Tests that the least recently used unlocked files are evicted once
+        the maximum size is exceeded
+        """
+        contents = [os.urandom(10000) for _ in range(3)]
+        digests = list()
+        for content in contents:
+            with RangeHttpServer(content) as server:
+                with self.cache.get(server.url) as cached:
+                    digests.append(cached.sha256)
+
+        objects = os.listdir(os.path.join(self.cache_dir, 'objects'))
+        self.assertEqual(2, len(objects))
+        self.assertNotIn(digests[0], objects)
+        self.assertLessEqual(self.cache.size(), 25000)
+
+    def test_failed_download_removed(self):
+        """
+        Tests that the partial file of a failed download is removed
+        """
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        url = 'http://127.0.0.1:{}/image.img'.format(closed.getsockname()[1])
+        closed.close()
+
+        with self.assertRaises(Exception):
+            self.cache.get(url)
+        self.assertEqual(
+            [], os.listdir(os.path.join(self.cache_dir, 'objects')))
+
+    def test_orphan_removed(self):
+        """
+        Tests that unlocked partial files left by interrupted downloads are
+        removed
+        """
+        orphan = os.path.join(self.cache_dir, 'objects', 'tmp-orphan')
+        with open(orphan, 'wb') as orphan_file:
+            orphan_file.write(b'partial')
+        os.utime(orphan, (0, 0))
+
+        with RangeHttpServer(self.content) as server:
+            with self.cache.get(server.url) as cached:
+                self.assertEqual(len(self.content), cached.size)
+
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_eviction_during_download(self):
+        """
+        Tests that the partial file of a download in progress is not removed
+        as an orphan when another cache evicts files
+        """
+        other_cache = ImageCache(self.cache_dir, 25000)
+        fetch = file_utils.fetch
+        partial_files = list()
+
+        def evicting_fetch(url, file_path, **kwargs):
+            def evict(done, total):
+                if not partial_files:
+                    partial_files.extend(os.listdir(
+                        os.path.join(self.cache_dir, 'objects')))
+                    with RangeHttpServer(os.urandom(10000)) as other_server:
+                        other_cache.get(other_server.url).close()
+            return fetch(url, file_path, chunk_size=1000,
+                         progress_callback=evict, **kwargs)
+
+        file_utils.fetch = evicting_fetch
+        try:
+            with RangeHttpServer(self.content) as server:
+                with self.cache.get(server.url) as cached:
+                    with open(cached.name, 'rb') as the_file:
+                        self.assertEqual(self.content, the_file.read())
+        finally:
+            file_utils.fetch = fetch
+
+        self.assertTrue(any(name.endswith(file_utils.PARTIAL_SUFFIX)
+                            for name in partial_files))
+        self.assertEqual(2, len(os.listdir(
+            os.path.join(self.cache_dir, 'objects'))))
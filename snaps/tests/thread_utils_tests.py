@@ -0,0 +1,185 @@
+# Copyright (c) 2017 Cable Television Laboratories, Inc. ("CableLabs")
+#                    and others.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import threading
+import time
+import unittest
+
+from snaps import thread_utils
+
+__author__ = 'spisarski'
+
+
+class ThreadUtilsTests(unittest.TestCase):
+    """
+    Tests the methods in thread_utils.py
+    """
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.executed = list()
+
+    def __record(self, node):
+        with self.lock:
+            self.executed.append(node)
+        return node + '-result'
+
+    def test_execute_graph_order(self):
+        """
+        Tests that nodes are only executed after their dependencies
+        """
+        deps = {'net': [], 'image': [], 'router': ['net'],
+                'vm': ['net', 'image', 'router']}
+        results = thread_utils.execute_graph(deps, self.__record)
+
+        self.assertEqual(4, len(results))
+        self.assertEqual('vm-result', results['vm'])
+        self.assertEqual('vm', self.executed[-1])
+        self.assertLess(self.executed.index('net'),
+                        self.executed.index('router'))
+
+    def test_execute_graph_reverse(self):
+        """
+        Tests that nodes are executed after their dependents when reversed
+        """
+        deps = {'net': [], 'image': [], 'router': ['net'],
+                'vm': ['net', 'image', 'router']}
+        thread_utils.execute_graph(deps, self.__record, reverse=True)
+
+        self.assertEqual('vm', self.executed[0])
+        self.assertLess(self.executed.index('router'),
+                        self.executed.index('net'))
+
+    def test_execute_graph_unknown_dependency(self):
+        """
+        Tests that dependencies not contained in the graph are ignored
+        """
+        results = thread_utils.execute_graph(
+            {'router': ['ext-net']}, self.__record)
+        self.assertEqual({'router': 'router-result'}, results)
+
+    def test_execute_graph_concurrent(self):
+        """
+        Tests that independent nodes are executed concurrently
+        """
+        def sleep_task(node):
+            time.sleep(0.5)
+
+        start = time.time()
+        thread_utils.execute_graph(
+            dict(('node-' + str(ctr), []) for ctr in range(4)), sleep_task,
+            max_workers=4)
+        self.assertLess(time.time() - start, 1.5)
+
+    def test_execute_graph_failure(self):
+        """
+        Tests that dependents of a failed node are not executed
+        """
+        def fail_task(node):
+            if node == 'net':
+                raise ValueError('net failure')
+            self.__record(node)
+
+        with self.assertRaises(ValueError):
+            thread_utils.execute_graph(
+                {'net': [], 'router': ['net']}, fail_task)
+        self.assertNotIn('router', self.executed)
+
+    def test_execute_graph_cycle(self):
+        """
+        Tests that cyclic dependencies raise an error
+        """
+        with self.assertRaises(thread_utils.GraphCycleError):
+            thread_utils.execute_graph(
+                {'a': ['b'], 'b': ['a'], 'c': []}, self.__record)
+        self.assertEqual(['c'], self.executed)
+
+    def test_worker_pool(self):
+        """
+        Tests that worker_pool() still returns the shared ThreadPool
+        """
+        try:
+            pool = thread_utils.worker_pool(10)
+            self.assertIs(pool, thread_utils.worker_pool())
+            self.assertEqual([1, 4, 9],
+                             pool.map(lambda x: x * x, [1, 2, 3]))
+            self.assertEqual(4, pool.apply_async(len, ('snap',)).get())
+        finally:
+            thread_utils.shutdown_pools()
+
+    def test_named_pool_sizes(self):
+        """
+        Tests that pools are sized by the environment, POOL_SIZES and the
+        requested size in that order of precedence
+        """
+        thread_utils.POOL_SIZES['test-conf'] = 3
+        os.environ['SNAPS_TEST-ENV_POOL_SIZE'] = '4'
+        try:
+            self.assertEqual(3, thread_utils.named_pool('test-conf', 7).size)
+            self.assertEqual(4, thread_utils.named_pool('test-env', 7).size)
+            self.assertEqual(7, thread_utils.named_pool('test-arg', 7).size)
+            self.assertIs(thread_utils.named_pool('test-arg'),
+                          thread_utils.named_pool('test-arg'))
+        finally:
+            del thread_utils.POOL_SIZES['test-conf']
+            del os.environ['SNAPS_TEST-ENV_POOL_SIZE']
+            thread_utils.shutdown_pools()
+
+    def test_nested_submission_inline(self):
+        """
+        Tests that tasks submitted from within a full pool do not deadlock
+        """
+        pool = thread_utils.named_pool('test-nested', 1)
+
+        def outer(node):
+            return pool.apply_async(self.__record, (node,)).get(timeout=5)
+
+        try:
+            self.assertEqual('a-result',
+                             pool.apply_async(outer, ('a',)).get(timeout=5))
+            stats = pool.stats()
+            self.assertEqual(1, stats['submitted'])
+            self.assertEqual(1, stats['completed'])
+            self.assertEqual(1, stats['inline'])
+        finally:
+            thread_utils.shutdown_pools()
+
+    def test_pool_stats(self):
+        """
+        Tests the pool metrics including failed tasks
+        """
+        pool = thread_utils.named_pool('test-stats', 2)
+
+        def fail_task():
+            raise ValueError('failure')
+
+        try:
+            workers = [pool.apply_async(time.sleep, (0.05,))
+                       for _ in range(4)]
+            failed = pool.apply_async(fail_task)
+            for worker in workers:
+                worker.get()
+            with self.assertRaises(ValueError):
+                failed.get()
+
+            stats = thread_utils.pool_stats()['test-stats']
+            self.assertEqual(5, stats['submitted'])
+            self.assertEqual(5, stats['completed'])
+            self.assertEqual(1, stats['failed'])
+            self.assertEqual(0, stats['queued'])
+            self.assertGreater(stats['max_queued'], 0)
+            self.assertGreater(stats['avg_wait'], 0)
+        finally:
+            thread_utils.shutdown_pools()
@@ -12,16 +12,341 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import logging
+import os
+import threading
+import time
 
 from multiprocessing.pool import ThreadPool
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+logger = logging.getLogger('thread_utils')
+
+DEFAULT_POOL = 'default'
+DEFAULT_POOL_SIZE = 5
+
+# Number of threads per named pool, others use DEFAULT_POOL_SIZE. A pool's
+# size may also be set with the environment variable SNAPS_<NAME>_POOL_SIZE
+# (i.e. SNAPS_NOVA_POOL_SIZE=10) which takes precedence
+POOL_SIZES = dict()
+
 _pool = None
+_pools = dict()
+_pools_lock = threading.Lock()
+_local = threading.local()
 
 
 # Define a thread pool with a limit for how many simultaneous API requests
 # can be in progress at once.
 def worker_pool(size=5):
+    """
+    Returns the process wide ThreadPool created upon the first call. New
+    code should prefer named_pool()
+    :param size: the number of threads when the pool is created
+    :return: the multiprocessing.pool.ThreadPool object
+    """
+    global _pool
+    with _pools_lock:
+        if _pool is None:
+            _pool = ThreadPool(processes=size)
+        return _pool
+
+
+# Each service should use its own pool so slow calls to one endpoint cannot
+# starve the others
+def named_pool(name=DEFAULT_POOL, size=None):
+    """
+    Returns the named WorkerPool creating it upon its first use
+    :param name: the name of the pool (i.e. 'nova', 'neutron' or 'heat')
+    :param size: the number of threads when the pool has not been configured
+                 by POOL_SIZES or the environment
+    :return: the WorkerPool object
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = WorkerPool(name, __pool_size(name, size))
+            _pools[name] = pool
+        return pool
+
+
+def pool_stats():
+    """
+    Returns the metrics of every pool created
+    :return: a dict where the key is the pool name and the value is the dict
+             returned by WorkerPool.stats()
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return dict((name, pool.stats()) for name, pool in pools.items())
+
+
+def shutdown_pools():
+    """
+    Terminates every pool once its queued tasks have completed. Pools are
+    created anew when next requested
+    """
     global _pool
-    if _pool is None:
-        _pool = ThreadPool(processes=size)
-    return _pool
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        if _pool is not None:
+            pools.append(_pool)
+            _pool = None
+    for pool in pools:
+        if isinstance(pool, WorkerPool):
+            pool.shutdown()
+        else:
+            pool.close()
+            pool.join()
+
+
+def __pool_size(name, size):
+    """
+    Returns the configured size of a pool
+    """
+    env_size = os.environ.get('SNAPS_{}_POOL_SIZE'.format(name.upper()))
+    if env_size:
+        try:
+            return max(1, int(env_size))
+        except ValueError:
+            logger.warning('Ignoring invalid size for pool %s - %s', name,
+                           env_size)
+    return max(1, POOL_SIZES.get(name, size or DEFAULT_POOL_SIZE))
+
+
+class WorkerPool:
+    """
+    Named thread pool recording its queue depth and latencies. Tasks
+    submitted by a thread of the same pool are executed inline as waiting
+    on them could otherwise exhaust the pool and deadlock
+    """
+
+    def __init__(self, name, size):
+        """
+        Constructor
+        :param name: the pool name
+        :param size: the number of threads
+        """
+        self.name = name
+        self.size = size
+        self.__pool = ThreadPool(processes=size)
+        self.__lock = threading.Lock()
+        self.__submitted = 0
+        self.__completed = 0
+        self.__failed = 0
+        self.__inline = 0
+        self.__running = 0
+        self.__max_queued = 0
+        self.__wait_time = 0.0
+        self.__run_time = 0.0
+
+    def apply_async(self, func, args=(), kwds=None):
+        """
+        Submits a function for execution
+        :param func: the function
+        :param args: the positional arguments
+        :param kwds: the keyword arguments
+        :return: an object whose get() method returns the function's result
+                 or raises its exception
+        """
+        kwds = kwds or dict()
+        if self.name in getattr(_local, 'pools', ()):
+            with self.__lock:
+                self.__inline += 1
+            logger.debug('Executing nested task inline on pool %s', self.name)
+            return InlineResult(func, args, kwds)
+
+        with self.__lock:
+            self.__submitted += 1
+            self.__max_queued = max(self.__max_queued, self.__queued())
+        return self.__pool.apply_async(
+            self.__run, (func, args, kwds, time.time()))
+
+    def __run(self, func, args, kwds, submitted):
+        started = time.time()
+        with self.__lock:
+            self.__running += 1
+            self.__wait_time += started - submitted
+
+        pools = getattr(_local, 'pools', ())
+        _local.pools = pools + (self.name,)
+        failed = True
+        try:
+            result = func(*args, **kwds)
+            failed = False
+            return result
+        finally:
+            _local.pools = pools
+            with self.__lock:
+                self.__running -= 1
+                self.__completed += 1
+                if failed:
+                    self.__failed += 1
+                self.__run_time += time.time() - started
+
+    def __queued(self):
+        return self.__submitted - self.__completed - self.__running
+
+    def stats(self):
+        """
+        Returns the pool's metrics
+        :return: a dict with the keys 'size', 'submitted', 'completed',
+                 'failed', 'inline', 'running', 'queued', 'max_queued',
+                 'avg_wait' and 'avg_run' where the averages are in seconds
+        """
+        with self.__lock:
+            done = self.__completed
+            return {
+                'size': self.size,
+                'submitted': self.__submitted,
+                'completed': done,
+                'failed': self.__failed,
+                'inline': self.__inline,
+                'running': self.__running,
+                'queued': self.__queued(),
+                'max_queued': self.__max_queued,
+                'avg_wait': self.__wait_time / done if done else 0.0,
+                'avg_run': self.__run_time / done if done else 0.0,
+            }
+
+    def shutdown(self):
+        """
+        Terminates the threads once the queued tasks have completed
+        """
+        self.__pool.close()
+        self.__pool.join()
+
+
+class InlineResult:
+    """
+    Result of a task executed upon submission exposing the get() method of
+    the ThreadPool's AsyncResult
+    """
+
+    def __init__(self, func, args, kwds):
+        self.__value = None
+        self.__error = None
+        try:
+            self.__value = func(*args, **kwds)
+        except Exception as e:
+            self.__error = e
+
+    def ready(self):
+        return True
+
+    def successful(self):
+        return self.__error is None
+
+    def wait(self, timeout=None):
+        pass
+
+    def get(self, timeout=None):
+        if self.__error:
+            raise self.__error
+        return self.__value
+
+
+def execute_graph(dependencies, task, max_workers=5, reverse=False):
+    """
+    Executes a task for each node of a dependency graph where a node is only
+    executed once all of the nodes on which it depends have completed. Nodes
+    without outstanding dependencies are executed concurrently on a pool
+    bounded by max_workers. Upon the first failure no new nodes are started
+    and the exception is raised once the running nodes have completed.
+    :param dependencies: dict where the key is the node and the value is an
+                         iterable of the nodes on which it depends. Nodes not
+                         contained in the keys are ignored
+    :param task: the function to call with each node as its only argument
+    :param max_workers: the maximum number of nodes to execute at once
+    :param reverse: when True, the graph is executed in reverse so a node is
+                    executed only after all of the nodes depending upon it
+                    have completed (i.e. for cleanup)
+    :return: a dict where the key is the node and value is the task's result
+    :raise: the first exception raised by the task or GraphCycleError
+    """
+    edges = dict()
+    for node, node_deps in dependencies.items():
+        edges[node] = set(
+            dep for dep in node_deps if dep in dependencies and dep != node)
+
+    if reverse:
+        reversed_edges = dict((node, set()) for node in edges)
+        for node, node_deps in edges.items():
+            for dep in node_deps:
+                reversed_edges[dep].add(node)
+        edges = reversed_edges
+
+    dependents = dict((node, set()) for node in edges)
+    for node, node_deps in edges.items():
+        for dep in node_deps:
+            dependents[dep].add(node)
+
+    remaining = dict((node, len(node_deps)) for node, node_deps in
+                     edges.items())
+    ready = [node for node, count in remaining.items() if count == 0]
+    results = dict()
+
+    if not edges:
+        return results
+
+    completed = queue.Queue()
+    pool = ThreadPool(processes=max(1, min(max_workers, len(edges))))
+    running = 0
+    failure = None
+
+    def run_node(node):
+        try:
+            completed.put((node, task(node), None))
+        except Exception as e:
+            completed.put((node, None, e))
+
+    try:
+        while True:
+            while ready and not failure:
+                node = ready.pop(0)
+                del remaining[node]
+                pool.apply_async(run_node, (node,))
+                running += 1
+
+            if running == 0:
+                break
+
+            node, result, error = completed.get()
+            running -= 1
+
+            if error:
+                if not failure:
+                    logger.error('Graph node %s failed - %s', node, error)
+                    failure = error
+                continue
+
+            results[node] = result
+            for dependent in dependents[node]:
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+    finally:
+        pool.close()
+        pool.join()
+
+    if failure:
+        raise failure
+
+    if remaining:
+        raise GraphCycleError(
+            'Unable to execute nodes with cyclic dependencies - {}'.format(
+                list(remaining.keys())))
+
+    return results
+
+
+class GraphCycleError(Exception):
+    """
+    Exception when a dependency graph cannot be executed due to a cycle
+    """